@@ -1,10 +1,153 @@
-def chunk_text(text, chunk_size=800, overlap=150):
-    chunks = []
+import re
+from typing import Callable, Iterable, Iterator, NamedTuple
+
+# A segment ends after sentence punctuation (plus closing quotes/brackets)
+# followed by whitespace, or at a paragraph break
+_SEGMENT_END = re.compile(r"(?<=[.!?])[\"')\]]*\s+|\n[ \t]*\n\s*")
+_WORD = re.compile(r"\S+\s*")
+
+
+class Chunk(NamedTuple):
+    text: str
+    start: int        # character offsets into "".join(pages)
+    end: int
+    page_start: int   # 1-based pages the chunk spans
+    page_end: int
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token) for budgeting chunks."""
+    return (len(text) + 3) // 4
+
+
+def _check_overlap(size, overlap):
+    if size <= 0:
+        raise ValueError("chunk size must be positive")
+    if not 0 <= overlap < size:
+        raise ValueError(f"overlap must be in [0, {size}), got {overlap}")
+
+
+def chunk_spans(text, chunk_size=800, overlap=150):
+    """Returns the (start, end) character offsets of each fixed-size chunk of text."""
+    _check_overlap(chunk_size, overlap)
+    spans = []
     start = 0
 
     while start < len(text):
         end = start + chunk_size
-        chunks.append(text[start:end])
+        spans.append((start, min(end, len(text))))
         start = end - overlap
 
-    return chunks
+    return spans
+
+
+def chunk_text(text, chunk_size=800, overlap=150):
+    return [text[start:end] for start, end in chunk_spans(text, chunk_size, overlap)]
+
+
+def _segments(page, max_tokens, count_tokens):
+    """Splits a page into (start, end, tokens) sentence/paragraph pieces within max_tokens."""
+    pos = 0
+    for match in _SEGMENT_END.finditer(page):
+        if match.end() > pos:
+            yield from _fit(page, pos, match.end(), max_tokens, count_tokens)
+            pos = match.end()
+    if pos < len(page):
+        yield from _fit(page, pos, len(page), max_tokens, count_tokens)
+
+
+def _fit(page, start, end, max_tokens, count_tokens):
+    """Yields page[start:end] whole, or split on words (then characters) if it exceeds max_tokens."""
+    tokens = count_tokens(page[start:end])
+    if tokens <= max_tokens:
+        yield start, end, tokens
+        return
+
+    piece_start = piece_end = start
+    for word in _WORD.finditer(page, start, end):
+        if count_tokens(page[piece_start:word.end()]) <= max_tokens:
+            piece_end = word.end()
+            continue
+        if piece_end > piece_start:
+            yield piece_start, piece_end, count_tokens(page[piece_start:piece_end])
+            piece_start = piece_end = word.start()
+        if count_tokens(word.group()) > max_tokens:
+            # A single "word" over budget (e.g. a long run without spaces)
+            step = max(1, max_tokens * 4)
+            for cut in range(word.start(), word.end(), step):
+                cut_end = min(cut + step, word.end())
+                yield cut, cut_end, count_tokens(page[cut:cut_end])
+            piece_start = piece_end = word.end()
+        else:
+            piece_end = word.end()
+    if piece_end > piece_start:
+        yield piece_start, piece_end, count_tokens(page[piece_start:piece_end])
+
+
+def iter_chunks(
+    pages: Iterable[str],
+    max_tokens: int = 200,
+    overlap_tokens: int = 40,
+    count_tokens: Callable[[str], int] = estimate_tokens
+) -> Iterator[Chunk]:
+    """
+    Lazily chunks a stream of page texts on sentence and paragraph boundaries.
+
+    Sentences are packed into chunks of at most max_tokens; each chunk
+    repeats up to overlap_tokens worth of whole trailing sentences from the
+    previous one. Sentences never straddle pages, but chunks may. Only the
+    text of the chunk being built is held in memory, so long documents can
+    stream straight into embedding.
+
+    Args:
+        pages: Page texts (a single string is treated as one page). Offsets
+            index into "".join(pages), e.g. ExtractionResult.text
+        max_tokens: Token budget per chunk
+        overlap_tokens: Tokens of trailing sentences repeated in the next chunk
+        count_tokens: Token counter used for budgeting
+
+    Yields:
+        Chunk(text, start, end, page_start, page_end)
+    """
+    _check_overlap(max_tokens, overlap_tokens)
+    if isinstance(pages, str):
+        pages = [pages]
+
+    # (start, end, tokens, page, text) of the segments in the current chunk
+    current = []
+    current_tokens = 0
+
+    def emit():
+        text = "".join(segment[4] for segment in current)
+        stripped = text.strip()
+        start = current[0][0] + len(text) - len(text.lstrip())
+        pages_used = [segment[3] for segment in current if segment[2]]
+        return Chunk(stripped, start, start + len(stripped), pages_used[0], pages_used[-1])
+
+    offset = 0
+    for number, page in enumerate(pages, start=1):
+        for start, end, tokens in _segments(page, max_tokens, count_tokens):
+            segment_text = page[start:end]
+            if not segment_text.strip():
+                # Whitespace between segments: kept so chunk text stays a slice of the pages
+                if current:
+                    current.append((offset + start, offset + end, 0, number, segment_text))
+                continue
+            if current and current_tokens + tokens > max_tokens:
+                yield emit()
+                # Carry whole trailing segments forward as overlap, always dropping at least one
+                kept = []
+                kept_tokens = 0
+                for segment in reversed(current[1:]):
+                    if kept_tokens + segment[2] > overlap_tokens or kept_tokens + segment[2] + tokens > max_tokens:
+                        break
+                    kept.append(segment)
+                    kept_tokens += segment[2]
+                current = kept[::-1]
+                current_tokens = kept_tokens
+            current.append((offset + start, offset + end, tokens, number, segment_text))
+            current_tokens += tokens
+        offset += len(page)
+
+    if current:
+        yield emit()
@@ -1,10 +1,7 @@
-from google import genai
-from dotenv import load_dotenv
-import os
-
-load_dotenv()
-
-client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+try:
+    from IDP_AI_Pipeline.genai_client import client
+except ImportError:
+    from genai_client import client
 
 CATEGORIES = [
     "HR Document",
@@ -1,15 +1,180 @@
 import os
-from dotenv import load_dotenv
-from google import genai
+import threading
+from itertools import islice
 
-load_dotenv()
+try:
+    from IDP_AI_Pipeline.genai_client import client
+    from IDP_AI_Pipeline.embedding_cache import EmbeddingCache
+except ImportError:
+    from genai_client import client
+    from embedding_cache import EmbeddingCache
+
+EMBEDDING_MODEL = "models/text-embedding-004"
+EMBEDDING_DIM = 768
+# Most texts the embedding API accepts in one batch request
+EMBED_BATCH_SIZE = 100
+DEFAULT_LOCAL_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+class GeminiEmbedder:
+    """Remote embeddings from the Gemini API (text-embedding-004, 768 dims)."""
+
+    name = "gemini"
+
+    def __init__(self, model=EMBEDDING_MODEL, dim=EMBEDDING_DIM):
+        self.model = model
+        self.dim = dim
+
+    def embed(self, texts):
+        """Embeds a list of texts in a single request; returns one vector per text."""
+        res = client.models.embed_content(
+            model=self.model,
+            contents=texts
+        )
+        if len(res.embeddings) != len(texts):
+            raise ValueError(f"Expected {len(texts)} embeddings, got {len(res.embeddings)}")
+        return [embedding.values for embedding in res.embeddings]
+
+
+class SentenceTransformerEmbedder:
+    """
+    In-process CPU embeddings from a sentence-transformers model; no
+    network round-trip. Requires the optional sentence-transformers package.
+    The vector size depends on the model (384 for the default MiniLM).
+    """
+
+    name = "local"
+
+    def __init__(self, model=None, device="cpu", batch_size=64):
+        # Deferred: sentence-transformers pulls in torch
+        from sentence_transformers import SentenceTransformer
+
+        self.model = model or os.getenv("LOCAL_EMBEDDING_MODEL", DEFAULT_LOCAL_MODEL)
+        self.batch_size = batch_size
+        self._model = SentenceTransformer(self.model, device=device)
+        self.dim = self._model.get_sentence_embedding_dimension()
+
+    def embed(self, texts):
+        """Embeds a list of texts in-process; returns a float32 matrix."""
+        return self._model.encode(
+            texts, batch_size=self.batch_size, convert_to_numpy=True, show_progress_bar=False
+        )
+
+
+EMBEDDERS = {
+    "gemini": GeminiEmbedder,
+    "local": SentenceTransformerEmbedder,
+}
+
+_embedder = None
+_embedder_lock = threading.Lock()
+
+
+def get_embedder():
+    """
+    Returns the shared embedding backend, creating it on first use.
+    The EMBEDDING_BACKEND environment variable selects 'gemini' (default)
+    or 'local'.
+    """
+    global _embedder
+    if _embedder is None:
+        with _embedder_lock:
+            if _embedder is None:
+                _embedder = EMBEDDERS[os.getenv("EMBEDDING_BACKEND", "gemini")]()
+    return _embedder
+
+
+def set_embedder(embedder):
+    """Replaces the shared embedding backend (an object with name, model, dim and embed())."""
+    global _embedder
+    with _embedder_lock:
+        _embedder = embedder
+
+
+_cache = None
+_cache_configured = False
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache():
+    """
+    Returns the shared EmbeddingCache, or None when caching is off.
+    Set EMBEDDING_CACHE_PATH to a SQLite file to enable it
+    (EMBEDDING_CACHE_MAX_MB bounds its size, default 256).
+    """
+    global _cache, _cache_configured
+    if not _cache_configured:
+        with _cache_lock:
+            if not _cache_configured:
+                path = os.getenv("EMBEDDING_CACHE_PATH")
+                if path:
+                    max_mb = float(os.getenv("EMBEDDING_CACHE_MAX_MB", "256"))
+                    _cache = EmbeddingCache(path, max_bytes=int(max_mb * 1024 * 1024))
+                _cache_configured = True
+    return _cache
+
+
+def set_embedding_cache(cache):
+    """Replaces the shared embedding cache; None disables caching."""
+    global _cache, _cache_configured
+    with _cache_lock:
+        _cache = cache
+        _cache_configured = True
 
-client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
 
 def embed_text(text: str):
-    """Returns a 768-dim embedding vector."""
-    res = client.models.embed_content(
-        model="models/text-embedding-004",
-        contents=text
-    )
-    return res.embeddings[0].values
+    """
+    Returns the embedding of one text as a float32 vector (768 dims with
+    the Gemini backend), whichever backend or cache it came from.
+    """
+    import numpy as np  # deferred to keep `import embedder` cheap
+
+    embedder = get_embedder()
+    cache = get_embedding_cache()
+    if cache is not None:
+        vector = cache.get(embedder.model, text)
+        if vector is not None:
+            return vector
+
+    values = np.asarray(embedder.embed([text])[0], dtype=np.float32)
+    if cache is not None:
+        cache.put(embedder.model, text, values)
+    return values
+
+
+def batched(items, size=EMBED_BATCH_SIZE):
+    """Yields lists of up to `size` items from any iterable, consuming it lazily."""
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def embed_texts(texts, batch_size=EMBED_BATCH_SIZE):
+    """
+    Embeds many texts with one request per `batch_size` texts.
+
+    Returns a float32 matrix with one row per text, in input order.
+    Texts found in the embedding cache are not sent.
+    """
+    import numpy as np  # deferred to keep `import embedder` cheap
+
+    embedder = get_embedder()
+    cache = get_embedding_cache()
+    rows = []
+    for batch in batched(texts, batch_size):
+        vectors = cache.get_many(embedder.model, batch) if cache is not None else [None] * len(batch)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            fresh = embedder.embed([batch[i] for i in missing])
+            for i, values in zip(missing, fresh):
+                vectors[i] = values
+            if cache is not None:
+                cache.put_many(embedder.model, [batch[i] for i in missing], fresh)
+        rows.extend(vectors)
+
+    if not rows:
+        return np.empty((0, embedder.dim), dtype=np.float32)
+    return np.asarray(rows, dtype=np.float32)
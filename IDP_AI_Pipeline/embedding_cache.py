@@ -0,0 +1,163 @@
+import hashlib
+import sqlite3
+import threading
+import time
+
+# An over-budget put evicts vectors until the table is back under this share
+# of max_bytes, leaving headroom for the next puts before it evicts again
+EVICT_TO = 0.9
+# Least recently used entries read per eviction query
+EVICT_BATCH = 256
+
+
+def normalize_text(text):
+    """Whitespace-insensitive form of a text, so re-extracted copies hit the cache."""
+    return " ".join(text.split())
+
+
+class EmbeddingCache:
+    """
+    SQLite-backed embedding cache keyed by (model, SHA-256 of normalized text).
+
+    Vectors are stored as raw float32 bytes. Once the stored vectors exceed
+    max_bytes, the least recently used entries are evicted down to
+    EVICT_TO * max_bytes. Safe to share between threads, and between
+    processes using the same file: the stored size is kept in the database
+    by triggers rather than counted per process.
+    """
+
+    def __init__(self, path="./.embedding_cache.sqlite", max_bytes=256 * 1024 * 1024):
+        self.path = str(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key BLOB PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS embeddings_lru ON embeddings(last_used)")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS cache_size (
+                id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER NOT NULL);
+            INSERT OR IGNORE INTO cache_size
+                SELECT 0, COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings;
+            CREATE TRIGGER IF NOT EXISTS embeddings_insert AFTER INSERT ON embeddings BEGIN
+                UPDATE cache_size SET bytes = bytes + LENGTH(NEW.vector);
+            END;
+            CREATE TRIGGER IF NOT EXISTS embeddings_delete AFTER DELETE ON embeddings BEGIN
+                UPDATE cache_size SET bytes = bytes - LENGTH(OLD.vector);
+            END;
+            CREATE TRIGGER IF NOT EXISTS embeddings_update AFTER UPDATE OF vector ON embeddings BEGIN
+                UPDATE cache_size SET bytes = bytes + LENGTH(NEW.vector) - LENGTH(OLD.vector);
+            END;
+        """)
+        self._db.commit()
+
+    @staticmethod
+    def key(model, text):
+        digest = hashlib.sha256(model.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(normalize_text(text).encode("utf-8"))
+        return digest.digest()
+
+    def get_many(self, model, texts):
+        """Returns a list with the cached float32 vector for each text, or None on a miss."""
+        import numpy as np
+
+        keys = [self.key(model, text) for text in texts]
+        with self._lock:
+            found = {}
+            # Stay under SQLite's bound-parameter limit
+            for i in range(0, len(keys), 500):
+                part = keys[i:i + 500]
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(part))})",
+                    part
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._db.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?", [(now, k) for k in found]
+                )
+                self._db.commit()
+            self.hits += sum(1 for k in keys if k in found)
+            self.misses += sum(1 for k in keys if k not in found)
+
+        return [
+            np.frombuffer(found[k], dtype=np.float32) if k in found else None
+            for k in keys
+        ]
+
+    def put_many(self, model, texts, vectors):
+        """Stores one vector per text, evicting old entries if the cache is over budget."""
+        import numpy as np
+
+        now = time.time()
+        blobs = {
+            self.key(model, text): np.asarray(vector, dtype=np.float32).tobytes()
+            for text, vector in zip(texts, vectors)
+        }
+        with self._lock:
+            # An upsert rather than INSERT OR REPLACE: REPLACE's implicit
+            # delete does not fire the size trigger
+            self._db.executemany(
+                "INSERT INTO embeddings VALUES (?, ?, ?) ON CONFLICT(key) DO UPDATE"
+                " SET vector = excluded.vector, last_used = excluded.last_used",
+                [(key, blob, now) for key, blob in blobs.items()]
+            )
+            # Read inside this write transaction, so it includes other processes' puts
+            size = self._stored_bytes()
+            if size > self.max_bytes:
+                self._evict(size)
+            self._db.commit()
+
+    def get(self, model, text):
+        return self.get_many(model, [text])[0]
+
+    def put(self, model, text, vector):
+        self.put_many(model, [text], [vector])
+
+    def stats(self):
+        """Returns hit/miss counters and current cache size."""
+        lookups = self.hits + self.misses
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            size = self._stored_bytes()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _stored_bytes(self):
+        return self._db.execute("SELECT bytes FROM cache_size").fetchone()[0]
+
+    def _evict(self, size):
+        # Drop least recently used entries, oldest first, down to the low-water
+        # mark. Reads walk the last_used index a batch at a time, never the
+        # whole table.
+        target = EVICT_TO * self.max_bytes
+        while size > target:
+            rows = self._db.execute(
+                "SELECT key, LENGTH(vector) FROM embeddings ORDER BY last_used LIMIT ?",
+                (EVICT_BATCH,)
+            ).fetchall()
+            if not rows:
+                break
+            doomed = []
+            for key, length in rows:
+                if size <= target:
+                    break
+                doomed.append((key,))
+                size -= length
+            self._db.executemany("DELETE FROM embeddings WHERE key = ?", doomed)
@@ -0,0 +1,129 @@
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from IDP_AI_Pipeline.embedder import EMBED_BATCH_SIZE, batched, embed_texts, get_embedder
+except ImportError:
+    from embedder import EMBED_BATCH_SIZE, batched, embed_texts, get_embedder
+
+# Quota for text-embedding-004 requests on the paid tier
+DEFAULT_REQUESTS_PER_MINUTE = 1500
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts of up to `capacity`."""
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """Blocks until `tokens` are available, then takes them."""
+        while True:
+            with self._lock:
+                now = self._clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            self._sleep(wait)
+
+
+def is_retryable(error):
+    """True for rate limiting (429) and server (5xx) errors from the API."""
+    code = getattr(error, "code", None) or getattr(error, "status_code", None)
+    return isinstance(code, int) and (code == 429 or 500 <= code < 600)
+
+
+class EmbeddingExecutor:
+    """
+    Runs embedding batch requests on a thread pool.
+
+    At most max_workers requests are in flight, requests start no faster
+    than requests_per_minute, and 429/5xx failures are retried with
+    exponential backoff and full jitter. Results always come back in input
+    order.
+    """
+
+    def __init__(
+        self,
+        embed_fn=None,
+        max_workers=4,
+        requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE,
+        batch_size=EMBED_BATCH_SIZE,
+        max_retries=5,
+        base_delay=1.0,
+        max_delay=30.0
+    ):
+        self.embed_fn = embed_fn or embed_texts
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.limiter = TokenBucket(requests_per_minute / 60.0, capacity=max_workers)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="embed")
+
+    def _call(self, texts):
+        attempt = 0
+        while True:
+            self.limiter.acquire()
+            try:
+                return self.embed_fn(texts)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+                time.sleep(random.uniform(0, delay))
+                attempt += 1
+
+    def iter_embedded(self, items, text=None):
+        """
+        Embeds a stream of items, yielding (item, vector) pairs in input order.
+
+        `text` maps an item to the string to embed (default: the item itself).
+        Only a bounded window of batches is held in memory at a time.
+        """
+        text = text or (lambda item: item)
+        pending = deque()
+        for batch in batched(items, self.batch_size):
+            pending.append((batch, self._pool.submit(self._call, [text(item) for item in batch])))
+            if len(pending) >= 2 * self.max_workers:
+                yield from self._drain(pending.popleft())
+        while pending:
+            yield from self._drain(pending.popleft())
+
+    @staticmethod
+    def _drain(entry):
+        batch, future = entry
+        return zip(batch, future.result())
+
+    def embed(self, texts):
+        """Embeds all texts concurrently; returns a float32 matrix in input order."""
+        import numpy as np
+
+        vectors = [vector for _, vector in self.iter_embedded(texts)]
+        if not vectors:
+            return np.empty((0, get_embedder().dim), dtype=np.float32)
+        return np.asarray(vectors, dtype=np.float32)
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,11 +1,9 @@
-import os
 import json
-from dotenv import load_dotenv
-from google import genai
 
-load_dotenv()
-
-client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+try:
+    from IDP_AI_Pipeline.genai_client import client
+except ImportError:
+    from genai_client import client
 
 def extract_key_information(text: str):
     """
@@ -0,0 +1,34 @@
+import os
+import threading
+
+_client = None
+_lock = threading.Lock()
+
+
+def get_client():
+    """Returns the shared genai.Client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                # Deferred: google.genai alone takes ~0.5s to import
+                from dotenv import load_dotenv
+                from google import genai
+
+                load_dotenv()
+                _client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+    return _client
+
+
+class LazyClient:
+    """Stand-in for genai.Client that builds the shared client on first attribute access."""
+
+    def __getattr__(self, name):
+        # Introspection (mock.patch, copy, pickle) probes private names;
+        # only public client attributes (models, aio, ...) create the client
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(get_client(), name)
+
+
+client = LazyClient()
@@ -3,7 +3,7 @@ try:
     from IDP_AI_Pipeline.summarizer import summarize_document
     from IDP_AI_Pipeline.classifier import classify_document
     from IDP_AI_Pipeline.router import route_document
-    from IDP_AI_Pipeline.chunker import chunk_text
+    from IDP_AI_Pipeline.chunker import iter_chunks
     from IDP_AI_Pipeline.rag_engine import build_index, rag_query
     from IDP_AI_Pipeline.extractor import extract_key_information
 except ImportError:
@@ -11,7 +11,7 @@ except ImportError:
     from summarizer import summarize_document
     from classifier import classify_document
     from router import route_document
-    from chunker import chunk_text
+    from chunker import iter_chunks
     from rag_engine import build_index, rag_query
     from extractor import extract_key_information
 
@@ -22,8 +22,8 @@ def run_full_pipeline(text: str, rag_query_text: str = "What is the main topic o
     2. Classifies the document.
     3. Routes the document based on classification.
     4. Extracts key information (Auto-Field Extraction).
-    5. Chunks the text.
-    6. Builds a vector index (RAG).
+    5. Chunks the text on sentence boundaries.
+    6. Builds a vector index (RAG), streaming chunks into it.
     7. Performs a sample RAG query.
     """
     
@@ -39,8 +39,8 @@ def run_full_pipeline(text: str, rag_query_text: str = "What is the main topic o
     # 4. Auto-Field Extraction
     extracted_data = extract_key_information(text)
     
-    # 5. Chunk
-    chunks = chunk_text(text)
+    # 5. Chunk (lazily)
+    chunks = (chunk.text for chunk in iter_chunks(text))
     
     # 6. Build Index (RAG)
     build_index(chunks)
@@ -1,24 +1,18 @@
-import os
-from dotenv import load_dotenv
-from google import genai
-
 try:
-    from IDP_AI_Pipeline.embedder import embed_text
+    from IDP_AI_Pipeline.embedder import batched, embed_text, embed_texts
+    from IDP_AI_Pipeline.genai_client import client
     from IDP_AI_Pipeline.vector_store import VectorStore
 except ImportError:
-    from embedder import embed_text
+    from embedder import batched, embed_text, embed_texts
+    from genai_client import client
     from vector_store import VectorStore
 
-load_dotenv()
-
-client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
-
 store = VectorStore()
 
 def build_index(chunks):
-    for chunk in chunks:
-        emb = embed_text(chunk)
-        store.add(emb, chunk)
+    # One embedding request per batch of chunks; chunks may be a generator
+    for batch in batched(chunks):
+        store.add_many(embed_texts(batch), batch)
 
 def rag_query(query):
     query_emb = embed_text(query)
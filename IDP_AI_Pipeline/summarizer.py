@@ -1,10 +1,7 @@
-import os
-from dotenv import load_dotenv
-from google import genai
-
-load_dotenv()
-
-client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+try:
+    from IDP_AI_Pipeline.genai_client import client
+except ImportError:
+    from genai_client import client
 
 def call_gemini(prompt: str):
     """Generic helper to call Gemini API with a prompt."""
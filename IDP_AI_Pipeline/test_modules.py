@@ -2,13 +2,20 @@ import unittest
 from unittest.mock import MagicMock, patch
 import sys
 import os
+import subprocess
+import tempfile
+import time
+
+import numpy as np
 
 # Add the parent directory to sys.path to import modules
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from chunker import chunk_text
+from chunker import chunk_text, chunk_spans, iter_chunks
 from router import route_document
 from vector_store import VectorStore
+from embedding_cache import EmbeddingCache
+from embedding_executor import EmbeddingExecutor, TokenBucket
 
 # We need to mock genai before importing modules that use it at top level if we want to avoid init issues,
 # but the current modules instantiate client at top level. 
@@ -23,6 +30,185 @@ class TestIDPModules(unittest.TestCase):
         self.assertTrue(len(chunks) > 1)
         self.assertTrue(len(chunks[0]) == 100)
 
+    def test_chunk_spans(self):
+        text = "abcdefghij" * 5
+        spans = chunk_spans(text, chunk_size=20, overlap=5)
+        self.assertEqual(spans[:2], [(0, 20), (15, 35)])
+        self.assertEqual(spans[-1][1], len(text))
+        self.assertEqual([text[s:e] for s, e in spans], chunk_text(text, chunk_size=20, overlap=5))
+
+    def test_chunk_spans_rejects_overlap_past_size(self):
+        with self.assertRaises(ValueError):
+            chunk_spans("a" * 100, chunk_size=10, overlap=10)
+
+    def test_iter_chunks_respects_sentences(self):
+        pages = ["First sentence here. Second one follows.\n\n", "Third on page two. Fourth.\n"]
+        text = "".join(pages)
+        chunks = list(iter_chunks(iter(pages), max_tokens=12, overlap_tokens=6))
+
+        self.assertEqual(chunks[0].text, "First sentence here. Second one follows.")
+        for chunk in chunks:
+            self.assertEqual(text[chunk.start:chunk.end], chunk.text)
+            self.assertTrue(chunk.text.endswith("."))
+        self.assertEqual((chunks[-1].page_start, chunks[-1].page_end), (2, 2))
+        # Whole trailing sentences are repeated as overlap
+        self.assertTrue(chunks[1].text.startswith("Second one follows."))
+
+    def test_iter_chunks_splits_oversized_runs(self):
+        chunks = list(iter_chunks("a" * 1000, max_tokens=25, overlap_tokens=0))
+        self.assertEqual([len(chunk.text) for chunk in chunks], [100] * 10)
+
+    def test_iter_chunks_is_lazy(self):
+        def pages():
+            yield "One. Two. Three."
+            raise AssertionError("second page read before first chunk was consumed")
+
+        self.assertEqual(next(iter_chunks(pages(), max_tokens=2, overlap_tokens=0)).text, "One.")
+
+    def test_embedding_cache_evicts_least_recently_used(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "emb.sqlite")
+            cache = EmbeddingCache(path, max_bytes=3 * 4 * 4 + 8)   # three 4-dim vectors
+            for n in range(3):
+                cache.put("model", f"text {n}", [n] * 4)
+            cache.get("model", "text 0")          # now most recently used
+            cache.put("model", "text 3", [3] * 4)
+            cache.close()
+
+            reopened = EmbeddingCache(path, max_bytes=3 * 4 * 4 + 8)
+            self.assertIsNone(reopened.get("model", "text 1"))
+            self.assertEqual(reopened.get("model", "text 0").tolist(), [0.0] * 4)
+            self.assertIsNone(reopened.get("other-model", "text 0"))
+            stats = reopened.stats()
+            reopened.close()
+        self.assertEqual((stats["entries"], stats["bytes"]), (3, 48))
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+
+    def test_embedding_cache_evicts_down_to_low_water_mark(self):
+        import embedding_cache
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = EmbeddingCache(os.path.join(tmp, "emb.sqlite"), max_bytes=100 * 16)
+            with patch.object(embedding_cache, "EVICT_BATCH", 7):
+                for n in range(101):
+                    cache.put("model", f"text {n}", [n] * 4)
+            stats = cache.stats()
+            evicted = [n for n in range(11) if cache.get("model", f"text {n}") is None]
+            cache.close()
+        # One insert over budget frees room down to 90%, across several batches
+        self.assertEqual((stats["entries"], stats["bytes"]), (90, 90 * 16))
+        self.assertEqual(evicted, list(range(11)))
+
+    def test_embedding_cache_budget_is_shared_between_connections(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "emb.sqlite")
+            # Two connections stand in for two worker processes
+            first = EmbeddingCache(path, max_bytes=3 * 16 + 8)
+            second = EmbeddingCache(path, max_bytes=3 * 16 + 8)
+            first.put_many("model", ["a", "b"], [[1] * 4, [2] * 4])
+            second.put_many("model", ["c", "d"], [[3] * 4, [4] * 4])
+            stats = first.stats(), second.stats()
+            first.close()
+            second.close()
+        # The second put saw the first connection's vectors and evicted
+        self.assertEqual([(s["entries"], s["bytes"]) for s in stats], [(3, 48), (3, 48)])
+
+    def test_embed_texts_uses_configured_backend(self):
+        import embedder
+
+        class FakeLocalEmbedder:
+            name = "fake"
+            model = "fake-model"
+            dim = 3
+
+            def embed(self, texts):
+                return np.array([[len(text), 1, 2] for text in texts], dtype=np.float32)
+
+        embedder.set_embedder(FakeLocalEmbedder())
+        try:
+            matrix = embedder.embed_texts(["ab", "abcd"])
+            empty = embedder.embed_texts([])
+            single = embedder.embed_text("abc")
+        finally:
+            embedder.set_embedder(None)
+
+        self.assertEqual(matrix[:, 0].tolist(), [2, 4])
+        self.assertEqual(empty.shape, (0, 3))
+        self.assertEqual(list(single), [3, 1, 2])
+
+    def test_embed_text_returns_float32_from_local_backend_and_cache(self):
+        import embedder
+
+        model = MagicMock()
+        model.get_sentence_embedding_dimension.return_value = 2
+        model.encode.side_effect = lambda texts, **kwargs: np.array([[0.5, 1.5]] * len(texts), dtype=np.float64)
+        fake_module = MagicMock()
+        fake_module.SentenceTransformer.return_value = model
+
+        with patch.dict(sys.modules, {"sentence_transformers": fake_module}):
+            embedder.set_embedder(embedder.SentenceTransformerEmbedder(model="fake-local"))
+        try:
+            embedder.set_embedding_cache(None)
+            uncached = embedder.embed_text("abc")
+            with tempfile.TemporaryDirectory() as tmp:
+                cache = EmbeddingCache(os.path.join(tmp, "emb.sqlite"))
+                embedder.set_embedding_cache(cache)
+                miss = embedder.embed_text("abc")
+                hit = embedder.embed_text("abc")
+                cache.close()
+        finally:
+            embedder.set_embedder(None)
+            embedder.set_embedding_cache(None)
+
+        for vector in (uncached, miss, hit):
+            self.assertIsInstance(vector, np.ndarray)
+            self.assertEqual((vector.dtype, vector.tolist()), (np.float32, [0.5, 1.5]))
+        self.assertEqual(model.encode.call_count, 2)
+
+    def test_token_bucket_waits_for_refill(self):
+        now = [0.0]
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            now[0] += seconds
+
+        bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now[0], sleep=sleep)
+        for _ in range(4):
+            bucket.acquire()
+        self.assertEqual(sleeps, [0.5, 0.5])
+
+    def test_executor_keeps_order_and_retries(self):
+        class RateLimited(Exception):
+            code = 429
+
+        failures = [RateLimited()]
+
+        def embed_fn(texts):
+            if failures and texts[0] == "t40":
+                raise failures.pop()
+            time.sleep(0.01 * (len(texts) % 3))
+            return [[int(text[1:]), 0.0] for text in texts]
+
+        texts = [f"t{n}" for n in range(95)]
+        with EmbeddingExecutor(embed_fn, max_workers=4, requests_per_minute=60000,
+                               batch_size=10, base_delay=0) as executor:
+            matrix = executor.embed(texts)
+
+        self.assertEqual(matrix[:, 0].tolist(), list(range(95)))
+        self.assertEqual(failures, [])
+
+    def test_executor_does_not_retry_client_errors(self):
+        class BadRequest(Exception):
+            code = 400
+
+        def embed_fn(texts):
+            raise BadRequest()
+
+        with EmbeddingExecutor(embed_fn, requests_per_minute=60000, base_delay=0) as executor:
+            with self.assertRaises(BadRequest):
+                executor.embed(["a"])
+
     def test_router(self):
         self.assertEqual(route_document("Invoice"), "Finance Team")
         self.assertEqual(route_document("Unknown"), "General Review Team")
@@ -36,6 +222,25 @@ class TestIDPModules(unittest.TestCase):
         results = store.search([0.9, 0.9], top_k=1)
         self.assertEqual(results[0], "doc2")
 
+    def test_vector_store_grows_and_searches_many(self):
+        rng = np.random.default_rng(0)
+        vectors = rng.normal(size=(300, 8)).astype(np.float32)
+        store = VectorStore(initial_capacity=16)
+        store.add_many(vectors[:100], [f"doc{i}" for i in range(100)])
+        for i in range(100, 300):
+            store.add(vectors[i], f"doc{i}")
+        self.assertEqual(len(store), 300)
+
+        queries = vectors[[5, 250]] * 3
+        results = store.search_many(queries, top_k=4)
+
+        unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        for query, hits in zip(queries, results):
+            expected = np.argsort(-(unit @ query))[:4]
+            self.assertEqual(hits, [f"doc{i}" for i in expected])
+        self.assertEqual(results[0][0], "doc5")
+        self.assertEqual(store.search(queries[1], top_k=1000)[0], "doc250")
+
     @patch('classifier.client')
     def test_classifier(self, mock_client):
         from classifier import classify_document
@@ -68,7 +273,48 @@ class TestIDPModules(unittest.TestCase):
         mock_client.models.embed_content.return_value = mock_response
         
         emb = embed_text("text")
-        self.assertEqual(emb, [0.1, 0.2, 0.3])
+        self.assertEqual(emb.dtype, np.float32)
+        np.testing.assert_allclose(emb, [0.1, 0.2, 0.3], rtol=1e-6)
+
+    @patch('embedder.client')
+    def test_embed_texts_batches_requests(self, mock_client):
+        from embedder import embed_texts
+
+        def embed_content(model, contents):
+            return MagicMock(embeddings=[MagicMock(values=[len(text), 0.5]) for text in contents])
+        mock_client.models.embed_content.side_effect = embed_content
+
+        texts = ["x" * n for n in range(1, 251)]
+        matrix = embed_texts(iter(texts))
+
+        self.assertEqual(mock_client.models.embed_content.call_count, 3)
+        self.assertEqual(matrix.dtype, np.float32)
+        self.assertEqual(matrix.shape, (250, 2))
+        self.assertEqual(matrix[249, 0], 250)
+
+    @patch('embedder.client')
+    def test_embed_texts_skips_cached_texts(self, mock_client):
+        import embedder
+
+        def embed_content(model, contents):
+            return MagicMock(embeddings=[MagicMock(values=[len(text), 0.5]) for text in contents])
+        mock_client.models.embed_content.side_effect = embed_content
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = EmbeddingCache(os.path.join(tmp, "emb.sqlite"))
+            embedder.set_embedding_cache(cache)
+            try:
+                embedder.embed_texts(["terms and conditions", "invoice 1"])
+                matrix = embedder.embed_texts(["terms  and\nconditions", "invoice 2"])
+                stats = cache.stats()
+            finally:
+                embedder.set_embedding_cache(None)
+                cache.close()
+
+        # Second call only sends the text it has not seen (modulo whitespace)
+        self.assertEqual(mock_client.models.embed_content.call_args.kwargs["contents"], ["invoice 2"])
+        self.assertEqual(matrix[0, 0], len("terms and conditions"))
+        self.assertEqual(stats["hits"], 1)
 
     @patch('extractor.client')
     def test_extractor(self, mock_client):
@@ -82,5 +328,23 @@ class TestIDPModules(unittest.TestCase):
         self.assertEqual(data['DocumentType'], "Invoice")
         self.assertEqual(data['TotalAmount'], 100)
 
+    def test_imports_defer_genai_client(self):
+        # Importing the Gemini-backed modules must not import google.genai
+        code = (
+            "import sys, embedder, summarizer, classifier, extractor, rag_engine; "
+            "print('google.genai' in sys.modules)"
+        )
+        env = {k: v for k, v in os.environ.items() if k != "GEMINI_API_KEY"}
+        out = subprocess.run(
+            [sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True, env=env
+        )
+        self.assertEqual(out.stdout.strip(), "False")
+
+    def test_modules_share_one_client(self):
+        import summarizer, classifier, extractor, embedder
+        self.assertIs(summarizer.client, classifier.client)
+        self.assertIs(extractor.client, embedder.client)
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,27 +1,90 @@
 import numpy as np
 
+
+def _normalize(matrix):
+    """Scales rows to unit length (zero rows stay zero)."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
 class VectorStore:
-    def __init__(self):
-        self.embeddings = []
+    """
+    In-memory cosine-similarity store.
+
+    Embeddings live in one growable float32 matrix whose rows are
+    normalized on insert, so a query is a single matrix-vector product
+    followed by a partial top-k selection.
+    """
+
+    def __init__(self, dim=None, initial_capacity=1024):
+        self.dim = dim
         self.documents = []
+        self._size = 0
+        self._matrix = None
+        self._initial_capacity = initial_capacity
+
+    @property
+    def embeddings(self):
+        """The stored (normalized) embeddings, one row per document."""
+        if self._matrix is None:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        return self._matrix[:self._size]
+
+    def __len__(self):
+        return self._size
 
     def add(self, embedding, text):
-        self.embeddings.append(embedding)
-        self.documents.append(text)
+        self.add_many([embedding], [text])
+
+    def add_many(self, embeddings, texts):
+        """Adds a batch of embeddings (any 2-D array-like) with their texts."""
+        rows = np.asarray(embeddings, dtype=np.float32)
+        if rows.ndim != 2 or len(rows) != len(texts):
+            raise ValueError("embeddings must be a 2-D array with one row per text")
+        if len(rows) == 0:
+            return
+        if self.dim is None:
+            self.dim = rows.shape[1]
+        if rows.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-dim embeddings, got {rows.shape[1]}")
+
+        self._reserve(self._size + len(rows))
+        self._matrix[self._size:self._size + len(rows)] = _normalize(rows)
+        self._size += len(rows)
+        self.documents.extend(texts)
+
+    def _reserve(self, needed):
+        capacity = 0 if self._matrix is None else len(self._matrix)
+        if needed <= capacity:
+            return
+        # Grow geometrically so repeated adds stay amortized O(1)
+        new_capacity = max(needed, 2 * capacity, self._initial_capacity)
+        matrix = np.empty((new_capacity, self.dim), dtype=np.float32)
+        if self._size:
+            matrix[:self._size] = self._matrix[:self._size]
+        self._matrix = matrix
 
     def search(self, query_embedding, top_k=3):
         """Returns the top_k most similar documents."""
-        if not self.embeddings:
-            return []
+        return self.search_many([query_embedding], top_k=top_k)[0]
 
-        # Convert to numpy vectors
-        emb_matrix = np.array(self.embeddings)
+    def search_many(self, query_embeddings, top_k=3):
+        """Returns the top_k most similar documents for each query, using one matrix multiply."""
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        if self._size == 0:
+            return [[] for _ in range(len(queries))]
 
-        # Cosine similarity
-        scores = np.dot(emb_matrix, query_embedding) / (
-            np.linalg.norm(emb_matrix, axis=1) * np.linalg.norm(query_embedding)
-        )
+        # Cosine similarity: rows are already unit length
+        scores = _normalize(queries) @ self.embeddings.T
+        k = min(top_k, self._size)
+        if k <= 0:
+            return [[] for _ in range(len(queries))]
 
-        top_indices = np.argsort(scores)[-top_k:][::-1]
+        # Partial selection of the k best, then order just those k
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
 
-        return [self.documents[i] for i in top_indices]
+        return [[self.documents[i] for i in row] for row in top]
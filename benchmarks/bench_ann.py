@@ -0,0 +1,84 @@
+"""
+Benchmark: recall@k vs query latency of FAISSStore index types against the flat baseline.
+
+Uses clustered synthetic vectors (or a .npy matrix of real embeddings) and
+sweeps ef_search for HNSW and nprobe for IVF.
+
+Usage:
+    python benchmarks/bench_ann.py [--n 100000] [--dim 768] [--queries 200] [--k 10] [--vectors emb.npy]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add repository root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from faiss_engine.faiss_store import FAISSStore
+
+
+def synthetic(n, dim, clusters=256, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32) * 4
+    return centers[rng.integers(clusters, size=n)] + rng.normal(size=(n, dim)).astype(np.float32)
+
+
+def run(store, queries, k, truth):
+    start = time.perf_counter()
+    _, ids = store.index.search(queries, k)
+    elapsed = time.perf_counter() - start
+    recall = np.mean([len(set(row) & set(expected)) / k for row, expected in zip(ids, truth)])
+    return recall, 1000 * elapsed / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--n", type=int, default=100_000, help="Vectors in the store")
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--vectors", help="Optional .npy matrix of real embeddings")
+    args = parser.parse_args()
+
+    if args.vectors:
+        data = np.load(args.vectors).astype(np.float32)
+    else:
+        data = synthetic(args.n + args.queries, args.dim)
+    base, queries = data[:-args.queries], data[-args.queries:]
+    texts = [""] * len(base)
+    print(f"{len(base)} vectors x {base.shape[1]} dims, {len(queries)} queries, recall@{args.k}\n")
+
+    stores = {}
+    for name, kwargs in {
+        "flat": dict(index_type="flat", promote_at=None),
+        "hnsw": dict(index_type="hnsw"),
+        "ivf": dict(index_type="ivf", train_at=0),
+    }.items():
+        start = time.perf_counter()
+        store = FAISSStore(dim=base.shape[1], **kwargs)
+        store.add_batch(base, texts)
+        store.wait_for_rebuild()
+        stores[name] = store
+        print(f"built {name:<5} in {time.perf_counter() - start:6.1f}s")
+
+    _, truth = stores["flat"].index.search(queries, args.k)
+
+    print(f"\n{'index':<6} {'param':<14} {'recall':>8} {'ms/query':>10}")
+    print("-" * 42)
+    recall, ms = run(stores["flat"], queries, args.k, truth)
+    print(f"{'flat':<6} {'-':<14} {recall:>8.3f} {ms:>10.3f}")
+    for ef in (16, 32, 64, 128, 256):
+        stores["hnsw"].set_search_params(ef_search=ef)
+        recall, ms = run(stores["hnsw"], queries, args.k, truth)
+        print(f"{'hnsw':<6} {f'ef_search={ef}':<14} {recall:>8.3f} {ms:>10.3f}")
+    for nprobe in (1, 4, 16, 64):
+        stores["ivf"].set_search_params(nprobe=nprobe)
+        recall, ms = run(stores["ivf"], queries, args.k, truth)
+        print(f"{'ivf':<6} {f'nprobe={nprobe}':<14} {recall:>8.3f} {ms:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
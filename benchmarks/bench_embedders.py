@@ -0,0 +1,61 @@
+"""
+Benchmark: embedding throughput (texts/second, and per core) of each embedding backend.
+
+The remote backend needs GEMINI_API_KEY; the local one needs the optional
+sentence-transformers package. Unavailable backends are reported and skipped.
+
+Usage:
+    python benchmarks/bench_embedders.py [--texts 512] [--batch 100] [--local-model NAME]
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add repository root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from IDP_AI_Pipeline.embedder import EMBEDDERS, batched
+
+SAMPLE = (
+    "Invoice INV-{n} issued to customer account {n} for services rendered during the "
+    "billing period. Payment is due within 30 days; late payments accrue interest."
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--texts", type=int, default=512, help="Number of chunk-sized texts")
+    parser.add_argument("--batch", type=int, default=100, help="Texts per embed() call")
+    parser.add_argument("--local-model", help="sentence-transformers model for the local backend")
+    args = parser.parse_args()
+
+    texts = [SAMPLE.format(n=n) for n in range(args.texts)]
+    cores = os.cpu_count() or 1
+    print(f"{len(texts)} texts, batches of {args.batch}, {cores} core(s)\n")
+
+    print(f"{'backend':<10} {'dim':>5} {'texts/s':>10} {'per core':>10} {'ms/batch':>10}")
+    print("-" * 50)
+    for name, embedder_cls in EMBEDDERS.items():
+        try:
+            embedder = embedder_cls(model=args.local_model) if name == "local" else embedder_cls()
+            # Warm-up (model load, connection set-up)
+            embedder.embed(texts[:2])
+        except Exception as e:
+            print(f"{name:<10} unavailable: {e}")
+            continue
+
+        batches = list(batched(texts, args.batch))
+        start = time.perf_counter()
+        for batch in batches:
+            embedder.embed(batch)
+        elapsed = time.perf_counter() - start
+
+        rate = len(texts) / elapsed
+        # A remote backend barely uses local CPU; per-core only matters for local
+        per_core = f"{rate / cores:>10.1f}" if name == "local" else f"{'-':>10}"
+        print(f"{name:<10} {embedder.dim:>5} {rate:>10.1f} {per_core} {1000 * elapsed / len(batches):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark: cold-start import time of worker entry points, with a budget.
+
+Each module is imported in a fresh interpreter under `python -X importtime`;
+the cumulative time of everything the import pulled in (beyond interpreter
+start-up) is compared against its budget. Heavy libraries that must stay
+deferred until first use are checked as well. Exits non-zero on a regression.
+
+Usage:
+    python benchmarks/bench_import_time.py [--scale 2.0]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# module → budget in milliseconds
+BUDGETS_MS = {
+    "extraction": 25,
+    "extraction.registry": 25,
+    "faiss_engine": 25,
+    "IDP_AI_Pipeline.embedder": 25,
+    "IDP_AI_Pipeline.summarizer": 25,
+    "IDP_AI_Pipeline.classifier": 25,
+    "IDP_AI_Pipeline.extractor": 25,
+}
+
+# Libraries that must not be imported just by importing the modules above
+DEFERRED = (
+    "google.genai", "faiss", "pdfplumber", "pytesseract", "pdf2image", "docx2txt",
+    "sentence_transformers", "torch",
+)
+
+
+def _top_level_import_us(code: str) -> dict:
+    """Run code under -X importtime and return {top-level module: cumulative µs}."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit() and not name.startswith("  "):
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def measure_import_ms(module: str) -> float:
+    """Cold import time of module in milliseconds, excluding interpreter start-up."""
+    startup = _top_level_import_us("pass")
+    times = _top_level_import_us(f"import {module}")
+    return sum(us for name, us in times.items() if name not in startup) / 1000
+
+
+def deferred_modules_loaded(module: str) -> list:
+    """Return the DEFERRED libraries that importing module loads eagerly."""
+    code = f"import sys, {module}; print(' '.join(m for m in {DEFERRED!r} if m in sys.modules))"
+    proc = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return proc.stdout.split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time budget check")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="Multiply every budget (e.g. 2.0 on slow CI machines)")
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'module':<30} {'ms':>8} {'budget':>8}  eager heavy imports")
+    print("-" * 72)
+    for module, budget in BUDGETS_MS.items():
+        ms = min(measure_import_ms(module) for _ in range(3))
+        eager = deferred_modules_loaded(module)
+        over = ms > budget * args.scale
+        failed |= over or bool(eager)
+        flag = "  OVER" if over else ""
+        print(f"{module:<30} {ms:>8.1f} {budget * args.scale:>8.0f}  {', '.join(eager) or '-'}{flag}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
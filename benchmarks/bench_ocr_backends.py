@@ -0,0 +1,58 @@
+"""
+Benchmark: OCR throughput (pages/second) of each OCR backend on the same scanned sample.
+
+Usage:
+    python benchmarks/bench_ocr_backends.py path/to/scanned.pdf [--pages 20] [--repeat 2]
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add repository root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extraction.ocr import OCR_BACKENDS, _pdf_page_count, _render_pdf_pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("pdf", help="Scanned PDF (or image) to OCR")
+    parser.add_argument("--pages", type=int, default=20, help="Maximum pages to OCR")
+    parser.add_argument("--repeat", type=int, default=2, help="Passes over the pages per backend")
+    args = parser.parse_args()
+
+    # Render once up front so only OCR time is measured
+    if args.pdf.lower().endswith(".pdf"):
+        last = min(args.pages, _pdf_page_count(args.pdf))
+        images = _render_pdf_pages(args.pdf, 1, last)
+    else:
+        from PIL import Image
+        images = [Image.open(args.pdf)]
+    print(f"Sample: {args.pdf} ({len(images)} page(s), {args.repeat} pass(es))\n")
+
+    print(f"{'backend':<12} {'pages/s':>9} {'ms/page':>9}")
+    print("-" * 32)
+    for name, backend_cls in OCR_BACKENDS.items():
+        try:
+            backend = backend_cls()
+        except Exception as e:
+            print(f"{name:<12} unavailable: {e}")
+            continue
+
+        # Warm-up page (loads language data for in-process engines)
+        backend.image_to_string(images[0])
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for image in images:
+                backend.image_to_string(image)
+        elapsed = time.perf_counter() - start
+        backend.close()
+
+        pages = len(images) * args.repeat
+        print(f"{name:<12} {pages / elapsed:>9.2f} {1000 * elapsed / pages:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark: memory per million vectors vs recall@k and latency of compressed FAISSStore types.
+
+Compares flat float32 storage with fp16, SQ8 and IVF-PQ, with and without
+exact re-ranking, on clustered synthetic vectors (or a .npy matrix of real
+embeddings). Recall is measured against exact flat search.
+
+Usage:
+    python benchmarks/bench_quantization.py [--n 50000] [--dim 768] [--queries 200] [--k 10] [--vectors emb.npy]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add repository root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from faiss_engine.faiss_store import FAISSStore
+from bench_ann import run, synthetic
+
+
+def configs(dim):
+    pq_m = dim // 16
+    return {
+        "flat": dict(index_type="flat", promote_at=None),
+        "fp16": dict(index_type="fp16"),
+        "sq8": dict(index_type="sq8", train_at=0),
+        "ivfpq": dict(index_type="ivfpq", train_at=0, pq_m=pq_m),
+        "ivfpq+sq8": dict(index_type="ivfpq", train_at=0, pq_m=pq_m, rerank="sq8"),
+        "ivfpq+flat": dict(index_type="ivfpq", train_at=0, pq_m=pq_m, rerank="flat"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--n", type=int, default=50_000, help="Vectors in the store")
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--vectors", help="Optional .npy matrix of real embeddings")
+    args = parser.parse_args()
+
+    if args.vectors:
+        data = np.load(args.vectors).astype(np.float32)
+    else:
+        data = synthetic(args.n + args.queries, args.dim)
+    base, queries = data[:-args.queries], data[-args.queries:]
+    texts = [""] * len(base)
+    print(f"{len(base)} vectors x {base.shape[1]} dims, {len(queries)} queries, recall@{args.k}\n")
+
+    print(f"{'index':<11} {'bytes/vec':>10} {'MB per 1M':>10} {'build s':>8} {'recall':>8} {'ms/query':>10}")
+    print("-" * 62)
+    truth = None
+    for name, kwargs in configs(base.shape[1]).items():
+        start = time.perf_counter()
+        store = FAISSStore(dim=base.shape[1], **kwargs)
+        store.add_batch(base, texts)
+        store.wait_for_rebuild()
+        build = time.perf_counter() - start
+        if truth is None:
+            _, truth = store.index.search(queries, args.k)
+        recall, ms = run(store, queries, args.k, truth)
+        usage = store.memory_usage()
+        print(
+            f"{name:<11} {usage['bytes_per_vector']:>10.0f} {usage['per_million_vectors'] / 1e6:>10.0f} "
+            f"{build:>8.1f} {recall:>8.3f} {ms:>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark: one FAISSStore vs a ShardedStore searched with parallel fan-out.
+
+The same vectors are split over --shards categories. Reports per-query
+latency for a single store, a fan-out over every shard, and a search
+narrowed to one shard by a filter on the shard key.
+
+Usage:
+    python benchmarks/bench_sharded_search.py [--n 200000] [--dim 768] [--shards 8] [--queries 50] [--k 10]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add repository root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from faiss_engine.faiss_store import FAISSStore
+from faiss_engine.sharded_store import ShardedStore
+from bench_ann import synthetic
+
+
+def per_query_ms(search, queries):
+    start = time.perf_counter()
+    for query in queries:
+        search(query)
+    return 1000 * (time.perf_counter() - start) / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--n", type=int, default=200_000, help="Vectors in total")
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--shards", type=int, default=8)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    data = synthetic(args.n + args.queries, args.dim)
+    base, queries = data[:-args.queries], data[-args.queries:]
+    texts = [""] * len(base)
+    metas = [{"category": f"c{i % args.shards}"} for i in range(len(base))]
+
+    single = FAISSStore(dim=args.dim, promote_at=None)
+    single.add_batch(base, texts, metas)
+    sharded = ShardedStore(dim=args.dim, promote_at=None)
+    sharded.add_batch(base, texts, metas)
+    print(f"{len(base)} vectors x {args.dim} dims, {args.shards} shards, {args.queries} queries, k={args.k}\n")
+
+    rows = {
+        "single store": lambda q: single.search(q, top_k=args.k),
+        "fan-out (all shards)": lambda q: sharded.search(q, top_k=args.k),
+        "one shard (filter)": lambda q: sharded.search(q, top_k=args.k, filters={"category": "c0"}),
+    }
+    print(f"{'search':<22} {'ms/query':>10}")
+    print("-" * 33)
+    for name, search in rows.items():
+        print(f"{name:<22} {per_query_ms(search, queries):>10.3f}")
+    sharded.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark: text cleaner throughput (MB/s) and the size reduction it gives.
+
+Runs on extracted text files, or on a synthetic OCR-like document when none
+are given. Tokens are approximated as characters / 4.
+
+Usage:
+    python benchmarks/bench_text_cleaner.py [extracted.txt ...] [--pages 2000] [--repeat 3]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+# Add repository root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cleaning.text_cleaner import clean_pages
+
+WORDS = "invoice total amount payment due customer account service period balance".split()
+
+
+def synthetic_pages(count: int, seed: int = 0) -> list:
+    """OCR-like pages: running header/footer, ragged spacing, hyphenated breaks, stray control bytes."""
+    rng = random.Random(seed)
+    pages = []
+    for number in range(1, count + 1):
+        lines = ["ACME Corp   -  Confidential", ""]
+        for _ in range(40):
+            words = [rng.choice(WORDS) for _ in range(rng.randint(6, 14))]
+            line = "  ".join(words) + rng.choice(["", "  ", " -", "\x0c", "\x00"])
+            lines.append(line)
+            if rng.random() < 0.2:
+                lines.append("")
+        lines += ["", f"Page {number} of {count}   "]
+        pages.append("\n".join(lines))
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("files", nargs="*", help="Extracted text files (pages split on form feeds)")
+    parser.add_argument("--pages", type=int, default=2000, help="Synthetic pages when no files are given")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed passes")
+    args = parser.parse_args()
+
+    if args.files:
+        pages = []
+        for path in args.files:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                pages.extend(f.read().split("\f"))
+    else:
+        pages = synthetic_pages(args.pages)
+
+    raw_chars = sum(len(page) for page in pages)
+    best = float("inf")
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        cleaned = clean_pages(pages)
+        best = min(best, time.perf_counter() - start)
+    clean_chars = sum(len(page) for page in cleaned)
+
+    print(f"Pages:        {len(pages)}")
+    print(f"Raw:          {raw_chars / 1e6:.2f} MB  (~{raw_chars // 4} tokens)")
+    print(f"Cleaned:      {clean_chars / 1e6:.2f} MB  (~{clean_chars // 4} tokens)")
+    print(f"Reduction:    {100 * (1 - clean_chars / max(raw_chars, 1)):.1f}%")
+    print(f"Throughput:   {raw_chars / 1e6 / best:.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Benchmark: VectorStore query latency as the store grows, single vs batched queries.
+
+Usage:
+    python benchmarks/bench_vector_store.py [--sizes 1000 10000 100000] [--dim 768] [--queries 64]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add repository root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from IDP_AI_Pipeline.vector_store import VectorStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=64)
+    parser.add_argument("--top-k", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    queries = rng.normal(size=(args.queries, args.dim)).astype(np.float32)
+
+    print(f"{'size':>8} {'search ms/q':>12} {'search_many ms/q':>17}")
+    print("-" * 40)
+    for size in args.sizes:
+        store = VectorStore(dim=args.dim)
+        vectors = rng.normal(size=(size, args.dim)).astype(np.float32)
+        store.add_many(vectors, [str(i) for i in range(size)])
+
+        start = time.perf_counter()
+        for query in queries:
+            store.search(query, top_k=args.top_k)
+        single = (time.perf_counter() - start) / len(queries)
+
+        start = time.perf_counter()
+        store.search_many(queries, top_k=args.top_k)
+        batched = (time.perf_counter() - start) / len(queries)
+
+        print(f"{size:>8} {1000 * single:>12.3f} {1000 * batched:>17.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import unittest
+import sys
+import os
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cleaning.text_cleaner import clean_pages, clean_text, remove_repeated_lines
+
+
+class TestCleanText(unittest.TestCase):
+
+    def test_dehyphenates_words_split_across_lines(self):
+        self.assertEqual(clean_text("the docu-\n  ment was signed"), "the document was signed")
+
+    def test_keeps_real_hyphens(self):
+        self.assertEqual(clean_text("Invoice INV-\n2041 and self-signed"), "Invoice INV-\n2041 and self-signed")
+
+    def test_collapses_whitespace(self):
+        text = "Total   due:  500  \n\n\n\n   Thank you \r\n"
+        self.assertEqual(clean_text(text), "Total due: 500\n\nThank you")
+
+    def test_strips_control_characters(self):
+        self.assertEqual(clean_text("in\x00voi­ce\x1b​ #12"), "invoice #12")
+
+    def test_keeps_tabs_between_cells(self):
+        self.assertEqual(clean_text("Invoice\t\tAmount\nINV-1\t\t500"), "Invoice\t\tAmount\nINV-1\t\t500")
+
+    def test_long_blank_runs_take_linear_time(self):
+        # Sparse spreadsheet rows come out as long tab runs
+        for run in ("\t" * 100_000, " \t" * 50_000):
+            start = time.perf_counter()
+            cleaned = clean_text("a" + run + "b")
+            self.assertLess(time.perf_counter() - start, 0.5)
+            self.assertEqual(cleaned, "a" + run + "b")
+        self.assertEqual(clean_text("a  \t  b"), "a \t b")
+
+    def test_idempotent(self):
+        text = "A  messy -\n line\f\fnext\x07 page"
+        self.assertEqual(clean_text(clean_text(text)), clean_text(text))
+
+
+class TestRepeatedLines(unittest.TestCase):
+
+    def test_removes_headers_and_page_numbers(self):
+        pages = [
+            f"ACME Corp - Confidential\nBody of page {n}\nPage {n} of 3" for n in range(1, 4)
+        ]
+        self.assertEqual(
+            clean_pages(pages), ["Body of page 1", "Body of page 2", "Body of page 3"]
+        )
+
+    def test_keeps_lines_that_do_not_repeat(self):
+        pages = ["Invoice\nTotal: 500", "Terms\nNet 30"]
+        self.assertEqual(remove_repeated_lines(pages), pages)
+
+    def test_single_page_untouched(self):
+        self.assertEqual(remove_repeated_lines(["Page 1 of 1\nBody"]), ["Page 1 of 1\nBody"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+"""
+Text normalization for extracted documents.
+
+`clean_text` makes a single regex pass over the text: every pattern is
+precompiled into one alternation and each match is rewritten by group, so
+the cost stays linear in the input size even for multi-megabyte OCR output.
+`clean_pages` additionally drops running headers/footers that repeat
+across pages.
+"""
+
+import re
+from collections import Counter
+from typing import List
+
+_LINE_BREAK = r"(?:\r\n?|\n|\f)"
+
+_CLEAN = re.compile(
+    # Cheap first-character gate so ordinary text is skipped without trying every branch
+    r"(?=[-\x00-\x20\x7f\u00a0\u00ad\u2000-\u200d\u202f\u2060\u3000\ufeff])"
+    r"(?:(?P<hyphen>-(?<=[a-z]-)[ \t]*" + _LINE_BREAK + r"[ \t]*(?=[a-z]))"          # word-\nbreak
+    r"|(?P<control>[\x00-\x08\x0b\x0e-\x1f\x7f\u00ad\u200b-\u200d\u2060\ufeff])"  # control, soft hyphen, zero-width
+    r"|(?P<paragraph>[ \t]*" + _LINE_BREAK + r"(?:[ \t]*" + _LINE_BREAK + r")+[ \t]*)"  # blank lines
+    r"|(?P<newline>[ \t]+" + _LINE_BREAK + r"[ \t]*|" + _LINE_BREAK + r"[ \t]+|\r\n?|\f)"  # lone break only if it needs rewriting
+    # A blank run with a tab is consumed whole; otherwise the break branches
+    # above would rescan its tail from every position (quadratic)
+    r"|(?P<blanks>(?=[ \t]{2})[ \t]*\t[ \t]*)"
+    r"|(?P<space>[ \u00a0\u2000-\u200a\u202f\u3000]{2,}|[\u00a0\u2000-\u200a\u202f\u3000])"    # space runs
+    r")"
+)
+
+# Space runs inside a blank run that also holds tabs
+_SPACE_RUN = re.compile(r" {2,}")
+
+_REPLACEMENTS = {
+    "hyphen": "",
+    "control": "",
+    "paragraph": "\n\n",
+    "newline": "\n",
+    "space": " ",
+}
+
+# Page numbers and dates differ between pages; mask digits when comparing lines
+_DIGITS = re.compile(r"\d+")
+
+
+def _replace(match):
+    if match.lastgroup == "blanks":
+        # Tabs separate cells and are kept; only space runs collapse
+        return _SPACE_RUN.sub(" ", match.group())
+    return _REPLACEMENTS[match.lastgroup]
+
+
+def clean_text(text: str) -> str:
+    """
+    Normalize extracted text in one pass.
+
+    Joins words hyphenated across line breaks, strips control and
+    zero-width characters, collapses runs of spaces, trims whitespace
+    around line breaks and squeezes blank lines to a single empty line.
+
+    Args:
+        text: Raw extracted text
+
+    Returns:
+        Cleaned text
+    """
+    return _CLEAN.sub(_replace, text).strip()
+
+
+def _line_key(line: str) -> str:
+    return _DIGITS.sub("#", " ".join(line.split()).lower())
+
+
+def remove_repeated_lines(pages: List[str], edge_lines: int = 3, min_ratio: float = 0.5) -> List[str]:
+    """
+    Remove running headers and footers detected across pages.
+
+    A line near the top or bottom of a page is treated as a header/footer
+    when the same line (ignoring digits, case and spacing, so "Page 3 of 9"
+    matches "Page 4 of 9") sits near the edge of at least `min_ratio` of
+    the pages, and on at least two pages.
+
+    Args:
+        pages: Text of each page, in page order
+        edge_lines: How many non-empty lines at each edge of a page to inspect
+        min_ratio: Fraction of pages a line must repeat on
+
+    Returns:
+        Page texts with repeated header/footer lines removed
+    """
+    if len(pages) < 2:
+        return list(pages)
+
+    page_lines = [page.splitlines() for page in pages]
+    edges = []
+    counts = Counter()
+    for lines in page_lines:
+        non_empty = [i for i, line in enumerate(lines) if line.strip()]
+        # Never treat more than half of a short page as its header/footer
+        k = min(edge_lines, len(non_empty) // 2)
+        edge = set(non_empty[:k] + non_empty[len(non_empty) - k:])
+        edges.append(edge)
+        counts.update({_line_key(lines[i]) for i in edge})
+
+    threshold = max(2, min_ratio * len(pages))
+    repeated = {key for key, count in counts.items() if count >= threshold}
+    if not repeated:
+        return list(pages)
+
+    cleaned = []
+    for lines, edge in zip(page_lines, edges):
+        kept = [
+            line for i, line in enumerate(lines)
+            if i not in edge or _line_key(line) not in repeated
+        ]
+        cleaned.append("\n".join(kept))
+    return cleaned
+
+
+def clean_pages(pages: List[str]) -> List[str]:
+    """
+    Clean a document page by page: drop repeated headers/footers, then clean_text each page.
+
+    Args:
+        pages: Text of each page, in page order
+
+    Returns:
+        Cleaned text of each page
+    """
+    return [clean_text(page) for page in remove_repeated_lines(pages)]
@@ -3,6 +3,7 @@ Document processor module for retrieving pending documents from Supabase,
 extracting text, and updating processing status.
 """
 
+import os
 from pathlib import Path
 from typing import List, Dict, Tuple, Optional
 from datetime import datetime
@@ -20,7 +21,11 @@ class DocumentProcessor:
         supabase_key: str = "sb_secret_FbFaFtzc24OvZ8mDhv3Icg_-SBOIX4u",
         table_name: str = "documents",
         bucket_name: str = "documents",
-        output_dir: str = "./extracted_text"
+        output_dir: str = "./extracted_text",
+        ocr_workers: int = 1,
+        ocr_preprocessor=None,
+        cache_dir: Optional[str] = "./.extraction_cache",
+        cache_max_bytes: int = 512 * 1024 * 1024
     ):
         """
         Initialize Document Processor.
@@ -31,12 +36,20 @@ class DocumentProcessor:
             table_name: Database table name
             bucket_name: Storage bucket name
             output_dir: Directory to save extracted text files
+            ocr_workers: Processes used to OCR scanned PDF pages in parallel
+                (None uses all CPU cores)
+            ocr_preprocessor: Optional extraction.preprocess.OCRPreprocessor
+                applied to page images before OCR
+            cache_dir: Directory for the extraction cache (None disables caching)
+            cache_max_bytes: Size bound for the extraction cache
         """
         self.supabase_url = supabase_url
         self.supabase_key = supabase_key
         self.table_name = table_name
         self.bucket_name = bucket_name
         self.output_dir = Path(output_dir)
+        self.ocr_workers = ocr_workers
+        self.ocr_preprocessor = ocr_preprocessor
         
         # Initialize Supabase client
         self.client = create_client(supabase_url, supabase_key)
@@ -45,8 +58,14 @@ class DocumentProcessor:
         self.output_dir.mkdir(parents=True, exist_ok=True)
         
         # Import extraction function
-        from extraction.master_extractor import extract_any
-        self.extract_any = extract_any
+        from extraction.registry import extract_document
+        self.extract_document = extract_document
+        
+        # Content-addressed cache so re-uploaded files skip extraction
+        self.cache = None
+        if cache_dir is not None:
+            from extraction.cache import ExtractionCache
+            self.cache = ExtractionCache(cache_dir, max_bytes=cache_max_bytes)
     
     def get_pending_documents(self, status: str = "Pending") -> List[Dict]:
         """
@@ -115,28 +134,48 @@ class DocumentProcessor:
             Tuple of (success: bool, message: str, output_file_path: str)
         """
         try:
-            # Create temporary file to extract from
-            temp_filename = f"temp_{document_id}_{original_filename}"
-            temp_path = self.output_dir / temp_filename
-            temp_path.write_bytes(file_content)
+            output_filename = f"{Path(original_filename).stem}.txt"
+            output_path = self.output_dir / output_filename
+            
+            # Identical bytes were extracted before → reuse the stored text
+            cache_key = None
+            if self.cache is not None:
+                cache_key = self.cache.key(file_content, {
+                    "format": Path(original_filename).suffix.lower(),
+                    "ocr_backend": os.getenv("OCR_BACKEND", "auto"),
+                    "ocr_preprocessing": (
+                        self.ocr_preprocessor.settings() if self.ocr_preprocessor else None
+                    )
+                })
+                cached_text = self.cache.get(cache_key)
+                if cached_text is not None:
+                    output_path.write_text(cached_text, encoding='utf-8')
+                    print(f"  Extraction cache hit, saved text to {output_path}")
+                    return True, "Extraction successful (cached)", str(output_path)
             
             print(f"  Extracting text...")
             
-            # Extract text
-            extracted_text = self.extract_any(str(temp_path))
+            # Extract straight from the downloaded bytes (no temp file)
+            result = self.extract_document(
+                file_content,
+                original_filename,
+                ocr_workers=self.ocr_workers,
+                ocr_preprocessor=self.ocr_preprocessor
+            )
+            
+            if not result.ok:
+                return False, result.error, ""
+            for warning in result.warnings:
+                print(f"  Warning: {warning}")
+            extracted_text = result.text
             
-            if extracted_text == "Unsupported file format":
-                temp_path.unlink()
-                return False, "Unsupported file format", ""
+            # Empty or partial text is usually a transient failure; don't pin it to this content
+            if cache_key is not None and extracted_text.strip() and not result.warnings:
+                self.cache.put(cache_key, extracted_text)
             
             # Save to .txt file
-            output_filename = f"{Path(original_filename).stem}.txt"
-            output_path = self.output_dir / output_filename
             output_path.write_text(extracted_text, encoding='utf-8')
             
-            # Clean up temp file
-            temp_path.unlink()
-            
             print(f"  Saved extracted text to {output_path}")
             return True, "Extraction successful", str(output_path)
         
@@ -278,6 +317,9 @@ class DocumentProcessor:
         print(f"Total documents: {results['total']}")
         print(f"Successfully processed: {results['successful']}")
         print(f"Failed: {results['failed']}")
+        if self.cache is not None:
+            cache_stats = self.cache.stats()
+            print(f"Extraction cache: {cache_stats['hits']} hit(s), {cache_stats['misses']} miss(es)")
         
         if results["errors"]:
             print(f"\nErrors encountered:")
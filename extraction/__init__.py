@@ -1,8 +1,43 @@
 """Extraction module for various document formats."""
 
-from .pdf import extract_pdf_text
-from .ocr import extract_image_text, extract_scanned_pdf
-from .docx import extract_docx
-from .master_extractor import extract_any
+import importlib
 
-__all__ = ['extract_pdf_text', 'extract_image_text', 'extract_scanned_pdf', 'extract_docx', 'extract_any']
+# Public name → submodule. Submodules (and the heavy libraries they use:
+# pdfplumber, pytesseract, pdf2image, docx2txt, numpy) are only imported
+# when one of their names is first accessed.
+_EXPORTS = {
+    'extract_pdf_pages': '.pdf',
+    'extract_pdf_text': '.pdf',
+    'extract_pdf_page_timings': '.pdf',
+    'extract_image_text': '.ocr',
+    'extract_scanned_pdf': '.ocr',
+    'extract_tiff_text': '.ocr',
+    'extract_tiff_pages': '.ocr',
+    'iter_scanned_pdf': '.ocr',
+    'ocr_pdf_pages': '.ocr',
+    'get_ocr_backend': '.ocr',
+    'set_ocr_backend': '.ocr',
+    'extract_docx': '.docx',
+    'extract_any': '.master_extractor',
+    'extract_bytes': '.master_extractor',
+    'OCRPreprocessor': '.preprocess',
+    'extract_document': '.registry',
+    'register_extractor': '.registry',
+    'sniff_format': '.registry',
+    'ExtractionResult': '.result',
+    'PageSpan': '.result',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
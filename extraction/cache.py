@@ -0,0 +1,129 @@
+"""Content-addressed on-disk cache for extracted document text."""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional
+
+# Bump whenever extractor output changes so stale cache entries stop matching
+EXTRACTOR_VERSION = "2"
+
+# Eviction frees space down to this share of max_bytes
+EVICT_TO = 0.9
+
+
+class ExtractionCache:
+    """
+    Persistent extraction cache keyed by the SHA-256 of the file bytes plus
+    the extractor version and settings. Entries are plain UTF-8 text files;
+    the least recently used ones are evicted once the cache exceeds max_bytes,
+    down to EVICT_TO * max_bytes.
+    """
+
+    def __init__(self, cache_dir: str = "./.extraction_cache", max_bytes: int = 512 * 1024 * 1024):
+        """
+        Initialize the cache.
+        
+        Args:
+            cache_dir: Directory holding cached text files
+            max_bytes: Size bound for the cache directory
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._size = sum(p.stat().st_size for p in self._entries())
+
+    def key(self, data: bytes, settings: Optional[Dict] = None) -> str:
+        """
+        Compute the cache key for a file.
+        
+        Args:
+            data: Raw file bytes
+            settings: Extraction settings that affect the output (format, OCR options, ...)
+            
+        Returns:
+            Hex digest identifying this file + extractor configuration
+        """
+        digest = hashlib.sha256(data)
+        digest.update(EXTRACTOR_VERSION.encode())
+        digest.update(json.dumps(settings or {}, sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached text for key, or None on a miss."""
+        path = self._path(key)
+        try:
+            text = path.read_text(encoding="utf-8")
+        except OSError:
+            self.misses += 1
+            return None
+        # Touch the entry so eviction sees it as recently used; another
+        # process may have evicted it since the read, which is still a hit
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        self.hits += 1
+        return text
+
+    def put(self, key: str, text: str) -> None:
+        """Store text under key, evicting old entries if the cache is over budget."""
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        data = text.encode("utf-8")
+
+        # Write atomically so concurrent workers never read a partial entry
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        previous = path.stat().st_size if path.exists() else 0
+        os.replace(tmp, path)
+
+        self._size += len(data) - previous
+        if self._size > self.max_bytes:
+            self._evict()
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters and current cache size."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "bytes": self._size,
+        }
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.txt"
+
+    def _entries(self):
+        return self.cache_dir.glob("*/*.txt")
+
+    def _evict(self) -> None:
+        # Other processes may share the directory, so ages come from a scan of
+        # the files rather than in-memory bookkeeping. Freeing down to the
+        # low-water mark keeps scans rare: each one makes room for a tenth of
+        # the budget, so the scan cost is spread over that many puts.
+        entries = []
+        for path in self._entries():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        self._size = sum(size for _, size, _ in entries)
+        target = EVICT_TO * self.max_bytes
+        for _, size, path in entries:
+            if self._size <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            self._size -= size
@@ -2,20 +2,23 @@
 
 import docx2txt
 
+from .result import report_error
+from .sources import Source, as_file
 
-def extract_docx(path: str) -> str:
+
+def extract_docx(path: Source) -> str:
     """
     Extract text from DOCX files.
     
     Args:
-        path: Path to the DOCX file
+        path: Path to the DOCX file, or its bytes / a binary file object
         
     Returns:
         Extracted text from the document
     """
     try:
-        text = docx2txt.process(path)
+        text = docx2txt.process(as_file(path))
         return text if text else ""
     except Exception as e:
-        print(f"Error extracting DOCX: {e}")
+        report_error(f"Error extracting DOCX: {e}")
         return ""
@@ -0,0 +1,48 @@
+"""Email (RFC 822 / .eml) text extraction, including attachments."""
+
+from email import policy
+from email.parser import BytesParser
+
+from .markup import html_to_text
+from .result import report_error
+from .sources import Source, read_bytes
+
+_HEADERS = ("From", "To", "Cc", "Date", "Subject")
+
+
+def extract_email(path: Source) -> str:
+    """
+    Extract headers, body and attachment text from an email message.
+    Attachments are sent back through the extractor registry, so any
+    registered format (PDF, DOCX, images, ...) is extracted as well.
+    
+    Args:
+        path: Path to the .eml file, or its bytes / a binary file object
+        
+    Returns:
+        Extracted text from the message
+    """
+    from .registry import extract_document
+
+    try:
+        message = BytesParser(policy=policy.default).parsebytes(read_bytes(path))
+        parts = [f"{name}: {message[name]}" for name in _HEADERS if message[name]]
+
+        body = message.get_body(preferencelist=("plain", "html"))
+        if body is not None:
+            content = body.get_content()
+            parts.append("")
+            parts.append(html_to_text(content) if body.get_content_type() == "text/html" else content.strip())
+
+        for attachment in message.iter_attachments():
+            filename = attachment.get_filename() or attachment.get_content_type()
+            result = extract_document(attachment.get_payload(decode=True) or b"", filename)
+            if result.ok and result.text.strip():
+                parts.append("")
+                parts.append(f"--- Attachment: {filename} ---")
+                parts.append(result.text.strip())
+
+        return "\n".join(parts) + "\n"
+    except Exception as e:
+        report_error(f"Error extracting email: {e}")
+        return ""
@@ -0,0 +1,74 @@
+"""HTML text extraction using the standard library parser."""
+
+import re
+from html.parser import HTMLParser
+
+from .result import report_error
+from .sources import Source, read_bytes
+
+_SKIP_TAGS = {"script", "style", "head", "noscript", "template"}
+_BLOCK_TAGS = {
+    "p", "div", "br", "li", "tr", "table", "section", "article", "header", "footer",
+    "h1", "h2", "h3", "h4", "h5", "h6", "pre", "blockquote", "ul", "ol", "hr",
+}
+_CHARSET = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.IGNORECASE)
+
+
+class _TextCollector(HTMLParser):
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+        elif tag in ("td", "th"):
+            self.parts.append("\t")
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS:
+            self._skip_depth = max(self._skip_depth - 1, 0)
+        elif tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(data)
+
+
+def html_to_text(markup: str) -> str:
+    """Convert an HTML string to plain text, keeping block-level line breaks."""
+    collector = _TextCollector()
+    collector.feed(markup)
+    collector.close()
+    text = "".join(collector.parts)
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def extract_html(path: Source) -> str:
+    """
+    Extract visible text from an HTML document.
+    
+    Args:
+        path: Path to the HTML file, or its bytes / a binary file object
+        
+    Returns:
+        Extracted text from the page
+    """
+    try:
+        data = read_bytes(path)
+        match = _CHARSET.search(data[:4096])
+        encoding = match.group(1).decode("ascii") if match else "utf-8"
+        try:
+            markup = data.decode(encoding, errors="replace")
+        except LookupError:
+            markup = data.decode("utf-8", errors="replace")
+        return html_to_text(markup)
+    except Exception as e:
+        report_error(f"Error extracting HTML: {e}")
+        return ""
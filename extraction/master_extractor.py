@@ -1,33 +1,123 @@
 import os
-from .pdf import extract_pdf_text
-from .docx import extract_docx
-from .ocr import extract_image_text, extract_scanned_pdf
-# from cleaning.text_cleaner import clean_text
+from typing import TYPE_CHECKING, List, Optional, Tuple
 
+from .pdf import extract_pdf_page_timings
+from .ocr import iter_scanned_pdf
+from .registry import extract_document
+from .result import METHOD_OCR, METHOD_TEXT_LAYER, UNSUPPORTED_FORMAT, ExtractionResult, report_error
+from .sources import Source
 
-def extract_any(path: str) -> str:
-    ext = path.lower().split(".")[-1]
+if TYPE_CHECKING:
+    from .preprocess import OCRPreprocessor
 
-    # ---- DOCX ----
-    if ext == "docx":
-        text = extract_docx(path)
-        return (text)
+# Pages whose text layer is shorter than this are treated as scanned
+MIN_PAGE_TEXT_CHARS = 10
 
-    # ---- IMAGES (jpg, png, jpeg) ----
-    if ext in ["jpg", "jpeg", "png"]:
-        text = extract_image_text(path)
-        return (text)
 
-    # ---- PDF ----
-    if ext == "pdf":
-        # Try digital text extraction first
-        text = extract_pdf_text(path)
+def extract_any(path: str, ocr_workers: int = 1, ocr_preprocessor: Optional["OCRPreprocessor"] = None) -> str:
+    result = extract_document(path, path, ocr_workers=ocr_workers, ocr_preprocessor=ocr_preprocessor)
+    return _text(result)
 
-        # If nothing extracted → treat as scanned PDF
-        if len(text.strip()) < 10:
-            text = extract_scanned_pdf(path)
 
-        return (text)
+def extract_bytes(
+    data: Source,
+    filename_or_mime: str,
+    ocr_workers: int = 1,
+    ocr_preprocessor: Optional["OCRPreprocessor"] = None
+) -> str:
+    """
+    Extract text from an in-memory document without writing it to disk.
+    
+    Args:
+        data: File contents as bytes, bytearray, memoryview or a binary file object
+        filename_or_mime: Original filename (e.g. 'scan.pdf') or MIME type
+            (e.g. 'application/pdf'), used when the content is not recognised
+        ocr_workers: Processes used to OCR scanned PDF pages in parallel
+        ocr_preprocessor: Optional image preprocessing stage applied before OCR
+        
+    Returns:
+        Extracted text ("" if extraction failed), or "Unsupported file format"
+    """
+    result = extract_document(
+        data, filename_or_mime, ocr_workers=ocr_workers, ocr_preprocessor=ocr_preprocessor
+    )
+    return _text(result)
 
-    # ---- Unsupported ----
-    return "Unsupported file format"
+
+def _text(result: ExtractionResult) -> str:
+    # The string API keeps its sentinel for unrecognised files only; other
+    # failures return the (possibly partial) text, as the extractors always have
+    if result.error == UNSUPPORTED_FORMAT:
+        return UNSUPPORTED_FORMAT
+    return result.text
+
+
+def extract_pdf_document_pages(
+    source: Source, ocr_workers: int = 1, ocr_preprocessor: Optional["OCRPreprocessor"] = None
+) -> List[Tuple[str, str, float]]:
+    """
+    Extract a PDF page by page, using the text layer where one exists and
+    OCR only for the pages that lack it.
+    
+    Args:
+        source: Path to the PDF file, or its bytes / a binary file object
+        ocr_workers: Processes used to OCR scanned pages in parallel
+        ocr_preprocessor: Optional image preprocessing stage applied before OCR
+        
+    Returns:
+        One (text, method, seconds) tuple per page, in page order
+    """
+    # Try digital text extraction first, page by page
+    pages = [
+        (page_text, METHOD_TEXT_LAYER, seconds)
+        for page_text, seconds in extract_pdf_page_timings(source)
+    ]
+
+    # Unreadable with pdfplumber → treat the whole file as scanned
+    if not pages:
+        try:
+            return [
+                (page_text, METHOD_OCR, seconds)
+                for _, page_text, seconds in iter_scanned_pdf(
+                    source, workers=ocr_workers, preprocessor=ocr_preprocessor
+                )
+            ]
+        except Exception as e:
+            report_error(f"Error extracting scanned PDF: {e}")
+            return []
+
+    # OCR only the pages that have no usable text layer
+    scanned_pages = [
+        n for n, (page_text, _, _) in enumerate(pages, start=1)
+        if len(page_text.strip()) < MIN_PAGE_TEXT_CHARS
+    ]
+    if scanned_pages:
+        try:
+            ocr_pages = iter_scanned_pdf(
+                source, workers=ocr_workers, pages=scanned_pages, preprocessor=ocr_preprocessor
+            )
+            for n, page_text, seconds in ocr_pages:
+                pages[n - 1] = (page_text, METHOD_OCR, pages[n - 1][2] + seconds)
+        except Exception as e:
+            report_error(f"Error extracting scanned PDF pages: {e}")
+
+    return pages
+
+
+def extract_pdf_document(
+    source: Source, ocr_workers: int = 1, ocr_preprocessor: Optional["OCRPreprocessor"] = None
+) -> str:
+    """
+    Extract text from a PDF, using the text layer where one exists and
+    OCR only for the pages that lack it.
+    
+    Args:
+        source: Path to the PDF file, or its bytes / a binary file object
+        ocr_workers: Processes used to OCR scanned pages in parallel
+        ocr_preprocessor: Optional image preprocessing stage applied before OCR
+        
+    Returns:
+        Extracted text from all pages
+    """
+    pages = extract_pdf_document_pages(source, ocr_workers, ocr_preprocessor)
+    return "".join(page_text + "\n" for page_text, _, _ in pages if page_text)
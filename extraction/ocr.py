@@ -1,49 +1,393 @@
 """OCR text extraction using Tesseract."""
 
-import pytesseract
-from pdf2image import convert_from_path
-from PIL import Image
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple
 
+from PIL import Image, ImageSequence
 
-def extract_image_text(path: str) -> str:
+from .result import METHOD_OCR, report_error
+from .sources import Source, as_file, is_path, read_bytes
+
+# pytesseract, pdf2image, pdfplumber and the preprocessing stage (numpy) are
+# imported where they are first needed, to keep worker start-up fast.
+if TYPE_CHECKING:
+    from .preprocess import OCRPreprocessor
+
+# Matches pdf2image's default rasterization resolution
+DEFAULT_DPI = 200
+
+
+class PytesseractBackend:
+    """OCR via the pytesseract wrapper (forks a tesseract process per call)."""
+
+    name = "pytesseract"
+
+    def image_to_string(self, image: Image.Image) -> str:
+        import pytesseract
+
+        return pytesseract.image_to_string(image)
+
+    def close(self) -> None:
+        pass
+
+
+class TesserocrBackend:
+    """
+    OCR via tesserocr's in-process Tesseract API. Engines are created once
+    and kept in a pool, so language data stays loaded across pages and
+    documents instead of being reloaded by a new process for every page.
+    """
+
+    name = "tesserocr"
+
+    def __init__(self, size: int = 1, lang: str = "eng"):
+        """
+        Initialize the engine pool.
+        
+        Args:
+            size: Number of engines (concurrent OCR calls) in the pool
+            lang: Tesseract language(s), e.g. 'eng' or 'eng+hin'
+        """
+        import tesserocr
+
+        self._engines = queue.LifoQueue()
+        for _ in range(max(size, 1)):
+            self._engines.put(tesserocr.PyTessBaseAPI(lang=lang))
+
+    def image_to_string(self, image: Image.Image) -> str:
+        engine = self._engines.get()
+        try:
+            engine.SetImage(image)
+            return engine.GetUTF8Text()
+        finally:
+            self._engines.put(engine)
+
+    def close(self) -> None:
+        while not self._engines.empty():
+            self._engines.get_nowait().End()
+
+
+OCR_BACKENDS = {
+    "pytesseract": PytesseractBackend,
+    "tesserocr": TesserocrBackend,
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_ocr_backend():
+    """
+    Return this process's shared OCR backend, creating it on first use.
+    The OCR_BACKEND environment variable selects 'tesserocr', 'pytesseract'
+    or 'auto' (default: tesserocr when installed, else pytesseract).
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _create_backend(os.getenv("OCR_BACKEND", "auto"))
+    return _backend
+
+
+def set_ocr_backend(backend) -> None:
+    """Replace the shared OCR backend (closing the previous one)."""
+    global _backend
+    with _backend_lock:
+        if _backend is not None and _backend is not backend:
+            _backend.close()
+        _backend = backend
+
+
+def _create_backend(name: str):
+    if name != "auto":
+        return OCR_BACKENDS[name]()
+    try:
+        return TesserocrBackend()
+    except Exception:
+        # tesserocr missing or its tessdata not found → subprocess fallback
+        return PytesseractBackend()
+
+
+def _ocr_image(
+    image: Image.Image, preprocessor: Optional["OCRPreprocessor"] = None, backend=None
+) -> Tuple[str, Dict[str, float]]:
+    """Run the optional preprocessing stage, then OCR a single image; returns (text, step timings)."""
+    timings = {}
+    if preprocessor is not None:
+        image, timings = preprocessor.process(image)
+    return (backend or get_ocr_backend()).image_to_string(image), timings
+
+
+def extract_image_text(path: Source, preprocessor: Optional["OCRPreprocessor"] = None) -> str:
     """
     Extract text from images using Tesseract OCR.
     
     Args:
-        path: Path to the image file
+        path: Path to the image file, or its bytes / a binary file object
+        preprocessor: Optional preprocessing stage applied before OCR
         
     Returns:
         Extracted text from the image
     """
     try:
-        img = Image.open(path)
-        text = pytesseract.image_to_string(img)
+        img = Image.open(as_file(path))
+        text, _ = _ocr_image(img, preprocessor)
         return text
     except Exception as e:
-        print(f"Error extracting image text: {e}")
+        report_error(f"Error extracting image text: {e}")
         return ""
 
 
-def extract_scanned_pdf(path: str) -> str:
+def extract_tiff_pages(
+    path: Source, preprocessor: Optional["OCRPreprocessor"] = None
+) -> List[Tuple[str, str, float]]:
     """
-    Extract text from scanned PDFs using Tesseract OCR.
-    Converts each PDF page to an image, then performs OCR.
+    OCR each frame of a (multi-page) TIFF image.
     
     Args:
-        path: Path to the PDF file
+        path: Path to the TIFF file, or its bytes / a binary file object
+        preprocessor: Optional preprocessing stage applied before OCR
         
     Returns:
-        Extracted text from all pages
+        One (text, "ocr", seconds) tuple per frame, in page order
     """
+    pages = []
     try:
-        pages = convert_from_path(path)
-        full_text = ""
+        with Image.open(as_file(path)) as img:
+            for frame in ImageSequence.Iterator(img):
+                start = time.perf_counter()
+                text, _ = _ocr_image(frame.copy(), preprocessor)
+                pages.append((text, METHOD_OCR, time.perf_counter() - start))
+    except Exception as e:
+        report_error(f"Error extracting TIFF text: {e}")
+    return pages
+
+
+def extract_tiff_text(path: Source, preprocessor: Optional["OCRPreprocessor"] = None) -> str:
+    """
+    Extract text from (multi-page) TIFF images using Tesseract OCR.
+    
+    Args:
+        path: Path to the TIFF file, or its bytes / a binary file object
+        preprocessor: Optional preprocessing stage applied before OCR
+        
+    Returns:
+        Extracted text from all frames, one page per frame
+    """
+    return "".join(text + "\n" for text, _, _ in extract_tiff_pages(path, preprocessor))
+
+
+# In-memory PDF shared with pool workers once, instead of per page
+_worker_pdf_bytes = None
 
-        for page in pages:
-            text = pytesseract.image_to_string(page)
-            full_text += text + "\n"
 
-        return full_text
+def _init_ocr_worker(pdf_bytes: Optional[bytes] = None) -> None:
+    # Tesseract spawns its own OpenMP threads; with one process per core
+    # that oversubscribes the CPU, so pin each worker to a single thread.
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+    global _worker_pdf_bytes, _backend
+    _worker_pdf_bytes = pdf_bytes
+    # Engines must not be shared across a fork; each worker loads its own
+    # once and reuses it for every page it is given.
+    _backend = None
+
+
+def _pdf_page_count(source: Source) -> int:
+    if is_path(source):
+        from pdf2image import pdfinfo_from_path
+
+        return pdfinfo_from_path(source)["Pages"]
+
+    import pdfplumber
+
+    with pdfplumber.open(as_file(source)) as pdf:
+        return len(pdf.pages)
+
+
+def _render_pdf_pages(
+    source: Source, first: int, last: int, preprocessor: Optional["OCRPreprocessor"] = None
+) -> List[Image.Image]:
+    """Rasterize pages first..last (1-based, inclusive) of a PDF."""
+    import pdfplumber
+    from pdf2image import convert_from_path
+
+    page_numbers = range(first, last + 1)
+    adaptive = preprocessor is not None and preprocessor.adaptive_dpi
+
+    if is_path(source):
+        if not adaptive:
+            return convert_from_path(source, first_page=first, last_page=last)
+        with pdfplumber.open(source) as pdf:
+            dpis = [
+                preprocessor.select_dpi(pdf.pages[n - 1].width, pdf.pages[n - 1].height, DEFAULT_DPI)
+                for n in page_numbers
+            ]
+        if len(set(dpis)) == 1:
+            return convert_from_path(source, dpi=dpis[0], first_page=first, last_page=last)
+        return [
+            image
+            for n, dpi in zip(page_numbers, dpis)
+            for image in convert_from_path(source, dpi=dpi, first_page=n, last_page=n)
+        ]
+
+    # Render in-memory buffers with pdfium (via pdfplumber) instead of
+    # pdf2image, which would spill the bytes to a temporary file for poppler
+    with pdfplumber.open(as_file(source)) as pdf:
+        images = []
+        for n in page_numbers:
+            page = pdf.pages[n - 1]
+            dpi = preprocessor.select_dpi(page.width, page.height, DEFAULT_DPI) if adaptive else DEFAULT_DPI
+            images.append(page.to_image(resolution=dpi).original)
+        return images
+
+
+def _ocr_pdf_page(
+    source: Optional[Source], page_number: int, preprocessor: Optional["OCRPreprocessor"] = None
+) -> Tuple[int, str, float, Dict[str, float]]:
+    """
+    Rasterize and OCR a single PDF page, returning (page, text, seconds,
+    preprocessing step timings). The timings are returned rather than left
+    on the preprocessor because in a pool worker it is a pickled copy.
+    """
+    if source is None:
+        source = _worker_pdf_bytes
+    start = time.perf_counter()
+    images = _render_pdf_pages(source, page_number, page_number, preprocessor)
+    text, timings = _ocr_image(images[0], preprocessor) if images else ("", {})
+    return page_number, text, time.perf_counter() - start, timings
+
+
+def _page_windows(page_numbers: List[int], window: int) -> Iterator[Tuple[int, int]]:
+    """Group sorted page numbers into contiguous (first, last) runs of at most `window` pages."""
+    first = last = None
+    for n in page_numbers:
+        if first is not None and n == last + 1 and n - first < window:
+            last = n
+            continue
+        if first is not None:
+            yield first, last
+        first = last = n
+    if first is not None:
+        yield first, last
+
+
+def iter_scanned_pdf(
+    path: Source,
+    window: int = 4,
+    workers: Optional[int] = 1,
+    pages: Optional[Iterable[int]] = None,
+    preprocessor: Optional["OCRPreprocessor"] = None
+) -> Iterator[Tuple[int, str, float]]:
+    """
+    Stream OCR results for a scanned PDF one page at a time.
+    Pages are rendered in small windows (via first_page/last_page) instead
+    of all at once, so peak memory stays bounded by the window size no
+    matter how long the document is, and callers can start consuming text
+    before the last page has been OCR'd.
+    
+    Args:
+        path: Path to the PDF file, or its bytes / a binary file object
+        window: Maximum number of rendered pages held in memory at once
+        workers: Number of worker processes; values above 1 (or None for
+            all CPU cores) OCR pages in parallel
+        pages: 1-based page numbers to OCR (default: every page)
+        preprocessor: Optional preprocessing stage (DPI selection, cleanup)
+            applied to each page before OCR
+        
+    Yields:
+        (page_number, text, seconds) tuples in page order
+    """
+    if pages is None:
+        page_numbers = list(range(1, _pdf_page_count(path) + 1))
+    else:
+        page_numbers = sorted(set(pages))
+    window = max(window, 1)
+    workers = min(workers or os.cpu_count() or 1, max(len(page_numbers), 1))
+
+    if workers <= 1:
+        backend = get_ocr_backend()
+        for first, last in _page_windows(page_numbers, window):
+            start = time.perf_counter()
+            images = _render_pdf_pages(path, first, last, preprocessor)
+            render_seconds = (time.perf_counter() - start) / max(len(images), 1)
+            for page_number, image in enumerate(images, start=first):
+                start = time.perf_counter()
+                text, _ = _ocr_image(image, preprocessor, backend)
+                yield page_number, text, render_seconds + time.perf_counter() - start
+            del images
+        return
+
+    # Keep at most `window` pages in flight per worker; each worker renders
+    # only its own page, so this also bounds the number of live images.
+    # Paths are cheap to send per page; buffers are sent once per worker.
+    pdf_bytes = None if is_path(path) else read_bytes(path)
+    page_source = path if pdf_bytes is None else None
+    in_flight = deque()
+
+    def collect(future):
+        page_number, text, seconds, timings = future.result()
+        # Workers time their own copy of the preprocessor; fold it back in
+        if preprocessor is not None:
+            preprocessor.add_timings(timings)
+        return page_number, text, seconds
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_ocr_worker, initargs=(pdf_bytes,)
+    ) as pool:
+        for page_number in page_numbers:
+            in_flight.append(pool.submit(_ocr_pdf_page, page_source, page_number, preprocessor))
+            if len(in_flight) >= workers * window:
+                yield collect(in_flight.popleft())
+        while in_flight:
+            yield collect(in_flight.popleft())
+
+
+def ocr_pdf_pages(
+    path: Source, workers: Optional[int] = None, preprocessor: Optional["OCRPreprocessor"] = None
+) -> List[Tuple[int, str, float]]:
+    """
+    OCR every page of a scanned PDF, spreading pages across a process pool.
+    Each worker rasterizes only the page it is given, so page images never
+    have to be pickled between processes.
+    
+    Args:
+        path: Path to the PDF file, or its bytes / a binary file object
+        workers: Number of worker processes (default: all CPU cores)
+        preprocessor: Optional preprocessing stage applied before OCR
+        
+    Returns:
+        List of (page_number, text, seconds) tuples in page order
+    """
+    return list(iter_scanned_pdf(path, workers=workers, preprocessor=preprocessor))
+
+
+def extract_scanned_pdf(
+    path: Source, workers: int = 1, preprocessor: Optional["OCRPreprocessor"] = None
+) -> str:
+    """
+    Extract text from scanned PDFs using Tesseract OCR.
+    Converts each PDF page to an image, then performs OCR. Pages are
+    rendered in small windows (see iter_scanned_pdf) to bound memory use.
+    
+    Args:
+        path: Path to the PDF file, or its bytes / a binary file object
+        workers: Number of OCR worker processes; values above 1 (or None
+            for all CPU cores) OCR pages in parallel
+        preprocessor: Optional preprocessing stage applied before OCR
+        
+    Returns:
+        Extracted text from all pages
+    """
+    try:
+        return "".join(
+            text + "\n" for _, text, _ in iter_scanned_pdf(path, workers=workers, preprocessor=preprocessor)
+        )
     except Exception as e:
-        print(f"Error extracting scanned PDF: {e}")
+        report_error(f"Error extracting scanned PDF: {e}")
         return ""
@@ -1,26 +1,58 @@
 """PDF text extraction using pdfplumber."""
 
+import time
+from typing import List, Tuple
+
 import pdfplumber
 
+from .sources import Source, as_file
+
 
-def extract_pdf_text(path: str) -> str:
+def extract_pdf_page_timings(path: Source) -> List[Tuple[str, float]]:
     """
-    Extract text from a PDF using pdfplumber.
+    Extract the text layer of each PDF page using pdfplumber, timing each page.
     
     Args:
-        path: Path to the PDF file
+        path: Path to the PDF file, or its bytes / a binary file object
         
     Returns:
-        Extracted text from the PDF
+        One (text, seconds) tuple per page, in page order ("" for pages
+        without a text layer)
     """
-    text = ""
+    pages = []
     try:
-        with pdfplumber.open(path) as pdf:
+        with pdfplumber.open(as_file(path)) as pdf:
             for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
+                start = time.perf_counter()
+                page_text = page.extract_text() or ""
+                pages.append((page_text, time.perf_counter() - start))
     except Exception as e:
         print(f"Error extracting PDF: {e}")
     
-    return text
+    return pages
+
+
+def extract_pdf_pages(path: Source) -> List[str]:
+    """
+    Extract the text layer of each PDF page using pdfplumber.
+    
+    Args:
+        path: Path to the PDF file, or its bytes / a binary file object
+        
+    Returns:
+        One string per page, in page order ("" for pages without a text layer)
+    """
+    return [page_text for page_text, _ in extract_pdf_page_timings(path)]
+
+
+def extract_pdf_text(path: Source) -> str:
+    """
+    Extract text from a PDF using pdfplumber.
+    
+    Args:
+        path: Path to the PDF file, or its bytes / a binary file object
+        
+    Returns:
+        Extracted text from the PDF
+    """
+    return "".join(page_text + "\n" for page_text in extract_pdf_pages(path) if page_text)
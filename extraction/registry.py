@@ -0,0 +1,275 @@
+"""
+Extractor registry: content sniffing by magic bytes and lazy dispatch to
+format-specific extractors.
+
+Formats are registered with the module path of their extractor, which is
+only imported the first time a document of that format is seen:
+
+    register_extractor("odt", "mypkg.odt:extract_odt", extensions=("odt",))
+"""
+
+import importlib
+import re
+import time
+import zipfile
+from typing import Callable, Dict, Iterable, Optional, Tuple, Union
+
+from .result import (
+    METHOD_DIRECT, METHOD_OCR, ExtractionResult, PageSpan, UNSUPPORTED_FORMAT, collect_errors
+)
+from .sources import Source, as_file, extension_for, is_path
+from cleaning.text_cleaner import clean_pages, clean_text
+
+# Bytes read from the start of a document for sniffing
+SNIFF_BYTES = 4096
+
+_EMAIL_HEADER = re.compile(
+    rb"^(Return-Path|Received|From|To|Subject|Date|Message-ID|MIME-Version|Delivered-To):[ \t]",
+    re.IGNORECASE | re.MULTILINE
+)
+
+
+class ExtractorSpec:
+    """A registered format: how to recognise it and where its extractor lives."""
+
+    def __init__(
+        self,
+        name: str,
+        target: Union[str, Callable],
+        extensions: Iterable[str] = (),
+        mimetypes: Iterable[str] = (),
+        magic: Iterable[bytes] = (),
+        options: Iterable[str] = ()
+    ):
+        self.name = name
+        self.target = target
+        self.extensions = tuple(ext.lower().lstrip(".") for ext in extensions)
+        self.mimetypes = tuple(m.lower() for m in mimetypes)
+        self.magic = tuple(magic)
+        self.options = tuple(options)
+        self._func = target if callable(target) else None
+
+    def load(self) -> Callable:
+        """Import the extractor on first use."""
+        if self._func is None:
+            module_name, _, attr = self.target.partition(":")
+            module = importlib.import_module(module_name, package=__package__)
+            self._func = getattr(module, attr)
+        return self._func
+
+
+_REGISTRY: Dict[str, ExtractorSpec] = {}
+
+
+def register_extractor(
+    name: str,
+    target: Union[str, Callable],
+    extensions: Iterable[str] = (),
+    mimetypes: Iterable[str] = (),
+    magic: Iterable[bytes] = (),
+    options: Iterable[str] = ()
+) -> None:
+    """
+    Register (or replace) an extractor for a document format.
+    
+    Args:
+        name: Format name reported in ExtractionResult.format
+        target: Extractor callable, or "module:function" to import lazily
+            (relative module names resolve inside the extraction package).
+            It returns the text, or a list of (text, method, seconds)
+            tuples, one per page
+        extensions: File extensions used when content sniffing is inconclusive
+        mimetypes: MIME types mapped to this format
+        magic: Byte prefixes identifying the format
+        options: Extraction options the extractor accepts as keyword
+            arguments ('ocr_workers', 'ocr_preprocessor')
+    """
+    _REGISTRY[name] = ExtractorSpec(name, target, extensions, mimetypes, magic, options)
+
+
+def registered_formats() -> Tuple[str, ...]:
+    return tuple(_REGISTRY)
+
+
+def _read_head(source: Source) -> bytes:
+    if is_path(source):
+        with open(source, "rb") as f:
+            return f.read(SNIFF_BYTES)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source[:SNIFF_BYTES])
+    position = source.tell()
+    head = source.read(SNIFF_BYTES)
+    source.seek(position)
+    return head
+
+
+def _sniff_zip(source: Source) -> Optional[str]:
+    """Tell OOXML containers apart by their part names."""
+    try:
+        with zipfile.ZipFile(as_file(source)) as zf:
+            names = set(zf.namelist())
+    except (zipfile.BadZipFile, OSError):
+        return None
+    if "word/document.xml" in names:
+        return "docx"
+    if "xl/workbook.xml" in names:
+        return "xlsx"
+    return None
+
+
+def sniff_format(source: Source) -> Optional[str]:
+    """
+    Identify a document's format from its content.
+    
+    Args:
+        source: File path, bytes-like buffer or binary file object
+        
+    Returns:
+        Registered format name, or None if the content is not recognised
+    """
+    head = _read_head(source)
+
+    if head.startswith(b"PK\x03\x04"):
+        fmt = _sniff_zip(source)
+        if fmt is not None:
+            return fmt
+
+    for spec in _REGISTRY.values():
+        if any(head.startswith(magic) for magic in spec.magic):
+            return spec.name
+
+    # PDF headers may be preceded by junk bytes
+    if b"%PDF-" in head[:1024] and "pdf" in _REGISTRY:
+        return "pdf"
+
+    # Messages start with a header block; HTML with markup
+    if _EMAIL_HEADER.match(head) and len(_EMAIL_HEADER.findall(head)) >= 2 and "email" in _REGISTRY:
+        return "email"
+    text = head.lstrip(b"\xef\xbb\xbf \t\r\n").lower()
+    is_html = text.startswith(b"<!doctype html") or (text.startswith(b"<") and b"<html" in text[:512])
+    if is_html and "html" in _REGISTRY:
+        return "html"
+
+    return None
+
+
+def _format_for_name(filename_or_mime: str) -> Optional[str]:
+    value = filename_or_mime.strip().lower().split(";")[0]
+    for spec in _REGISTRY.values():
+        if value in spec.mimetypes:
+            return spec.name
+    ext = extension_for(filename_or_mime)
+    for spec in _REGISTRY.values():
+        if ext in spec.extensions:
+            return spec.name
+    return None
+
+
+def extract_document(
+    source: Source,
+    filename_or_mime: Optional[str] = None,
+    ocr_workers: int = 1,
+    ocr_preprocessor=None,
+    clean: bool = True
+) -> ExtractionResult:
+    """
+    Extract text from a document, choosing the extractor by content.
+    Magic bytes take precedence, so mislabelled uploads still reach the
+    right extractor; the filename/MIME type is only used when sniffing is
+    inconclusive.
+    
+    Args:
+        source: File path, bytes-like buffer or binary file object
+        filename_or_mime: Original filename or MIME type (defaults to the path)
+        ocr_workers: Processes used to OCR scanned PDF pages in parallel
+        ocr_preprocessor: Optional image preprocessing stage applied before OCR
+        clean: Normalize the text (dehyphenation, whitespace, control
+            characters, repeated headers/footers); False keeps it verbatim
+        
+    Returns:
+        ExtractionResult with the text, detected format and any error.
+        Failures the extractor reports (it prints them and returns what it
+        has) become the error when no text was extracted, and warnings
+        otherwise, so partial text is still ok.
+    """
+    if filename_or_mime is None and is_path(source):
+        filename_or_mime = str(source)
+
+    fmt = sniff_format(source)
+    if fmt is None and filename_or_mime:
+        fmt = _format_for_name(filename_or_mime)
+    if fmt is None:
+        return ExtractionResult(error=UNSUPPORTED_FORMAT)
+
+    spec = _REGISTRY[fmt]
+    try:
+        extractor = spec.load()
+    except ImportError as e:
+        return ExtractionResult(format=fmt, error=f"Extractor for {fmt} unavailable: {e}")
+
+    options = {"ocr_workers": ocr_workers, "ocr_preprocessor": ocr_preprocessor}
+    start = time.perf_counter()
+    with collect_errors() as errors:
+        try:
+            output = extractor(source, **{name: options[name] for name in spec.options})
+        except Exception as e:
+            return ExtractionResult(format=fmt, error=f"Error extracting {fmt}: {e}")
+
+    # Page-aware extractors return (text, method, seconds) per page; plain
+    # ones return a string, which becomes a single page
+    if isinstance(output, str):
+        if clean:
+            output = clean_text(output)
+        method = METHOD_OCR if fmt == "image" else METHOD_DIRECT
+        page = PageSpan(1, 0, len(output), method, time.perf_counter() - start)
+        result = ExtractionResult(output, fmt, pages=[page])
+    else:
+        if clean:
+            output = list(output)
+            texts = clean_pages([page_text for page_text, _, _ in output])
+            output = [(text, method, seconds) for text, (_, method, seconds) in zip(texts, output)]
+        result = ExtractionResult.from_pages(output, fmt)
+
+    if errors:
+        if result.text.strip():
+            result.warnings = errors
+        else:
+            result.error = "; ".join(errors)
+    return result
+
+
+register_extractor(
+    "pdf", ".master_extractor:extract_pdf_document_pages",
+    extensions=("pdf",), mimetypes=("application/pdf",), magic=(b"%PDF-",),
+    options=("ocr_workers", "ocr_preprocessor")
+)
+register_extractor(
+    "docx", ".docx:extract_docx",
+    extensions=("docx",),
+    mimetypes=("application/vnd.openxmlformats-officedocument.wordprocessingml.document",)
+)
+register_extractor(
+    "image", ".ocr:extract_image_text",
+    extensions=("jpg", "jpeg", "png"), mimetypes=("image/jpeg", "image/png"),
+    magic=(b"\x89PNG\r\n\x1a\n", b"\xff\xd8\xff"),
+    options=("ocr_preprocessor",)
+)
+register_extractor(
+    "tiff", ".ocr:extract_tiff_pages",
+    extensions=("tif", "tiff"), mimetypes=("image/tiff",),
+    magic=(b"II*\x00", b"MM\x00*"),
+    options=("ocr_preprocessor",)
+)
+register_extractor(
+    "xlsx", ".xlsx:extract_xlsx",
+    extensions=("xlsx",),
+    mimetypes=("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",)
+)
+register_extractor(
+    "html", ".markup:extract_html",
+    extensions=("html", "htm"), mimetypes=("text/html",)
+)
+register_extractor(
+    "email", ".eml:extract_email",
+    extensions=("eml",), mimetypes=("message/rfc822",)
+)
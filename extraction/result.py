@@ -0,0 +1,134 @@
+"""Typed, page-aware result returned by the extraction dispatcher."""
+
+from bisect import bisect_right
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+UNSUPPORTED_FORMAT = "Unsupported file format"
+
+# How a page's text was obtained
+METHOD_TEXT_LAYER = "text-layer"
+METHOD_OCR = "ocr"
+METHOD_DIRECT = "direct"   # formats without pages (DOCX, HTML, ...)
+
+# Errors reported by extractors during the current extract_document call
+_errors: ContextVar[Optional[List[str]]] = ContextVar("extraction_errors", default=None)
+
+
+def report_error(message: str) -> None:
+    """
+    Print an extraction error, as the text extractors always have, and
+    record it for the enclosing extract_document call (if any). The result
+    then reports it as its error when nothing was extracted, or as a
+    warning next to the partial text.
+    """
+    print(message)
+    errors = _errors.get()
+    if errors is not None:
+        errors.append(message)
+
+
+@contextmanager
+def collect_errors() -> Iterator[List[str]]:
+    """Collects the messages passed to report_error inside the block."""
+    errors: List[str] = []
+    token = _errors.set(errors)
+    try:
+        yield errors
+    finally:
+        _errors.reset(token)
+
+
+class PageSpan(NamedTuple):
+    """One page of an ExtractionResult; its text is result.text[start:end]."""
+
+    number: int      # 1-based page number
+    start: int       # character offset into ExtractionResult.text
+    end: int
+    method: str      # METHOD_TEXT_LAYER, METHOD_OCR or METHOD_DIRECT
+    seconds: float   # time spent extracting this page
+
+
+class ExtractionResult:
+    """
+    Outcome of extracting one document. The text is stored once; pages are
+    (offset, method, timing) spans into it, so a chunk's character range
+    maps back to the page(s) it came from.
+    """
+
+    __slots__ = ("text", "format", "error", "pages", "warnings", "_ends")
+
+    def __init__(
+        self,
+        text: str = "",
+        format: Optional[str] = None,
+        error: Optional[str] = None,
+        pages: Optional[List[PageSpan]] = None,
+        warnings: Optional[List[str]] = None
+    ):
+        """
+        Args:
+            text: Extracted text ("" when extraction failed)
+            format: Detected format name (e.g. 'pdf', 'docx'), None if unknown
+            error: Why extraction failed, None when it produced text
+            pages: Page spans into text, in page order
+            warnings: Failures that lost part of the document (e.g. pages
+                that could not be OCR'd) without losing all of it
+        """
+        self.text = text
+        self.format = format
+        self.error = error
+        self.pages = pages or []
+        self.warnings = warnings or []
+        self._ends = [page.end for page in self.pages]
+
+    @classmethod
+    def from_pages(
+        cls, pages: Iterable[Tuple[str, str, float]], format: Optional[str] = None
+    ) -> "ExtractionResult":
+        """
+        Build a result from (text, method, seconds) tuples, one per page.
+        Non-empty pages are joined with a trailing newline each, matching
+        the flat text the extractors have always returned.
+        """
+        parts = []
+        spans = []
+        offset = 0
+        for number, (page_text, method, seconds) in enumerate(pages, start=1):
+            start = offset
+            if page_text:
+                parts.append(page_text + "\n")
+                offset += len(page_text) + 1
+            spans.append(PageSpan(number, start, offset, method, seconds))
+        return cls("".join(parts), format, pages=spans)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def seconds(self) -> float:
+        return sum(page.seconds for page in self.pages)
+
+    def page_text(self, number: int) -> str:
+        """Return the text of a 1-based page number."""
+        page = self.pages[number - 1]
+        return self.text[page.start:page.end]
+
+    def page_at(self, offset: int) -> Optional[int]:
+        """Return the page number containing character offset, or None if out of range."""
+        index = bisect_right(self._ends, offset)
+        if index >= len(self.pages) or offset < 0:
+            return None
+        return self.pages[index].number
+
+    def page_range(self, start: int, end: int) -> Tuple[Optional[int], Optional[int]]:
+        """Return the (first, last) page numbers covering text[start:end]."""
+        return self.page_at(start), self.page_at(max(end - 1, start))
+
+    def __repr__(self) -> str:
+        return (
+            f"ExtractionResult(format={self.format!r}, chars={len(self.text)}, "
+            f"pages={len(self.pages)}, error={self.error!r}, warnings={len(self.warnings)})"
+        )
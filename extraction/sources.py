@@ -0,0 +1,57 @@
+"""Helpers for extractors that accept either a file path or an in-memory buffer."""
+
+import mimetypes
+import os
+from io import BytesIO
+from typing import BinaryIO, Union
+
+# A file path, raw bytes (bytes/bytearray/memoryview) or a binary file object
+Source = Union[str, os.PathLike, bytes, bytearray, memoryview, BinaryIO]
+
+
+def is_path(source: Source) -> bool:
+    """Return True if source names a file on disk."""
+    return isinstance(source, (str, os.PathLike))
+
+
+def as_file(source: Source):
+    """
+    Normalize a source into something pdfplumber/PIL/zipfile can open.
+    
+    Args:
+        source: File path, bytes-like buffer or binary file object
+        
+    Returns:
+        The path unchanged, or a seekable binary file object
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return BytesIO(source)
+    return source
+
+
+def read_bytes(source: Source) -> bytes:
+    """Return the full contents of source as bytes."""
+    if is_path(source):
+        with open(source, "rb") as f:
+            return f.read()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source)
+    source.seek(0)
+    return source.read()
+
+
+def extension_for(filename_or_mime: str) -> str:
+    """
+    Resolve a filename or MIME type to a lowercase extension without the dot.
+    
+    Args:
+        filename_or_mime: e.g. 'report.PDF' or 'application/pdf'
+        
+    Returns:
+        Extension such as 'pdf', or '' if it cannot be determined
+    """
+    value = filename_or_mime.strip().lower()
+    if "/" in value and "." not in value.rsplit("/", 1)[-1]:
+        guessed = mimetypes.guess_extension(value.split(";")[0].strip()) or ""
+        return guessed.lstrip(".")
+    return value.rsplit(".", 1)[-1] if "." in value else ""
@@ -0,0 +1,489 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+import subprocess
+import tempfile
+import zipfile
+from io import BytesIO
+
+# Add the repository root to sys.path so the extraction package imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extraction import ocr
+from extraction import master_extractor, pdf
+from extraction.cache import ExtractionCache
+from extraction import registry
+from extraction.registry import extract_document, register_extractor, sniff_format
+from extraction.result import ExtractionResult
+from extraction.preprocess import OCRPreprocessor, estimate_skew, otsu_threshold
+from PIL import Image, ImageDraw
+import numpy as np
+
+
+def make_pdf(page_texts):
+    """Build a minimal PDF with one page per entry ("" gives a page with no text layer)."""
+    count = len(page_texts)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % (4 + 2 * i) for i in range(count))
+        + b"] /Count %d >>" % count,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, text in enumerate(page_texts):
+        stream = b"BT /F1 12 Tf 72 720 Td (%s) Tj ET" % text.encode() if text else b""
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (5 + 2 * i)
+        )
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+class TestOCR(unittest.TestCase):
+
+    def setUp(self):
+        # The tests patch pytesseract, so pin the backend that calls it even
+        # when tesserocr is installed (or OCR_BACKEND selects it)
+        ocr.set_ocr_backend(ocr.PytesseractBackend())
+
+    def tearDown(self):
+        ocr.set_ocr_backend(None)
+
+    @patch('pytesseract.image_to_string')
+    @patch('pdf2image.convert_from_path')
+    @patch('pdf2image.pdfinfo_from_path')
+    def test_ocr_pdf_pages_in_page_order(self, mock_info, mock_convert, mock_tess):
+        mock_info.return_value = {"Pages": 3}
+        mock_convert.side_effect = lambda path, first_page, last_page, **kwargs: [
+            f"img{n}" for n in range(first_page, last_page + 1)
+        ]
+        mock_tess.side_effect = lambda img: f"text of {img}"
+
+        pages = ocr.ocr_pdf_pages("scan.pdf", workers=1)
+
+        self.assertEqual([p[0] for p in pages], [1, 2, 3])
+        self.assertEqual(pages[1][1], "text of img2")
+        self.assertTrue(all(seconds >= 0 for _, _, seconds in pages))
+
+    @patch('pytesseract.image_to_string')
+    @patch('pdf2image.convert_from_path')
+    @patch('pdf2image.pdfinfo_from_path')
+    def test_iter_scanned_pdf_renders_in_windows(self, mock_info, mock_convert, mock_tess):
+        mock_info.return_value = {"Pages": 5}
+        mock_convert.side_effect = lambda path, first_page, last_page, **kwargs: [
+            f"img{n}" for n in range(first_page, last_page + 1)
+        ]
+        mock_tess.side_effect = lambda img: img
+
+        stream = ocr.iter_scanned_pdf("scan.pdf", window=2)
+        self.assertEqual(next(stream)[1], "img1")
+        self.assertEqual(mock_convert.call_count, 1)
+
+        rest = list(stream)
+        self.assertEqual([p[0] for p in rest], [2, 3, 4, 5])
+        ranges = [(c.kwargs["first_page"], c.kwargs["last_page"]) for c in mock_convert.call_args_list]
+        self.assertEqual(ranges, [(1, 2), (3, 4), (5, 5)])
+
+    @patch('pytesseract.image_to_string')
+    @patch('extraction.ocr._render_pdf_pages')
+    def test_pool_workers_report_preprocessing_timings(self, mock_render, mock_tess):
+        import pickle
+        from concurrent.futures import Future
+
+        class CopyingPool:
+            """Runs tasks in-process on pickled arguments, like a worker process would."""
+
+            def __init__(self, **kwargs):
+                pass
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def submit(self, fn, *args):
+                future = Future()
+                future.set_result(fn(*pickle.loads(pickle.dumps(args))))
+                return future
+
+        mock_render.side_effect = lambda source, first, last, pre: [Image.new("RGB", (40, 40), "white")]
+        mock_tess.return_value = "text"
+        pre = OCRPreprocessor(grayscale=True, crop_margins=False, deskew=False, binarize=False)
+
+        with patch('extraction.ocr.ProcessPoolExecutor', CopyingPool):
+            pages = list(ocr.iter_scanned_pdf("scan.pdf", workers=2, pages=[1, 2, 3], preprocessor=pre))
+
+        self.assertEqual([p[:2] for p in pages], [(1, "text"), (2, "text"), (3, "text")])
+        self.assertGreater(pre.timings["grayscale"], 0)
+        self.assertEqual(pre.timings["binarize"], 0)
+
+    def test_tesserocr_backend_reuses_pooled_engines(self):
+        fake_tesserocr = MagicMock()
+        engine = fake_tesserocr.PyTessBaseAPI.return_value
+        engine.GetUTF8Text.return_value = "page text"
+
+        with patch.dict(sys.modules, {"tesserocr": fake_tesserocr}):
+            backend = ocr.TesserocrBackend(size=1)
+            texts = [backend.image_to_string(f"img{n}") for n in range(3)]
+
+        self.assertEqual(texts, ["page text"] * 3)
+        fake_tesserocr.PyTessBaseAPI.assert_called_once_with(lang="eng")
+        self.assertEqual(engine.SetImage.call_count, 3)
+
+    def test_auto_backend_falls_back_to_pytesseract(self):
+        with patch.dict(sys.modules, {"tesserocr": None}):
+            backend = ocr._create_backend("auto")
+        self.assertIsInstance(backend, ocr.PytesseractBackend)
+
+    def test_page_windows_group_contiguous_pages(self):
+        windows = list(ocr._page_windows([2, 3, 4, 5, 9, 11, 12], window=3))
+        self.assertEqual(windows, [(2, 4), (5, 5), (9, 9), (11, 12)])
+
+    @patch('extraction.ocr.iter_scanned_pdf')
+    def test_extract_scanned_pdf_joins_pages(self, mock_iter):
+        mock_iter.return_value = iter([(1, "first", 0.1), (2, "second", 0.2)])
+
+        text = ocr.extract_scanned_pdf("scan.pdf", workers=4)
+
+        self.assertEqual(text, "first\nsecond\n")
+        mock_iter.assert_called_once_with("scan.pdf", workers=4, preprocessor=None)
+
+
+class TestHybridPDF(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "hybrid.pdf")
+        with open(self.path, "wb") as f:
+            f.write(make_pdf(["Digital report page one", "", "Digital report page three"]))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_extract_pdf_pages(self):
+        pages = pdf.extract_pdf_pages(self.path)
+        self.assertEqual(pages, ["Digital report page one", "", "Digital report page three"])
+
+    @patch('extraction.master_extractor.iter_scanned_pdf')
+    def test_extract_any_ocrs_only_pages_without_text(self, mock_iter):
+        mock_iter.return_value = iter([(2, "scanned signature page", 0.5)])
+
+        text = master_extractor.extract_any(self.path)
+
+        self.assertEqual(mock_iter.call_args.kwargs["pages"], [2])
+        self.assertEqual(
+            text,
+            "Digital report page one\nscanned signature page\nDigital report page three\n"
+        )
+
+    @patch('extraction.master_extractor.iter_scanned_pdf')
+    def test_extract_bytes_matches_extract_any(self, mock_iter):
+        mock_iter.side_effect = lambda *args, **kwargs: iter([(2, "scanned signature page", 0.5)])
+        with open(self.path, "rb") as f:
+            data = f.read()
+
+        from_path = master_extractor.extract_any(self.path)
+        from_bytes = master_extractor.extract_bytes(memoryview(data), "application/pdf")
+
+        self.assertEqual(from_bytes, from_path)
+        self.assertIsInstance(mock_iter.call_args.args[0], memoryview)
+
+    @patch('extraction.master_extractor.iter_scanned_pdf')
+    def test_extract_document_reports_pages(self, mock_iter):
+        mock_iter.side_effect = lambda *args, **kwargs: iter([(2, "scanned signature page", 0.5)])
+
+        result = extract_document(self.path)
+
+        self.assertEqual([p.method for p in result.pages], ["text-layer", "ocr", "text-layer"])
+        self.assertEqual(result.page_text(2), "scanned signature page\n")
+        self.assertGreaterEqual(result.pages[1].seconds, 0.5)
+        self.assertEqual(result.text, master_extractor.extract_pdf_document(self.path))
+
+    @patch('extraction.master_extractor.iter_scanned_pdf')
+    def test_failed_ocr_keeps_text_layer_pages(self, mock_iter):
+        mock_iter.side_effect = RuntimeError("tesseract is not installed")
+
+        with patch('builtins.print'):
+            result = extract_document(self.path)
+            text = master_extractor.extract_any(self.path)
+
+        self.assertTrue(result.ok)
+        self.assertEqual(len(result.warnings), 1)
+        self.assertIn("tesseract is not installed", result.warnings[0])
+        self.assertEqual(text, "Digital report page one\nDigital report page three\n")
+
+    def test_render_pdf_pages_from_bytes(self):
+        with open(self.path, "rb") as f:
+            images = ocr._render_pdf_pages(f.read(), 2, 3)
+
+        self.assertEqual(len(images), 2)
+        self.assertEqual(images[0].size[0], 612 * ocr.DEFAULT_DPI // 72)
+
+    def test_render_pdf_pages_adaptive_dpi(self):
+        pre = OCRPreprocessor(target_pixels=1100, min_dpi=50)
+        with open(self.path, "rb") as f:
+            images = ocr._render_pdf_pages(f.read(), 1, 1, pre)
+
+        self.assertEqual(images[0].size, (850, 1100))
+
+    def test_extract_bytes_unsupported(self):
+        self.assertEqual(master_extractor.extract_bytes(b"data", "notes.xyz"), "Unsupported file format")
+
+
+class TestPreprocess(unittest.TestCase):
+
+    def make_page(self, size=(600, 400)):
+        image = Image.new("RGB", size, "white")
+        draw = ImageDraw.Draw(image)
+        for y in range(150, 260, 20):
+            draw.rectangle((150, y, 450, y + 8), fill="black")
+        return image
+
+    def test_select_dpi_scales_with_page_size(self):
+        pre = OCRPreprocessor(target_pixels=2200, min_dpi=100, max_dpi=400)
+        self.assertEqual(pre.select_dpi(612, 792, 200), 200)     # Letter
+        self.assertEqual(pre.select_dpi(2384, 3370, 200), 100)   # A0 drawing
+        self.assertEqual(pre.select_dpi(150, 250, 200), 400)     # small receipt
+        self.assertEqual(OCRPreprocessor(adaptive_dpi=False).select_dpi(2384, 3370, 200), 200)
+
+    def test_steps_are_switchable_and_timed(self):
+        pre = OCRPreprocessor(grayscale=True, crop_margins=True, deskew=False, binarize=True)
+        image, timings = pre.process(self.make_page())
+
+        self.assertEqual(set(timings), {"grayscale", "crop_margins", "binarize"})
+        self.assertEqual(image.mode, "L")
+        self.assertLess(image.width, 600)
+        self.assertEqual(set(np.unique(np.asarray(image))), {0, 255})
+        self.assertGreater(pre.timings["crop_margins"], 0)
+
+    def test_otsu_threshold_separates_modes(self):
+        pixels = np.array([20] * 50 + [230] * 50, dtype=np.uint8)
+        self.assertTrue(20 <= otsu_threshold(pixels) < 230)
+
+    def test_estimate_skew_recovers_rotation(self):
+        page = self.make_page().convert("L")
+        skewed = page.rotate(3, resample=Image.BICUBIC, fillcolor=255)
+        self.assertAlmostEqual(estimate_skew(skewed), -3, delta=0.5)
+
+
+def make_zip(members):
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        for name, content in members.items():
+            zf.writestr(name, content)
+    return buffer.getvalue()
+
+
+XLSX_MEMBERS = {
+    "xl/workbook.xml": (
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Invoices" sheetId="1" r:id="rId1"/></sheets></workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="worksheets/sheet1.xml"/></Relationships>'
+    ),
+    "xl/sharedStrings.xml": (
+        '<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<si><t>Invoice</t></si><si><t>Amount</t></si></sst>'
+    ),
+    "xl/worksheets/sheet1.xml": (
+        '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+        '<row r="1"><c r="A1" t="s"><v>0</v></c><c r="C1" t="s"><v>1</v></c></row>'
+        '<row r="2"><c r="A2" t="inlineStr"><is><t>INV-1</t></is></c><c r="C2"><v>500</v></c></row>'
+        '</sheetData></worksheet>'
+    ),
+}
+
+DOCX_MEMBERS = {
+    "word/document.xml": (
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        '<w:body><w:p><w:r><w:t>Offer letter</w:t></w:r></w:p></w:body></w:document>'
+    ),
+}
+
+EMAIL = (
+    b"From: vendor@example.com\r\nTo: ap@example.com\r\nSubject: Invoice 42\r\n"
+    b"MIME-Version: 1.0\r\nContent-Type: multipart/mixed; boundary=XX\r\n\r\n"
+    b"--XX\r\nContent-Type: text/plain\r\n\r\nPlease find the invoice attached.\r\n"
+    b"--XX\r\nContent-Type: text/html\r\nContent-Disposition: attachment; filename=inv.html\r\n\r\n"
+    b"<html><body><p>Total due: 500</p><script>x()</script></body></html>\r\n--XX--\r\n"
+)
+
+
+class TestExtractionResult(unittest.TestCase):
+
+    def test_from_pages_offsets(self):
+        result = ExtractionResult.from_pages(
+            [("alpha", "text-layer", 0.1), ("", "ocr", 0.2), ("beta", "ocr", 0.3)], "pdf"
+        )
+        self.assertEqual(result.text, "alpha\nbeta\n")
+        self.assertEqual([(p.start, p.end) for p in result.pages], [(0, 6), (6, 6), (6, 11)])
+        self.assertEqual(result.page_at(0), 1)
+        self.assertEqual(result.page_at(6), 3)
+        self.assertIsNone(result.page_at(11))
+        self.assertEqual(result.page_range(3, 9), (1, 3))
+        self.assertAlmostEqual(result.seconds, 0.6)
+
+    def test_string_extractors_are_single_page(self):
+        result = extract_document(b"<p>hello</p>", "page.html")
+        self.assertEqual(len(result.pages), 1)
+        self.assertEqual(result.pages[0].method, "direct")
+        self.assertEqual(result.page_text(1), "hello")
+
+
+class TestRegistry(unittest.TestCase):
+
+    def test_sniff_by_magic_bytes(self):
+        self.assertEqual(sniff_format(make_pdf(["x"])), "pdf")
+        self.assertEqual(sniff_format(b"\x89PNG\r\n\x1a\n...."), "image")
+        self.assertEqual(sniff_format(b"II*\x00...."), "tiff")
+        self.assertEqual(sniff_format(make_zip(DOCX_MEMBERS)), "docx")
+        self.assertEqual(sniff_format(make_zip(XLSX_MEMBERS)), "xlsx")
+        self.assertEqual(sniff_format(b"<!DOCTYPE html><html></html>"), "html")
+        self.assertEqual(sniff_format(EMAIL), "email")
+        self.assertIsNone(sniff_format(b"just some text"))
+
+    def test_mislabelled_upload_uses_content(self):
+        result = extract_document(make_zip(DOCX_MEMBERS), "scan.pdf")
+        self.assertTrue(result.ok)
+        self.assertEqual(result.format, "docx")
+        self.assertIn("Offer letter", result.text)
+
+    def test_unsupported_is_typed_error(self):
+        result = extract_document(b"just some text", "notes.xyz")
+        self.assertFalse(result.ok)
+        self.assertIsNone(result.format)
+        self.assertEqual(result.error, "Unsupported file format")
+
+    def test_extractor_failure_is_typed_error(self):
+        with patch('builtins.print'):
+            result = extract_document(b"PK\x03\x04 truncated", "report.docx")
+        self.assertFalse(result.ok)
+        self.assertEqual(result.format, "docx")
+        self.assertTrue(result.error.startswith("Error extracting DOCX"))
+        with patch('builtins.print'):
+            self.assertEqual(master_extractor.extract_bytes(b"PK\x03\x04 truncated", "report.docx"), "")
+
+    def test_extension_fallback(self):
+        result = extract_document(b"<p>hello</p>", "page.html")
+        self.assertEqual((result.format, result.text), ("html", "hello"))
+
+    def test_lazy_registration(self):
+        register_extractor("fake", "extraction._not_a_module:extract", extensions=("fake",))
+        try:
+            result = extract_document(b"data", "file.fake")
+        finally:
+            del registry._REGISTRY["fake"]
+        self.assertEqual(result.format, "fake")
+        self.assertFalse(result.ok)
+
+    def test_xlsx(self):
+        result = extract_document(make_zip(XLSX_MEMBERS), clean=False)
+        self.assertEqual(result.text, "# Invoices\nInvoice\t\tAmount\nINV-1\t\t500\n")
+
+    def test_email_with_attachment(self):
+        result = extract_document(EMAIL)
+        self.assertEqual(result.format, "email")
+        self.assertIn("Subject: Invoice 42", result.text)
+        self.assertIn("Please find the invoice attached.", result.text)
+        self.assertIn("Total due: 500", result.text)
+        self.assertNotIn("x()", result.text)
+
+
+class TestLazyImports(unittest.TestCase):
+
+    def test_package_import_defers_heavy_libraries(self):
+        heavy = ["pdfplumber", "pytesseract", "pdf2image", "docx2txt", "numpy"]
+        code = (
+            "import sys, extraction, extraction.registry; "
+            f"print([m for m in {heavy!r} if m in sys.modules])"
+        )
+        out = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            capture_output=True, text=True, check=True
+        )
+        self.assertEqual(out.stdout.strip(), "[]")
+
+    def test_lazy_attribute_access(self):
+        import extraction
+        self.assertIs(extraction.extract_document, extract_document)
+
+
+class TestExtractionCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_hit_and_miss(self):
+        cache = ExtractionCache(self.tmp.name)
+        key = cache.key(b"%PDF-1.4 bytes", {"format": ".pdf"})
+
+        self.assertIsNone(cache.get(key))
+        cache.put(key, "extracted text")
+        self.assertEqual(cache.get(key), "extracted text")
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_key_depends_on_settings(self):
+        cache = ExtractionCache(self.tmp.name)
+        self.assertNotEqual(
+            cache.key(b"same bytes", {"format": ".pdf"}),
+            cache.key(b"same bytes", {"format": ".png"})
+        )
+
+    def test_get_survives_concurrent_eviction(self):
+        cache = ExtractionCache(self.tmp.name)
+        key = cache.key(b"doc")
+        cache.put(key, "text")
+
+        # Another process evicts the entry between the read and the touch
+        with patch('extraction.cache.os.utime', side_effect=FileNotFoundError):
+            self.assertEqual(cache.get(key), "text")
+        self.assertEqual(cache.stats()["hits"], 1)
+
+    def test_evicts_least_recently_used(self):
+        cache = ExtractionCache(self.tmp.name, max_bytes=25)
+        old, new = cache.key(b"old"), cache.key(b"new")
+        cache.put(old, "x" * 15)
+        os.utime(cache._path(old), (1, 1))
+        cache.put(new, "y" * 15)
+
+        self.assertIsNone(cache.get(old))
+        self.assertEqual(cache.get(new), "y" * 15)
+        self.assertLessEqual(cache.stats()["bytes"], 25)
+
+    def test_eviction_frees_down_to_low_water_mark(self):
+        cache = ExtractionCache(self.tmp.name, max_bytes=100)
+        keys = [cache.key(bytes([n])) for n in range(11)]
+        for n, key in enumerate(keys[:10]):
+            cache.put(key, "x" * 10)
+            os.utime(cache._path(key), (n + 1, n + 1))
+        with patch.object(cache, "_evict", wraps=cache._evict) as evict:
+            cache.put(keys[10], "x" * 10)
+            self.assertEqual(cache.stats()["bytes"], 90)
+            # The freed headroom absorbs the next put without another scan
+            cache.put(keys[0], "x" * 10)
+        self.assertEqual(evict.call_count, 1)
+        self.assertEqual([cache.get(key) is None for key in keys[:3]], [False, True, False])
+
+
+if __name__ == '__main__':
+    unittest.main()
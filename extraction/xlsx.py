@@ -0,0 +1,99 @@
+"""XLSX spreadsheet text extraction (stdlib only, like docx2txt)."""
+
+import re
+import zipfile
+from xml.etree import ElementTree
+
+from .result import report_error
+from .sources import Source, as_file
+
+_NS = {
+    "main": "http://schemas.openxmlformats.org/spreadsheetml/2006/main",
+    "rel": "http://schemas.openxmlformats.org/officeDocument/2006/relationships",
+    "pkg": "http://schemas.openxmlformats.org/package/2006/relationships",
+}
+_COLUMN = re.compile(r"[A-Z]+")
+
+
+def extract_xlsx(path: Source) -> str:
+    """
+    Extract cell text from every worksheet of an XLSX workbook.
+    Each sheet starts with a "# <sheet name>" line; cells in a row are tab separated.
+    
+    Args:
+        path: Path to the XLSX file, or its bytes / a binary file object
+        
+    Returns:
+        Extracted text from the workbook
+    """
+    try:
+        with zipfile.ZipFile(as_file(path)) as zf:
+            shared = _shared_strings(zf)
+            lines = []
+            for name, target in _sheets(zf):
+                lines.append(f"# {name}")
+                root = ElementTree.fromstring(zf.read(target))
+                for row in root.iterfind(".//main:sheetData/main:row", _NS):
+                    cells = []
+                    for cell in row.iterfind("main:c", _NS):
+                        # Sparse rows omit empty cells; pad so columns line up
+                        column = _column_index(cell.get("r", ""))
+                        if column is not None and column > len(cells):
+                            cells.extend([""] * (column - len(cells)))
+                        cells.append(_cell_text(cell, shared))
+                    if any(cells):
+                        lines.append("\t".join(cells))
+                lines.append("")
+            return "\n".join(lines)
+    except Exception as e:
+        report_error(f"Error extracting XLSX: {e}")
+        return ""
+
+
+def _shared_strings(zf: zipfile.ZipFile) -> list:
+    try:
+        root = ElementTree.fromstring(zf.read("xl/sharedStrings.xml"))
+    except KeyError:
+        return []
+    return [
+        "".join(t.text or "" for t in si.iterfind(".//main:t", _NS))
+        for si in root.iterfind("main:si", _NS)
+    ]
+
+
+def _sheets(zf: zipfile.ZipFile):
+    """Yield (sheet name, zip member) in workbook order."""
+    workbook = ElementTree.fromstring(zf.read("xl/workbook.xml"))
+    rels = ElementTree.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+    targets = {
+        rel.get("Id"): rel.get("Target") for rel in rels.iterfind("pkg:Relationship", _NS)
+    }
+    for sheet in workbook.iterfind(".//main:sheets/main:sheet", _NS):
+        target = targets.get(sheet.get(f"{{{_NS['rel']}}}id"), "")
+        target = target.lstrip("/")
+        if not target.startswith("xl/"):
+            target = "xl/" + target
+        yield sheet.get("name"), target
+
+
+def _column_index(reference: str):
+    """Return the 0-based column of a cell reference like 'C7', or None."""
+    match = _COLUMN.match(reference)
+    if not match:
+        return None
+    index = 0
+    for letter in match.group():
+        index = index * 26 + ord(letter) - ord("A") + 1
+    return index - 1
+
+
+def _cell_text(cell, shared: list) -> str:
+    kind = cell.get("t")
+    if kind == "inlineStr":
+        return "".join(t.text or "" for t in cell.iterfind(".//main:t", _NS))
+    value = cell.find("main:v", _NS)
+    if value is None or value.text is None:
+        return ""
+    if kind == "s":
+        return shared[int(value.text)]
+    return value.text
@@ -1,6 +1,27 @@
-from .faiss_store import FAISSStore
-from .ingest import DocumentIngestor
-from .multi_doc_rag import MultiDocRAG
-from .similarity import DocumentSimilarityEngine
-from .global_search import GlobalSearch
-from .metadata_store import MetadataStore
+import importlib
+
+# Classes are imported on first access so `import faiss_engine` does not
+# pay for faiss/numpy (or the embedding client) until they are used.
+_EXPORTS = {
+    "FAISSStore": ".faiss_store",
+    "ShardedStore": ".sharded_store",
+    "DocumentIngestor": ".ingest",
+    "MultiDocRAG": ".multi_doc_rag",
+    "DocumentSimilarityEngine": ".similarity",
+    "GlobalSearch": ".global_search",
+    "MetadataStore": ".metadata_store",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
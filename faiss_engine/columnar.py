@@ -0,0 +1,315 @@
+import mmap
+from array import array
+
+import numpy as np
+
+# Marks "no value" in integer columns
+_MISSING = -(2 ** 63)
+# Range operators accepted in filter expressions
+_RANGE_OPS = {
+    "gt": lambda a, b: a > b,
+    "gte": lambda a, b: a >= b,
+    "lt": lambda a, b: a < b,
+    "lte": lambda a, b: a <= b,
+}
+
+
+class TextColumn:
+    """
+    Append-only list of strings stored as one UTF-8 buffer plus offsets,
+    instead of one Python str object per chunk. Indexing decodes on demand.
+    """
+
+    def __init__(self):
+        self._data = bytearray()
+        self._offsets = array("q", [0])
+
+    def append(self, text):
+        if not isinstance(self._data, bytearray):
+            # Loaded memory-mapped: copy out before the first write
+            self._data = bytearray(self._data)
+        self._data += text.encode("utf-8")
+        self._offsets.append(len(self._data))
+
+    def extend(self, texts):
+        for text in texts:
+            self.append(text)
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("TextColumn index out of range")
+        return self._data[self._offsets[index]:self._offsets[index + 1]].decode("utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def nbytes(self):
+        return len(self._data) + self._offsets.itemsize * len(self._offsets)
+
+    def save(self, prefix):
+        """Writes <prefix>.bin (UTF-8 data) and <prefix>.offsets (int64 offsets)."""
+        with open(f"{prefix}.bin", "wb") as f:
+            f.write(self._data)
+        with open(f"{prefix}.offsets", "wb") as f:
+            self._offsets.tofile(f)
+
+    @classmethod
+    def load(cls, prefix, use_mmap=True):
+        """Reads a column written by save(); the text data is memory-mapped read-only."""
+        column = cls()
+        with open(f"{prefix}.offsets", "rb") as f:
+            column._offsets = array("q", f.read())
+        with open(f"{prefix}.bin", "rb") as f:
+            if use_mmap and column._offsets[-1] > 0:
+                column._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                column._data = bytearray(f.read())
+        return column
+
+
+class _IntColumn:
+    """Integers in a packed int64 array."""
+
+    def __init__(self, rows):
+        self.values = array("q", [_MISSING]) * rows
+
+    @staticmethod
+    def accepts(value):
+        return type(value) is int and _MISSING < value < 2 ** 63
+
+    def append(self, value):
+        self.values.append(value)
+
+    def append_missing(self):
+        self.values.append(_MISSING)
+
+    def get(self, row):
+        value = self.values[row]
+        return None if value == _MISSING else value
+
+    def rows_equal(self, values):
+        wanted = [v for v in values if self.accepts(v)]
+        column = np.frombuffer(self.values, dtype=np.int64)
+        return np.flatnonzero(np.isin(column, wanted))
+
+    def rows_in_range(self, bounds):
+        column = np.frombuffer(self.values, dtype=np.int64)
+        mask = column != _MISSING
+        for op, bound in bounds.items():
+            if not isinstance(bound, (int, float)):
+                return np.empty(0, dtype=np.int64)
+            mask &= _RANGE_OPS[op](column, bound)
+        return np.flatnonzero(mask)
+
+    def nbytes(self):
+        return self.values.itemsize * len(self.values)
+
+
+class _CodedColumn:
+    """
+    Dictionary-encoded values: repeated values (doc ids, categories) are
+    stored once. Filters use a posting list (sorted rows) per value, built
+    on the first filtered query and kept up to date by appends.
+    """
+
+    def __init__(self, rows):
+        self.codes = array("i", [-1]) * rows
+        self.values = []
+        self._lookup = {}
+        self._postings = None
+
+    def __getstate__(self):
+        # Posting lists are derived from the codes; rebuilt after unpickling
+        return {**self.__dict__, "_postings": None}
+
+    def __setstate__(self, state):
+        self.__dict__.update({"_postings": None, **state})
+
+    @staticmethod
+    def accepts(value):
+        return True
+
+    def append(self, value):
+        # Keyed by type too, so 1, 1.0 and True stay distinct
+        key = (type(value), value)
+        try:
+            code = self._lookup.get(key)
+            hashable = True
+        except TypeError:
+            # Unhashable (list, dict): stored as is, without sharing
+            code, hashable = None, False
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            if hashable:
+                self._lookup[key] = code
+        if self._postings is not None:
+            self._postings.setdefault(code, array("q")).append(len(self.codes))
+        self.codes.append(code)
+
+    def append_missing(self):
+        self.codes.append(-1)
+
+    def get(self, row):
+        code = self.codes[row]
+        return None if code < 0 else self.values[code]
+
+    def rows_equal(self, values):
+        codes = set()
+        for value in values:
+            try:
+                code = self._lookup.get((type(value), value))
+            except TypeError:
+                continue
+            if code is not None:
+                codes.add(code)
+        return self._rows_for(codes)
+
+    def rows_in_range(self, bounds):
+        codes = set()
+        for code, value in enumerate(self.values):
+            try:
+                if all(_RANGE_OPS[op](value, bound) for op, bound in bounds.items()):
+                    codes.add(code)
+            except TypeError:
+                # Not comparable with the bounds (e.g. a str against a date)
+                continue
+        return self._rows_for(codes)
+
+    def _rows_for(self, codes):
+        postings = self.postings()
+        lists = [np.frombuffer(postings[code], dtype=np.int64) for code in codes if code in postings]
+        if not lists:
+            return np.empty(0, dtype=np.int64)
+        # Copied, so no view pins the posting arrays against later appends
+        return lists[0].copy() if len(lists) == 1 else np.sort(np.concatenate(lists))
+
+    def postings(self):
+        """Maps each value code to the ascending rows holding it."""
+        if self._postings is None:
+            codes = np.frombuffer(self.codes, dtype=np.int32)
+            rows = np.argsort(codes, kind="stable")
+            bounds = np.flatnonzero(np.diff(codes[rows])) + 1
+            self._postings = {
+                int(codes[group[0]]): array("q", group.tobytes())
+                for group in np.split(rows, bounds) if len(group) and codes[group[0]] >= 0
+            }
+        return self._postings
+
+    def nbytes(self):
+        return self.codes.itemsize * len(self.codes)
+
+    @classmethod
+    def from_column(cls, column, rows):
+        coded = cls(0)
+        for row in range(rows):
+            value = column.get(row)
+            if value is None:
+                coded.append_missing()
+            else:
+                coded.append(value)
+        return coded
+
+
+class MetadataTable:
+    """
+    Append-only list of metadata dicts stored column by column.
+
+    Integer fields (chunk_id, offsets, pages) live in packed int64 arrays
+    and everything else is dictionary-encoded, so per-chunk metadata costs
+    a few bytes per field rather than a dict per chunk. Indexing rebuilds
+    the dict; a None value is treated as absent.
+    """
+
+    def __init__(self):
+        self._columns = {}
+        self._rows = 0
+
+    def append(self, meta):
+        meta = meta or {}
+        for key, value in meta.items():
+            if value is None:
+                continue
+            column = self._columns.get(key)
+            if column is None:
+                column = _IntColumn(self._rows) if _IntColumn.accepts(value) else _CodedColumn(self._rows)
+                self._columns[key] = column
+            elif not column.accepts(value):
+                column = self._columns[key] = _CodedColumn.from_column(column, self._rows)
+            column.append(value)
+        for key, column in self._columns.items():
+            if meta.get(key) is None:
+                column.append_missing()
+        self._rows += 1
+
+    def __len__(self):
+        return self._rows
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._rows))]
+        if index < 0:
+            index += self._rows
+        if not 0 <= index < self._rows:
+            raise IndexError("MetadataTable index out of range")
+        meta = {}
+        for key, column in self._columns.items():
+            value = column.get(index)
+            if value is not None:
+                meta[key] = value
+        return meta
+
+    def __iter__(self):
+        for i in range(self._rows):
+            yield self[i]
+
+    def column(self, key):
+        """Returns every row's value for key (None where absent)."""
+        column = self._columns.get(key)
+        if column is None:
+            return [None] * self._rows
+        return [column.get(row) for row in range(self._rows)]
+
+    def matching_rows(self, filters):
+        """
+        Returns the ascending rows whose metadata matches every condition in
+        filters, a dict of field -> condition:
+
+            {"doc_id": "a"}                          equal to a value
+            {"category": ["invoice", "contract"]}    any of several values
+            {"date": {"gte": "2024-01-01"}}          range: gt, gte, lt, lte
+
+        Rows lacking the field never match.
+        """
+        rows = None
+        for key, condition in filters.items():
+            column = self._columns.get(key)
+            if column is None:
+                return np.empty(0, dtype=np.int64)
+            if isinstance(condition, dict):
+                unknown = set(condition) - set(_RANGE_OPS)
+                if unknown:
+                    raise ValueError(
+                        f"Unknown filter operator(s) {sorted(unknown)} for {key!r}; "
+                        f"expected {sorted(_RANGE_OPS)}"
+                    )
+                matched = column.rows_in_range(condition)
+            elif isinstance(condition, (list, tuple, set, frozenset)):
+                matched = column.rows_equal(condition)
+            else:
+                matched = column.rows_equal([condition])
+            rows = matched if rows is None else np.intersect1d(rows, matched, assume_unique=True)
+            if not len(rows):
+                break
+        return np.arange(self._rows, dtype=np.int64) if rows is None else rows
+
+    def nbytes(self):
+        return sum(column.nbytes() for column in self._columns.values())
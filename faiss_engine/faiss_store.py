@@ -1,32 +1,564 @@
+import math
+import threading
+from array import array
+from contextlib import contextmanager
+
 import faiss
 import numpy as np
 
+from .columnar import MetadataTable, TextColumn
+from .indexes import (
+    INDEX_TYPES, bytes_per_vector, compact, copy_to_memory, create_index, needs_training, rebuild, search_parameters,
+    set_search_params,
+)
+
+# A flat store switches to `promote_to` once it holds this many vectors
+DEFAULT_PROMOTE_AT = 100_000
+# Trained index types are built once this many vectors are available
+DEFAULT_TRAIN_AT = 10_000
+# Deleted vectors are compacted out of the index in the background once
+# they make up this share of it
+COMPACT_RATIO = 0.2
+# Filters matching at most this many entries, or at most this share of the
+# index, are answered by exact search over just those vectors; graph and IVF
+# search lose recall on small subsets
+EXACT_FILTER_MAX = 4096
+EXACT_FILTER_RATIO = 0.02
+# Vectors reconstructed at a time by exact filtered search
+EXACT_BATCH = 4096
+
 class FAISSStore:
-    def __init__(self, dim=768):
+    def __init__(
+        self,
+        dim=768,
+        index_type="flat",
+        promote_at=DEFAULT_PROMOTE_AT,
+        promote_to="hnsw",
+        train_at=DEFAULT_TRAIN_AT,
+        nprobe=16,
+        ef_search=64,
+        rerank_factor=4,
+        **index_params
+    ):
+        """
+        Args:
+            dim: Vector size
+            index_type: 'flat' (exact), 'hnsw' or 'ivf' (approximate), or a
+                compressed type: 'fp16', 'sq8' or 'ivfpq' (see indexes.py).
+                Types that need training start on a flat index and are
+                built on a sample once train_at vectors have been added
+                (in the background; see wait_for_rebuild)
+            promote_at: Size at which a flat store rebuilds itself as
+                promote_to in the background (None keeps it exact forever)
+            promote_to: Index type used for automatic promotion
+            train_at: Vectors needed before a trained index type is built
+            nprobe: IVF lists probed per query (recall vs latency)
+            ef_search: HNSW candidate list size per query (recall vs latency)
+            rerank_factor: With rerank, candidates re-scored per result
+            **index_params: nlist, hnsw_m, ef_construction, pq_m, pq_nbits,
+                rerank ('flat', 'fp16' or 'sq8': re-score the top candidates
+                against a more precise copy of the vectors)
+        """
+        for kind in (index_type, promote_to):
+            if kind not in INDEX_TYPES:
+                raise ValueError(f"Unknown index type {kind!r}; expected one of {INDEX_TYPES}")
         self.dim = dim
-        self.index = faiss.IndexFlatL2(dim)
-        self.vectors = []
-        self.documents = []   # raw text or chunks
-        self.metadata = []    # optional metadata objects
+        self.index_type = index_type
+        self.promote_at = promote_at
+        self.promote_to = promote_to
+        self.train_at = train_at
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        self.rerank_factor = rerank_factor
+        self.index_params = index_params
+        # Kind of the index currently in use; differs from index_type while
+        # a trained type is still waiting for enough vectors
+        if needs_training(index_type, index_params.get("rerank")):
+            self.kind = "flat"
+            self.index = create_index("flat", dim)
+        else:
+            self.kind = index_type
+            self.index = create_index(index_type, dim, **index_params)
+        self._apply_search_params()
+        # Vectors live only in the index; texts and metadata are packed columns.
+        # An entry's id is its row in these columns and never changes; ids[i]
+        # is the id of the i-th vector in the index (ascending, as entries are
+        # only appended and compaction keeps their order).
+        self.documents = TextColumn()     # raw text or chunks
+        self.metadata = MetadataTable()   # optional metadata objects
+        self.ids = array("q")
+        self.tombstones = set()           # deleted ids whose vectors are still in the index
+        self.snapshot_info = None         # manifest of the snapshot this store was loaded from
+        self._mmapped = False
+        self._doc_ids = None              # doc_id -> live ids, built on first use
+        self._selector = None             # excludes tombstones from searches
+        self._lock = threading.RLock()    # serializes writes and compaction
+        # Searches hold the read side while they use the index and columns;
+        # changing them in place (add) or swapping them needs the write side
+        self._search_lock = _ReadWriteLock()
+        self._compactor = None
+        self._rebuilder = None
+
+    def index_config(self):
+        """Constructor settings of this store, recorded in snapshots."""
+        return {
+            "index_type": self.index_type,
+            "promote_at": self.promote_at,
+            "promote_to": self.promote_to,
+            "train_at": self.train_at,
+            "nprobe": self.nprobe,
+            "ef_search": self.ef_search,
+            "rerank_factor": self.rerank_factor,
+            **self.index_params,
+        }
+
+    def set_search_params(self, nprobe=None, ef_search=None, rerank_factor=None):
+        """Tunes recall vs latency of the ANN index (ignored by flat indexes)."""
+        if nprobe is not None:
+            self.nprobe = nprobe
+        if ef_search is not None:
+            self.ef_search = ef_search
+        if rerank_factor is not None:
+            self.rerank_factor = rerank_factor
+        with self._search_lock.write():
+            self._apply_search_params()
+
+    def _apply_search_params(self):
+        set_search_params(
+            self.index, nprobe=self.nprobe, ef_search=self.ef_search, rerank_factor=self.rerank_factor
+        )
+
+    def rebuild(self, index_type=None, train_size=100_000):
+        """
+        Rebuilds the index as index_type (default: the configured type),
+        training it on a random sample of at most train_size stored vectors.
+        """
+        index_type = index_type or self.index_type
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type {index_type!r}; expected one of {INDEX_TYPES}")
+        with self._lock:
+            index = rebuild(self.index, index_type, self.dim, train_size=train_size, **self.index_params)
+            with self._search_lock.write():
+                self.index = index
+                self.index_type = self.kind = index_type
+                self._mmapped = False
+                self._apply_search_params()
+
+    def _maybe_rebuild(self):
+        """
+        Starts building the trained or promoted index in a thread once the
+        flat index is big enough. Adds and searches carry on against the
+        flat index meanwhile.
+        """
+        if self.kind != "flat" or (self._rebuilder is not None and self._rebuilder.is_alive()):
+            return
+        n = self.index.ntotal
+        if self.index_type != "flat":
+            index_type = self.index_type if n >= self.train_at else None
+        elif self.promote_at is not None and n >= self.promote_at:
+            index_type = self.promote_to
+        else:
+            index_type = None
+        if index_type is not None:
+            self._rebuilder = threading.Thread(
+                target=self._rebuild_in_background, args=(index_type,), name="faiss-rebuild", daemon=True
+            )
+            self._rebuilder.start()
+
+    def _rebuild_in_background(self, index_type):
+        while True:
+            source = self.index
+            # Reads share the index with searches; adds wait between batches
+            index = rebuild(source, index_type, self.dim, reading=self._search_lock.read, **self.index_params)
+            with self._lock:
+                if self.kind != "flat":
+                    return
+                if self.index is not source:
+                    # Compacted meanwhile, so positions moved: start over
+                    continue
+                with self._search_lock.write():
+                    # Catch up with the vectors added during the build
+                    if source.ntotal > index.ntotal:
+                        index.add(source.reconstruct_n(index.ntotal, source.ntotal - index.ntotal))
+                    self.index = index
+                    self.index_type = self.kind = index_type
+                    self._mmapped = False
+                    self._apply_search_params()
+                return
+
+    def wait_for_rebuild(self, timeout=None):
+        """Waits for a background training/promotion build started by add."""
+        rebuilder = self._rebuilder
+        if rebuilder is not None:
+            rebuilder.join(timeout)
+
+    def save(self, path, extra=None):
+        """
+        Writes an atomic, versioned snapshot of the store under directory path.
+        `extra` is recorded in the snapshot manifest (e.g. the embedding model).
+        """
+        from .snapshot import save_snapshot
+        with self._lock:
+            return save_snapshot(self, path, extra=extra)
+
+    @classmethod
+    def load(cls, path, mmap=True, snapshot=None):
+        """
+        Loads the current snapshot under directory path. With mmap=True the
+        index and texts are memory-mapped read-only, so startup does not
+        read the whole index and processes share its pages; the first add
+        copies the index into memory. `snapshot` picks an older snapshot
+        by name instead of the current one.
+        """
+        from .snapshot import load_snapshot
+        index, documents, metadata, ids, tombstones, manifest = load_snapshot(
+            path, mmap=mmap, name=snapshot
+        )
+        store = cls(manifest["dim"], **manifest.get("index", {}))
+        store.kind = manifest.get("kind", "flat")
+        store.index = index
+        store._apply_search_params()
+        store.documents = documents
+        store.metadata = metadata
+        store.ids = ids
+        store.tombstones = tombstones
+        store.snapshot_info = manifest
+        store._mmapped = mmap
+        return store
+
+    def _writable_index(self):
+        if self._mmapped:
+            # Copied without re-reading the file: later saves may prune its snapshot
+            index = copy_to_memory(self.index)
+            set_search_params(index, nprobe=self.nprobe, ef_search=self.ef_search, rerank_factor=self.rerank_factor)
+            with self._search_lock.write():
+                self.index = index
+            self._mmapped = False
+        return self.index
     
     def add(self, embedding, text, meta=None):
-        vector = np.array([embedding], dtype='float32')
-        self.index.add(vector)
-        
-        self.vectors.append(embedding)
-        self.documents.append(text)
-        self.metadata.append(meta or {})
-
-    def search(self, query_embedding, top_k=5):
-        query_vector = np.array([query_embedding], dtype='float32')
-        distances, indices = self.index.search(query_vector, top_k)
-        
-        results = []
-        for idx in indices[0]:
-            if idx < len(self.documents):
-                results.append({
-                    "text": self.documents[idx],
-                    "metadata": self.metadata[idx],
-                    "distance": float(distances[0][0])
-                })
-        return results
+        """Adds one entry; returns its id."""
+        return self.add_batch([embedding], [text], [meta])[0]
+
+    def add_batch(self, embeddings, texts, metas=None):
+        """
+        Adds many entries with a single index.add call (embeddings: n x dim
+        matrix); returns their ids.
+        """
+        vectors = np.ascontiguousarray(embeddings, dtype='float32')
+        if vectors.ndim != 2 or len(vectors) != len(texts):
+            raise ValueError("embeddings must be a 2-D array with one row per text")
+        if metas is not None and len(metas) != len(texts):
+            raise ValueError("metas must have one entry per text")
+        if metas is None:
+            metas = [None] * len(texts)
+        with self._lock:
+            index = self._writable_index()
+            first = len(self.documents)
+            new_ids = list(range(first, first + len(texts)))
+            # FAISS indexes are not safe to search while they are added to
+            with self._search_lock.write():
+                index.add(vectors)
+                self.ids.extend(new_ids)
+                self.documents.extend(texts)
+                for meta in metas:
+                    self.metadata.append(meta)
+            if self._doc_ids is not None:
+                for entry_id, meta in zip(new_ids, metas):
+                    if meta and meta.get("doc_id") is not None:
+                        self._doc_ids.setdefault(meta["doc_id"], []).append(entry_id)
+            self._maybe_rebuild()
+        return new_ids
+
+    def document_ids(self, doc_id):
+        """Ids of the live entries whose metadata has this doc_id."""
+        with self._lock:
+            if self._doc_ids is None:
+                live = set(self.ids) - self.tombstones
+                self._doc_ids = {}
+                for entry_id, value in enumerate(self.metadata.column("doc_id")):
+                    if value is not None and entry_id in live:
+                        self._doc_ids.setdefault(value, []).append(entry_id)
+            return list(self._doc_ids.get(doc_id, ()))
+
+    def remove_ids(self, ids):
+        """
+        Deletes entries by id. They are tombstoned, so searches skip them at
+        once, and compacted out of the index in the background later.
+        """
+        with self._lock:
+            removed = self._live(ids)
+            if not removed:
+                return 0
+            with self._search_lock.write():
+                self.tombstones = self.tombstones | removed
+                self._selector = None
+            if self._doc_ids is not None:
+                for doc_id in {self.metadata[entry_id].get("doc_id") for entry_id in removed}:
+                    remaining = [i for i in self._doc_ids.get(doc_id, ()) if i not in removed]
+                    if remaining:
+                        self._doc_ids[doc_id] = remaining
+                    else:
+                        self._doc_ids.pop(doc_id, None)
+            if len(self.tombstones) >= COMPACT_RATIO * len(self.ids):
+                self.compact(background=True)
+        return len(removed)
+
+    def remove_document(self, doc_id):
+        """Deletes every chunk of a document; returns how many were removed."""
+        return self.remove_ids(self.document_ids(doc_id))
+
+    def upsert_document(self, doc_id, chunks):
+        """
+        Replaces a document's chunks. `chunks` is an iterable of
+        (embedding, text, meta) tuples; meta may be None and gets the doc_id.
+        The new chunks are added before the old ones are removed, so the
+        document never disappears from search. Returns the new ids.
+        """
+        embeddings, texts, metas = [], [], []
+        for embedding, text, meta in chunks:
+            embeddings.append(embedding)
+            texts.append(text)
+            metas.append({**(meta or {}), "doc_id": doc_id})
+        with self._lock:
+            old = self.document_ids(doc_id)
+            new_ids = self.add_batch(np.array(embeddings, dtype='float32').reshape(-1, self.dim), texts, metas)
+            self.remove_ids(old)
+        return new_ids
+
+    def compact(self, background=False):
+        """
+        Drops tombstoned vectors from the index and their texts from the
+        document column. Ids stay valid. With background=True this runs in
+        a thread: searches keep using the old index until the new one is
+        swapped in, while writes wait for it.
+        """
+        if background:
+            if self._compactor is None or not self._compactor.is_alive():
+                self._compactor = threading.Thread(target=self.compact, name="faiss-compaction", daemon=True)
+                self._compactor.start()
+            return
+        with self._lock:
+            if not self.tombstones:
+                return
+            ids = np.frombuffer(self.ids, dtype=np.int64)
+            keep = np.flatnonzero(~np.isin(ids, np.fromiter(self.tombstones, dtype=np.int64)))
+            index = compact(self._writable_index(), keep)
+            documents = TextColumn()
+            for entry_id, text in enumerate(self.documents):
+                documents.append("" if entry_id in self.tombstones else text)
+
+            with self._search_lock.write():
+                self.index = index
+                self._apply_search_params()
+                self.ids = array("q", ids[keep].tobytes())
+                self.documents = documents
+                self.tombstones = set()
+                self._selector = None
+
+    def wait_for_compaction(self, timeout=None):
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join(timeout)
+
+    def _live(self, entry_ids):
+        """The subset of entry_ids that exist and are not deleted."""
+        wanted = np.array(sorted(set(entry_ids)), dtype=np.int64)
+        ids = np.frombuffer(self.ids, dtype=np.int64)
+        if not len(wanted) or not len(ids):
+            return set()
+        pos = np.minimum(np.searchsorted(ids, wanted), len(ids) - 1)
+        return set(wanted[ids[pos] == wanted].tolist()) - self.tombstones
+
+    def _position(self, entry_id):
+        ids = np.frombuffer(self.ids, dtype=np.int64)
+        pos = int(np.searchsorted(ids, entry_id))
+        if pos == len(ids) or ids[pos] != entry_id or entry_id in self.tombstones:
+            raise KeyError(f"No entry with id {entry_id}")
+        return pos
+
+    def reconstruct(self, entry_id):
+        """Returns the stored vector of an entry, read back from the index."""
+        with self._search_lock.read():
+            return self.index.reconstruct(self._position(int(entry_id)))
+
+    def memory_usage(self):
+        """
+        Approximate bytes held by the index, texts and metadata, plus the
+        index cost per vector and per million vectors for the current type.
+        """
+        # Until a trained type has been built, the store is a plain flat index
+        # and the configured pq/ivf/rerank settings cost nothing yet
+        params = self.index_params if self.kind == self.index_type else {}
+        per_vector = bytes_per_vector(self.kind, self.dim, **params)
+        return {
+            "vectors": int(self.index.ntotal * per_vector),
+            "bytes_per_vector": per_vector,
+            "per_million_vectors": int(1_000_000 * per_vector),
+            "ids": self.ids.itemsize * len(self.ids),
+            "documents": self.documents.nbytes(),
+            "metadata": self.metadata.nbytes(),
+        }
+
+    def search(self, query_embedding, top_k=5, filters=None):
+        return self.search_batch([query_embedding], top_k=top_k, filters=filters)[0]
+
+    def search_batch(self, query_embeddings, top_k=5, filters=None):
+        """
+        Searches many queries with one index.search call; returns one result
+        list per query.
+
+        `filters` restricts every query to entries whose metadata matches
+        (see MetadataTable.matching_rows, e.g. {"category": "invoice"}).
+        Matching entries are looked up in the metadata posting lists and
+        handed to FAISS as an ID selector, so the top_k results are the
+        nearest matching entries rather than a filtered top_k. The fewer
+        entries match, the more of the index the search explores (nprobe
+        and ef_search grow with 1 / selectivity). Filters matching up to
+        EXACT_FILTER_MAX entries or EXACT_FILTER_RATIO of the index are
+        searched exactly instead.
+        """
+        query_vectors = np.ascontiguousarray(query_embeddings, dtype='float32')
+        if query_vectors.ndim == 1:
+            query_vectors = query_vectors.reshape(1, -1)
+        with self._search_lock.read():
+            return self._search(query_vectors, top_k, filters)
+
+    def _search(self, query_vectors, top_k, filters):
+        index, ids, documents = self.index, self.ids, self.documents
+        exact = None
+        params = None
+        if filters:
+            matched = self._filter_positions(filters)
+            if not len(matched):
+                return [[] for _ in query_vectors]
+            selectivity = len(matched) / len(ids)
+            if len(matched) <= EXACT_FILTER_MAX or selectivity <= EXACT_FILTER_RATIO:
+                exact = matched
+            else:
+                params = self._search_params(index, _bitmap_selector(matched, len(ids)), selectivity)
+        elif self.tombstones:
+            live = 1 - len(self.tombstones) / len(ids)
+            params = self._search_params(index, self._tombstone_selector(), live)
+        if exact is not None:
+            distances, positions = _exact_search(index, query_vectors, top_k, exact)
+        else:
+            distances, positions = index.search(query_vectors, top_k, params=params)
+
+        batch_results = []
+        for row_distances, row_positions in zip(distances, positions):
+            results = []
+            for distance, pos in zip(row_distances, row_positions):
+                # FAISS pads with -1 when fewer than top_k entries exist
+                if 0 <= pos < len(ids):
+                    entry_id = ids[pos]
+                    results.append({
+                        "id": entry_id,
+                        "text": documents[entry_id],
+                        "metadata": self.metadata[entry_id],
+                        "distance": float(distance)
+                    })
+            batch_results.append(results)
+        return batch_results
+
+    def _search_params(self, index, selector, selectivity=1.0):
+        """
+        SearchParameters for a selector accepting `selectivity` of the index.
+        Graph and IVF search find about selectivity * ef_search (or of the
+        probed lists) accepted candidates, so both knobs are scaled by
+        1 / selectivity to keep recall level with unfiltered search.
+        """
+        boost = 1 / max(selectivity, EXACT_FILTER_RATIO)
+        return search_parameters(
+            index,
+            selector,
+            nprobe=math.ceil(self.nprobe * boost),
+            ef_search=math.ceil(self.ef_search * boost),
+            rerank_factor=self.rerank_factor,
+        )
+
+    def _tombstone_selector(self):
+        """Selector excluding tombstoned entries."""
+        if self._selector is None:
+            dead = np.searchsorted(
+                np.frombuffer(self.ids, dtype=np.int64),
+                np.fromiter(sorted(self.tombstones), dtype=np.int64),
+            )
+            batch = faiss.IDSelectorBatch(dead)
+            self._selector = faiss.IDSelectorNot(batch)
+            self._selector.referenced_objects = [batch]
+        return self._selector
+
+    def _filter_positions(self, filters):
+        """Ascending index positions of the live entries matching filters."""
+        rows = self.metadata.matching_rows(filters)
+        if self.tombstones:
+            rows = rows[~np.isin(rows, np.fromiter(self.tombstones, dtype=np.int64))]
+        ids = np.frombuffer(self.ids, dtype=np.int64)
+        if not len(rows) or not len(ids):
+            return np.empty(0, dtype=np.int64)
+        # Rows whose vector was compacted away have no position
+        positions = np.minimum(np.searchsorted(ids, rows), len(ids) - 1)
+        return positions[ids[positions] == rows]
+
+
+def _exact_search(index, query_vectors, top_k, positions):
+    """Exact top_k over the vectors at positions, reconstructed a chunk at a time."""
+    heap = faiss.ResultHeap(len(query_vectors), top_k)
+    for start in range(0, len(positions), EXACT_BATCH):
+        chunk = positions[start:start + EXACT_BATCH]
+        distances, local = faiss.knn(query_vectors, index.reconstruct_batch(chunk), min(top_k, len(chunk)))
+        heap.add_result(distances, chunk[local])
+    heap.finalize()
+    return heap.D, heap.I
+
+
+def _bitmap_selector(positions, n):
+    mask = np.zeros(n, dtype=bool)
+    mask[positions] = True
+    bitmap = np.packbits(mask, bitorder="little")
+    selector = faiss.IDSelectorBitmap(bitmap)
+    selector.referenced_objects = [bitmap]
+    return selector
+
+
+class _ReadWriteLock:
+    """
+    Many readers or one writer. Waiting writers go first, so a steady
+    stream of searches cannot hold off an add indefinitely. Not reentrant.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writing = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writing or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writing or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writing = False
+                self._cond.notify_all()
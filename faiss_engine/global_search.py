@@ -4,7 +4,11 @@ class GlobalSearch:
     def __init__(self, faiss_store):
         self.store = faiss_store
 
-    def search(self, query, top_k=10):
+    def search(self, query, top_k=10, filters=None):
+        """
+        `filters` restricts results by chunk metadata, e.g.
+        {"category": "invoice", "date": {"gte": "2024-01-01"}}.
+        """
         query_emb = embed_text(query)
-        results = self.store.search(query_emb, top_k=top_k)
+        results = self.store.search(query_emb, top_k=top_k, filters=filters)
         return results
@@ -0,0 +1,212 @@
+"""
+Index types for FAISSStore.
+
+    flat    exact brute-force search (IndexFlatL2), 4 bytes per dimension
+    hnsw    graph-based ANN (IndexHNSWFlat); no training, tuned with ef_search
+    ivf     inverted lists (IndexIVFFlat); trained on a sample, tuned with nprobe
+    fp16    exact search over float16 vectors, 2 bytes per dimension
+    sq8     exact search over 8-bit scalar-quantized vectors, 1 byte per dimension
+    ivfpq   inverted lists over product-quantized codes (IndexIVFPQ),
+            pq_m * pq_nbits / 8 bytes per vector; trained, tuned with nprobe
+
+Quantized types are lossy. `rerank` ('flat', 'fp16' or 'sq8') keeps a
+second, more precise copy of each vector and re-scores the top
+rerank_factor * k candidates with it (IndexRefine), trading some of the
+memory saved for recall. Every type can reconstruct stored vectors (IVF
+indexes get a direct map for that), but from a lossy type the
+reconstruction is approximate.
+"""
+
+import math
+from contextlib import nullcontext
+
+import faiss
+import numpy as np
+
+INDEX_TYPES = ("flat", "hnsw", "ivf", "fp16", "sq8", "ivfpq")
+RERANK_TYPES = ("flat", "fp16", "sq8")
+
+# Vectors added to the new index per call while rebuilding
+REBUILD_BATCH = 65536
+# FAISS wants roughly this many training points per IVF list / PQ centroid
+TRAIN_POINTS_PER_LIST = 39
+
+_CODEC_FACTORY = {"flat": "Flat", "fp16": "SQfp16", "sq8": "SQ8"}
+_CODEC_BYTES = {"flat": 4, "fp16": 2, "sq8": 1}   # per dimension
+# Inverted lists store an int64 id next to each code
+_IVF_ID_BYTES = 8
+
+
+def needs_training(kind, rerank=None):
+    return kind in ("ivf", "sq8", "ivfpq") or rerank == "sq8"
+
+
+def default_nlist(n):
+    """IVF list count for n vectors: ~4*sqrt(n), with enough training points per list."""
+    return max(1, min(int(4 * math.sqrt(n)), n // TRAIN_POINTS_PER_LIST))
+
+
+def default_pq_m(dim):
+    """PQ sub-quantizer count: the largest divisor of dim up to dim / 16 (48 for 768)."""
+    target = max(1, dim // 16)
+    return max(m for m in range(1, target + 1) if dim % m == 0)
+
+
+def index_factory_string(kind, dim, n=0, nlist=None, hnsw_m=32, pq_m=None, pq_nbits=8, rerank=None):
+    if kind == "hnsw":
+        spec = f"HNSW{hnsw_m}"
+    elif kind == "ivf":
+        spec = f"IVF{nlist or default_nlist(n)},Flat"
+    elif kind == "ivfpq":
+        spec = f"IVF{nlist or default_nlist(n)},PQ{pq_m or default_pq_m(dim)}x{pq_nbits}"
+    elif kind in _CODEC_FACTORY:
+        spec = _CODEC_FACTORY[kind]
+    else:
+        raise ValueError(f"Unknown index type {kind!r}; expected one of {INDEX_TYPES}")
+    if rerank is not None:
+        if rerank not in RERANK_TYPES:
+            raise ValueError(f"Unknown rerank type {rerank!r}; expected one of {RERANK_TYPES}")
+        spec += ",RFlat" if rerank == "flat" else f",Refine({_CODEC_FACTORY[rerank]})"
+    return spec
+
+
+def create_index(kind, dim, n=0, ef_construction=80, **params):
+    """
+    Returns an empty (possibly untrained) index of the given kind.
+    params: nlist, hnsw_m, pq_m, pq_nbits, rerank.
+    """
+    index = faiss.index_factory(dim, index_factory_string(kind, dim, n=n, **params))
+    hnsw = getattr(index, "hnsw", None)
+    if hnsw is not None:
+        hnsw.efConstruction = ef_construction
+    return index
+
+
+def bytes_per_vector(kind, dim, hnsw_m=32, pq_m=None, pq_nbits=8, rerank=None, **_):
+    """Approximate index memory per stored vector."""
+    if kind == "hnsw":
+        # Level 0 holds 2*M int32 neighbour ids per vector; upper levels add ~1/M of that
+        size = 4 * dim + 2 * hnsw_m * 4 * (1 + 1 / hnsw_m)
+    elif kind == "ivf":
+        size = 4 * dim + _IVF_ID_BYTES
+    elif kind == "ivfpq":
+        size = math.ceil((pq_m or default_pq_m(dim)) * pq_nbits / 8) + _IVF_ID_BYTES
+    else:
+        size = _CODEC_BYTES[kind] * dim
+    if rerank is not None:
+        size += _CODEC_BYTES[rerank] * dim
+    return size
+
+
+def set_search_params(index, nprobe=None, ef_search=None, rerank_factor=None):
+    """Applies query-time knobs to whichever index type this is."""
+    ivf = _ivf(index)
+    if ivf is not None and nprobe is not None:
+        ivf.nprobe = min(nprobe, ivf.nlist)
+    index = faiss.downcast_index(index)
+    if rerank_factor is not None and hasattr(index, "k_factor"):
+        index.k_factor = rerank_factor
+    hnsw = getattr(index, "hnsw", None)
+    if hnsw is None and hasattr(index, "base_index"):
+        hnsw = getattr(faiss.downcast_index(index.base_index), "hnsw", None)
+    if hnsw is not None and ef_search is not None:
+        hnsw.efSearch = ef_search
+
+
+def rebuild(index, kind, dim, train_size=100_000, seed=0, reading=nullcontext, **params):
+    """
+    Copies every vector of index into a new index of the given kind,
+    training it first on a random sample of at most train_size vectors.
+    Each read from index happens inside a `reading()` context, so index
+    can keep growing between reads; vectors added after the call started
+    are not copied.
+    """
+    with reading():
+        n = index.ntotal
+    new = create_index(kind, dim, n=n, **params)
+    if not new.is_trained:
+        rng = np.random.default_rng(seed)
+        sample_ids = np.sort(rng.choice(n, size=min(n, train_size), replace=False))
+        with reading():
+            sample = index.reconstruct_batch(sample_ids)
+        new.train(sample)
+    for start in range(0, n, REBUILD_BATCH):
+        with reading():
+            vectors = index.reconstruct_n(start, min(REBUILD_BATCH, n - start))
+        new.add(vectors)
+    enable_reconstruct(new)
+    return new
+
+
+def copy_to_memory(index):
+    """
+    Returns a writable in-memory copy of an index read memory-mapped, which
+    no longer depends on the file it was read from.
+    """
+    ivf = _ivf(index)
+    if ivf is None or isinstance(faiss.downcast_InvertedLists(ivf.invlists), faiss.ArrayInvertedLists):
+        return faiss.deserialize_index(faiss.serialize_index(index))
+    # Mapped (on-disk) inverted lists serialize as a reference to their file:
+    # copy the rest of the index without them, then copy each list
+    copy = faiss.deserialize_index(faiss.serialize_index(index), faiss.IO_FLAG_SKIP_IVF_DATA)
+    lists = faiss.ArrayInvertedLists(ivf.nlist, ivf.code_size)
+    for list_no in range(ivf.nlist):
+        size = ivf.invlists.list_size(list_no)
+        if size:
+            lists.add_entries(list_no, size, ivf.invlists.get_ids(list_no), ivf.invlists.get_codes(list_no))
+    _ivf(copy).replace_invlists(lists, True)
+    # The copy owns the lists now
+    lists.this.disown()
+    return copy
+
+
+def enable_reconstruct(index):
+    ivf = _ivf(index)
+    if ivf is not None:
+        ivf.make_direct_map()
+
+
+def _ivf(index):
+    try:
+        return faiss.extract_index_ivf(index)
+    except RuntimeError:
+        return None
+
+
+def compact(index, keep):
+    """
+    Returns a copy of index holding only the vectors at positions `keep`
+    (ascending), in that order. The copy keeps the trained quantizers, so
+    nothing is retrained.
+    """
+    new = faiss.clone_index(index)
+    new.reset()
+    enable_reconstruct(new)
+    for start in range(0, len(keep), REBUILD_BATCH):
+        new.add(index.reconstruct_batch(keep[start:start + REBUILD_BATCH]))
+    return new
+
+
+def search_parameters(index, selector=None, nprobe=None, ef_search=None, rerank_factor=None):
+    """
+    Per-query SearchParameters restricting the search to ids accepted by
+    selector. FAISS ignores the index-level knobs once parameters are
+    passed, so they are repeated here for the matching index type.
+    """
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexRefine):
+        params = faiss.IndexRefineSearchParameters()
+        base = search_parameters(index.base_index, selector, nprobe, ef_search)
+        params.base_index_params = base
+        params.k_factor = rerank_factor or index.k_factor
+        params.referenced_objects = [base]
+        return params
+    if isinstance(index, faiss.IndexIVF):
+        params = faiss.SearchParametersIVF(sel=selector, nprobe=min(nprobe or index.nprobe, index.nlist))
+    elif isinstance(index, faiss.IndexHNSW):
+        params = faiss.SearchParametersHNSW(sel=selector, efSearch=ef_search or index.hnsw.efSearch)
+    else:
+        params = faiss.SearchParameters(sel=selector)
+    # The SWIG wrapper does not keep the selector alive on its own
+    params.referenced_objects = [selector]
+    return params
@@ -1,20 +1,126 @@
-from IDP_AI_Pipeline.chunker import chunk_text
-from IDP_AI_Pipeline.embedder import embed_text
+from IDP_AI_Pipeline.chunker import iter_chunks
+from IDP_AI_Pipeline.embedder import batched, embed_texts, get_embedder
+from IDP_AI_Pipeline.embedding_executor import DEFAULT_REQUESTS_PER_MINUTE, EmbeddingExecutor
 from .faiss_store import FAISSStore
+from .sharded_store import ShardedStore, has_sharded_snapshot
+from .snapshot import has_snapshot
 
 class DocumentIngestor:
-    def __init__(self):
-        self.store = FAISSStore(dim=768)
-
-    def ingest_document(self, text, doc_id):
-        chunks = chunk_text(text)
-        for idx, chunk in enumerate(chunks):
-            embedding = embed_text(chunk)
-            metadata = {
-                "doc_id": doc_id,
-                "chunk_id": idx
-            }
-            self.store.add(embedding, chunk, meta=metadata)
+    def __init__(
+        self, max_workers=4, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE, snapshot_dir=None, shard_by=None
+    ):
+        """
+        `snapshot_dir` enables persistence: the latest snapshot there is
+        loaded (memory-mapped) at start-up instead of re-embedding the
+        corpus, and save() writes a new one.
+
+        `shard_by` names a document metadata field (e.g. "category" or
+        "tenant"); chunks are then stored in one ShardedStore shard per
+        value instead of a single FAISSStore.
+        """
+        embedder = get_embedder()
+        self.snapshot_dir = snapshot_dir
+        self.store = None
+        if shard_by is None:
+            store_cls, found = FAISSStore, has_snapshot
+        else:
+            store_cls, found = ShardedStore, has_sharded_snapshot
+        if snapshot_dir is not None and found(snapshot_dir):
+            store = store_cls.load(snapshot_dir)
+            if store.snapshot_info.get("embedding_model") == embedder.model:
+                self.store = store
+            else:
+                print(
+                    f"Ignoring snapshot in {snapshot_dir}: built with "
+                    f"{store.snapshot_info.get('embedding_model')!r}, current model is {embedder.model!r}"
+                )
+        if self.store is None:
+            # Vector size follows the configured embedding backend
+            if shard_by is None:
+                self.store = FAISSStore(dim=embedder.dim)
+            else:
+                self.store = ShardedStore(dim=embedder.dim, shard_key=shard_by)
+        self.executor = EmbeddingExecutor(
+            embed_texts, max_workers=max_workers, requests_per_minute=requests_per_minute
+        )
+
+    def ingest_document(self, text, doc_id, metadata=None):
+        """
+        Chunks, embeds and stores a document.
+
+        `text` may be a plain string or an extraction.ExtractionResult;
+        for the latter each chunk's metadata records the pages it spans.
+        `metadata` (e.g. category, date, department) is copied onto every
+        chunk, so searches can filter on it.
+        """
+        self.ingest_documents([(text, doc_id, metadata)])
+
+    def ingest_documents(self, documents):
+        """
+        Chunks, embeds and stores many documents, given as (text, doc_id)
+        or (text, doc_id, metadata) tuples.
+
+        Chunks from all documents are packed into batch requests that run
+        concurrently (bounded and rate limited by the executor); they are
+        stored in document and chunk order. A doc_id that is already stored
+        is replaced: its old chunks are removed once the new ones are in.
+        A doc_id given more than once is stored once, from its last copy.
+        """
+        latest = {}
+        for text, doc_id, *extra in documents:
+            latest[doc_id] = (text, extra[0] if extra else None)
+        replaced = {}
+
+        def chunks():
+            for doc_id, (text, doc_meta) in latest.items():
+                replaced[doc_id] = self.store.document_ids(doc_id)
+                spans = getattr(text, "pages", None)
+                if spans is None:
+                    pages = [text]
+                else:
+                    pages = (text.text[span.start:span.end] for span in spans)
+                for idx, chunk in enumerate(iter_chunks(pages)):
+                    yield doc_id, doc_meta, idx, chunk, spans is not None
+
+        embedded = self.executor.iter_embedded(chunks(), text=lambda item: item[3].text)
+        for batch in batched(embedded):
+            texts, metas = [], []
+            for (doc_id, doc_meta, idx, chunk, with_pages), _ in batch:
+                metadata = {
+                    **(doc_meta or {}),
+                    "doc_id": doc_id,
+                    "chunk_id": idx,
+                    "char_start": chunk.start,
+                    "char_end": chunk.end
+                }
+                if with_pages:
+                    metadata["page_start"], metadata["page_end"] = chunk.page_start, chunk.page_end
+                texts.append(chunk.text)
+                metas.append(metadata)
+            self.store.add_batch([embedding for _, embedding in batch], texts, metas)
+        self.store.remove_ids([entry_id for ids in replaced.values() for entry_id in ids])
+
+    def remove_document(self, doc_id):
+        """Removes a document's chunks from the store; returns how many there were."""
+        return self.store.remove_document(doc_id)
+
+    def save(self):
+        """Snapshots the store to snapshot_dir; returns the snapshot path."""
+        if self.snapshot_dir is None:
+            raise ValueError("DocumentIngestor was created without a snapshot_dir")
+        return self.store.save(self.snapshot_dir, extra={"embedding_model": get_embedder().model})
 
     def get_store(self):
         return self.store
+
+    def close(self):
+        """Shuts down the embedding workers and, for a ShardedStore, its search threads."""
+        self.executor.close()
+        if isinstance(self.store, ShardedStore):
+            self.store.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -5,17 +5,22 @@ class MultiDocRAG:
     def __init__(self, faiss_store):
         self.store = faiss_store
 
-    def query(self, question, top_k=5):
+    def query(self, question, top_k=5, filters=None):
+        """
+        Answers from the top_k most relevant chunks; `filters` limits them
+        by metadata (e.g. {"doc_id": ["a", "b"]} or {"department": "finance"}).
+        """
         query_emb = embed_text(question)
-        relevant_chunks = self.store.search(query_emb, top_k=top_k)
+        relevant_chunks = self.store.search(query_emb, top_k=top_k, filters=filters)
 
         context = "\n\n".join([
-            chunk["text"] for chunk in relevant_chunks
+            self._with_citation(chunk) for chunk in relevant_chunks
         ])
 
         prompt = f"""
 You are an IDP assistant. Use ONLY the following context to answer the question.
 If answer is not found, say "Information not present."
+When a context passage starts with a [document, page] label, cite it in your answer.
 
 Context:
 {context}
@@ -28,3 +33,14 @@ Question: {question}
             "answer": answer,
             "used_chunks": relevant_chunks
         }
+
+    @staticmethod
+    def _with_citation(chunk):
+        """Prefixes a chunk with its source document and pages, when known."""
+        meta = chunk["metadata"]
+        if meta.get("page_start") is None:
+            return chunk["text"]
+        pages = f"p. {meta['page_start']}"
+        if meta.get("page_end") not in (None, meta["page_start"]):
+            pages = f"pp. {meta['page_start']}-{meta['page_end']}"
+        return f"[{meta.get('doc_id')}, {pages}]\n{chunk['text']}"
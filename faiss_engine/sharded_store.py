@@ -0,0 +1,207 @@
+"""
+Named collections (shards) of FAISSStores behind the FAISSStore interface.
+
+Entries are routed to a shard by one metadata field, e.g. shard_key="category"
+to keep one index per router.ROUTING_MAP category, or "tenant". Each shard
+has its own index, so shards are built, compacted and searched
+independently. Searches fan out to shards on a thread pool (FAISS releases
+the GIL while searching) and the per-shard top-k lists are merged with a
+heap. A filter on the shard key only visits the shards it names.
+
+Entry ids are (shard, id) pairs.
+"""
+
+import hashlib
+import heapq
+import itertools
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from .faiss_store import FAISSStore
+
+# Shard for entries without a value for the shard key
+DEFAULT_SHARD = "default"
+SHARDS_FILE = "shards.json"
+
+
+def has_sharded_snapshot(root):
+    return (Path(root) / SHARDS_FILE).is_file()
+
+
+def _shard_dir(name):
+    # Shard names are arbitrary metadata values ("", ".", "..", "a/b", ...);
+    # the directory is derived from a hash so it always stays inside the
+    # save root, and shards.json maps it back to the name
+    return "shard-" + hashlib.sha256(name.encode("utf-8")).hexdigest()[:32]
+
+
+class ShardedStore:
+    def __init__(self, dim=768, shard_key="category", max_workers=None, **store_params):
+        """
+        Args:
+            dim: Vector size
+            shard_key: Metadata field naming an entry's shard
+            max_workers: Threads searching shards in parallel (default: CPU count)
+            **store_params: Passed to every shard's FAISSStore (index_type, ...)
+        """
+        self.dim = dim
+        self.shard_key = shard_key
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.store_params = store_params
+        self.shards = {}                  # name -> FAISSStore
+        self.snapshot_info = None
+        self._pool = None
+
+    def shard(self, name):
+        """Returns the named shard, creating it on first use."""
+        store = self.shards.get(name)
+        if store is None:
+            store = self.shards[name] = FAISSStore(self.dim, **self.store_params)
+        return store
+
+    def shard_of(self, meta):
+        value = (meta or {}).get(self.shard_key)
+        return DEFAULT_SHARD if value is None else str(value)
+
+    def add(self, embedding, text, meta=None):
+        return self.add_batch([embedding], [text], [meta])[0]
+
+    def add_batch(self, embeddings, texts, metas=None):
+        """Adds entries to their shards (one add_batch per shard); returns their (shard, id) pairs."""
+        if metas is None:
+            metas = [None] * len(texts)
+        if len(embeddings) != len(texts) or len(metas) != len(texts):
+            raise ValueError("embeddings, texts and metas must have one entry per text")
+        rows = {}
+        for row, meta in enumerate(metas):
+            rows.setdefault(self.shard_of(meta), []).append(row)
+
+        keys = [None] * len(texts)
+        for name, shard_rows in rows.items():
+            ids = self.shard(name).add_batch(
+                [embeddings[row] for row in shard_rows],
+                [texts[row] for row in shard_rows],
+                [metas[row] for row in shard_rows],
+            )
+            for row, entry_id in zip(shard_rows, ids):
+                keys[row] = (name, entry_id)
+        return keys
+
+    def document_ids(self, doc_id):
+        return [(name, entry_id) for name, store in self.shards.items() for entry_id in store.document_ids(doc_id)]
+
+    def remove_ids(self, keys):
+        by_shard = {}
+        for name, entry_id in keys:
+            by_shard.setdefault(name, []).append(entry_id)
+        return sum(self.shards[name].remove_ids(ids) for name, ids in by_shard.items() if name in self.shards)
+
+    def remove_document(self, doc_id):
+        return sum(store.remove_document(doc_id) for store in self.shards.values())
+
+    def upsert_document(self, doc_id, chunks):
+        """
+        Replaces a document's chunks, which may move between shards when
+        their shard key changes. Returns the new (shard, id) pairs.
+        """
+        embeddings, texts, metas = [], [], []
+        for embedding, text, meta in chunks:
+            embeddings.append(embedding)
+            texts.append(text)
+            metas.append({**(meta or {}), "doc_id": doc_id})
+        old = self.document_ids(doc_id)
+        keys = self.add_batch(embeddings, texts, metas)
+        self.remove_ids(old)
+        return keys
+
+    def search(self, query_embedding, top_k=5, filters=None, shards=None):
+        return self.search_batch([query_embedding], top_k=top_k, filters=filters, shards=shards)[0]
+
+    def search_batch(self, query_embeddings, top_k=5, filters=None, shards=None):
+        """
+        Searches the selected shards (default: all, narrowed by a filter on
+        the shard key) in parallel and merges their results by distance.
+        Each hit also reports its "shard".
+        """
+        names = self._target_shards(filters, shards)
+        if not names:
+            return [[] for _ in query_embeddings]
+
+        def search_shard(name):
+            results = self.shards[name].search_batch(query_embeddings, top_k=top_k, filters=filters)
+            for hits in results:
+                for hit in hits:
+                    hit["shard"] = name
+            return results
+
+        if len(names) == 1:
+            per_shard = [search_shard(names[0])]
+        else:
+            per_shard = list(self._executor().map(search_shard, names))
+
+        # Each shard's hits are sorted by distance; merge them lazily
+        return [
+            list(itertools.islice(heapq.merge(*hits, key=lambda hit: hit["distance"]), top_k))
+            for hits in zip(*per_shard)
+        ]
+
+    def _target_shards(self, filters, shards):
+        names = list(self.shards) if shards is None else [name for name in shards if name in self.shards]
+        condition = (filters or {}).get(self.shard_key)
+        if condition is not None and not isinstance(condition, dict):
+            # Equality filter on the shard key: other shards cannot match
+            values = condition if isinstance(condition, (list, tuple, set, frozenset)) else [condition]
+            wanted = {str(value) for value in values}
+            names = [name for name in names if name in wanted]
+        return names
+
+    def _executor(self):
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="faiss-shard")
+        return self._pool
+
+    def memory_usage(self):
+        return {name: store.memory_usage() for name, store in self.shards.items()}
+
+    def save(self, path, extra=None):
+        """
+        Snapshots every shard into its own subdirectory of path, then
+        atomically writes shards.json naming the snapshot of each shard,
+        so a reader sees every shard as of the same save.
+        """
+        from .snapshot import _write_atomic
+
+        root = Path(path)
+        root.mkdir(parents=True, exist_ok=True)
+        shards = {}
+        for name, store in self.shards.items():
+            directory = _shard_dir(name)
+            snapshot = store.save(root / directory, extra=extra)
+            shards[name] = {"dir": directory, "snapshot": snapshot.name}
+        manifest = {
+            **(extra or {}),
+            "dim": self.dim,
+            "shard_key": self.shard_key,
+            "store": self.store_params,
+            "shards": shards,
+        }
+        _write_atomic(root / SHARDS_FILE, json.dumps(manifest, indent=2))
+        return root
+
+    @classmethod
+    def load(cls, path, mmap=True, max_workers=None):
+        """Loads the shards recorded in path/shards.json (see FAISSStore.load for mmap)."""
+        root = Path(path)
+        manifest = json.loads((root / SHARDS_FILE).read_text(encoding="utf-8"))
+        sharded = cls(manifest["dim"], shard_key=manifest["shard_key"], max_workers=max_workers, **manifest["store"])
+        for name, entry in manifest["shards"].items():
+            sharded.shards[name] = FAISSStore.load(root / entry["dir"], mmap=mmap, snapshot=entry["snapshot"])
+        sharded.snapshot_info = manifest
+        return sharded
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
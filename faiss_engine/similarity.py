@@ -1,4 +1,4 @@
-from IDP_AI_Pipeline.embedder import embed_text
+from IDP_AI_Pipeline.embedder import embed_texts
 import numpy as np
 
 class DocumentSimilarityEngine:
@@ -7,7 +7,11 @@ class DocumentSimilarityEngine:
     
     def embed_full_doc(self, text):
         # embed whole document as a single vector
-        return embed_text(text)
+        return self.embed_full_docs([text])[0]
+
+    def embed_full_docs(self, texts):
+        # one vector per document, batched into as few requests as possible
+        return embed_texts(texts)
     
     def find_similar_documents(self, text, top_k=5):
         query = self.embed_full_doc(text)
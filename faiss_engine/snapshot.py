@@ -0,0 +1,150 @@
+"""
+On-disk snapshots of a FAISSStore.
+
+A snapshot root holds immutable snapshot directories plus a CURRENT file
+naming the live one:
+
+    root/
+        CURRENT                      -> "snapshot-1767268800000000000"
+        snapshot-1767268800000000000/     (creation time in ns)
+            manifest.json            format version, dim, count, index settings, caller extras
+            index.faiss              faiss.write_index output
+            documents.bin/.offsets   packed chunk texts
+            metadata.pkl             packed metadata table
+            ids.bin                  int64 entry id of each vector in the index
+            tombstones.bin           int64 ids deleted but not yet compacted
+
+A snapshot is written to a hidden temporary directory, flushed to disk,
+renamed into place and only then published by atomically replacing
+CURRENT, so neither readers nor a restart after a crash see a partial
+snapshot. Loading memory-maps the index and texts read-only, so worker
+processes opening the same snapshot share its pages.
+"""
+
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import time
+from array import array
+from pathlib import Path
+
+import faiss
+
+SNAPSHOT_FORMAT = 2
+# Format 1 predates entry ids: vector i is entry i and nothing is deleted
+READABLE_FORMATS = (1, SNAPSHOT_FORMAT)
+# Older snapshots kept after a save, for processes still reading them
+KEEP_SNAPSHOTS = 2
+
+
+def has_snapshot(root):
+    return (Path(root) / "CURRENT").is_file()
+
+
+def save_snapshot(store, root, extra=None):
+    """Writes store as a new snapshot under root and makes it current; returns its path."""
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    name = f"snapshot-{time.time_ns()}"
+    tmp = root / f".{name}.tmp"
+    tmp.mkdir()
+    try:
+        faiss.write_index(store.index, str(tmp / "index.faiss"))
+        store.documents.save(tmp / "documents")
+        with open(tmp / "metadata.pkl", "wb") as f:
+            pickle.dump(store.metadata, f, protocol=pickle.HIGHEST_PROTOCOL)
+        with open(tmp / "ids.bin", "wb") as f:
+            store.ids.tofile(f)
+        with open(tmp / "tombstones.bin", "wb") as f:
+            array("q", sorted(store.tombstones)).tofile(f)
+        manifest = {
+            **(extra or {}),
+            "format": SNAPSHOT_FORMAT,
+            "dim": store.dim,
+            "count": store.index.ntotal,
+            "kind": store.kind,
+            "index": store.index_config(),
+            "created": time.time(),
+        }
+        (tmp / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+        # CURRENT must never name a snapshot whose files a crash could truncate
+        for path in tmp.iterdir():
+            _fsync(path)
+        _fsync(tmp)
+        os.replace(tmp, root / name)
+        _fsync(root)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    _write_atomic(root / "CURRENT", name)
+    _prune(root, keep=KEEP_SNAPSHOTS)
+    return root / name
+
+
+def load_snapshot(root, mmap=True, name=None):
+    """
+    Reads the current snapshot under root, or the one called name.
+
+    Returns (index, documents, metadata, ids, tombstones, manifest). With
+    mmap=True the index and texts are memory-mapped read-only.
+    """
+    from .columnar import TextColumn
+
+    root = Path(root)
+    path = root / (name or (root / "CURRENT").read_text(encoding="utf-8").strip())
+    manifest = json.loads((path / "manifest.json").read_text(encoding="utf-8"))
+    if manifest.get("format") not in READABLE_FORMATS:
+        raise ValueError(
+            f"Unsupported snapshot format {manifest.get('format')!r} in {path} "
+            f"(expected {SNAPSHOT_FORMAT})"
+        )
+
+    flags = _mmap_flags(manifest.get("kind", "flat")) | faiss.IO_FLAG_READ_ONLY if mmap else 0
+    index = faiss.read_index(str(path / "index.faiss"), flags)
+    documents = TextColumn.load(path / "documents", use_mmap=mmap)
+    with open(path / "metadata.pkl", "rb") as f:
+        metadata = pickle.load(f)
+    if manifest["format"] == 1:
+        ids, tombstones = array("q", range(index.ntotal)), set()
+    else:
+        ids = array("q", (path / "ids.bin").read_bytes())
+        tombstones = set(array("q", (path / "tombstones.bin").read_bytes()))
+    return index, documents, metadata, ids, tombstones, manifest
+
+
+def _mmap_flags(kind):
+    # IO_FLAG_MMAP only maps IVF inverted lists; flat-code storage (flat,
+    # fp16, sq8, HNSW vectors) is read into memory unless IO_FLAG_MMAP_IFC
+    return faiss.IO_FLAG_MMAP if kind in ("ivf", "ivfpq") else faiss.IO_FLAG_MMAP_IFC
+
+
+def _write_atomic(path, text):
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    _fsync(path.parent)
+
+
+def _fsync(path):
+    """Flushes a file, or a directory's entries, to disk."""
+    if os.name == "nt" and path.is_dir():
+        return   # Windows cannot open directories; NTFS journals renames itself
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _prune(root, keep):
+    current = (root / "CURRENT").read_text(encoding="utf-8").strip()
+    snapshots = sorted(p for p in root.glob("snapshot-*") if p.is_dir() and p.name != current)
+    # Snapshot names sort by creation time; the newest `keep - 1` older ones stay
+    for old in snapshots[:max(0, len(snapshots) - (keep - 1))]:
+        shutil.rmtree(old, ignore_errors=True)
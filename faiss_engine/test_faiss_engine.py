@@ -0,0 +1,746 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+import json
+import tempfile
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extraction.result import ExtractionResult
+from faiss_engine.columnar import MetadataTable, TextColumn
+from faiss_engine.faiss_store import FAISSStore
+from faiss_engine.global_search import GlobalSearch
+from faiss_engine.sharded_store import DEFAULT_SHARD, ShardedStore
+from faiss_engine.ingest import DocumentIngestor
+
+
+def fake_embedding(text):
+    # Deterministic 768-dim vector derived from the text
+    return [float((hash(text) >> i) & 0xFF) / 255 for i in range(768)]
+
+
+def fake_embeddings(texts):
+    return np.array([fake_embedding(text) for text in texts], dtype='float32')
+
+
+class TestDocumentIngestor(unittest.TestCase):
+
+    @patch('faiss_engine.ingest.embed_texts', side_effect=fake_embeddings)
+    def test_chunks_carry_page_numbers(self, mock_embed):
+        result = ExtractionResult.from_pages(
+            [("Alpha beta. " * 20, "text-layer", 0.1), ("Gamma delta. " * 100, "ocr", 0.2)], "pdf"
+        )
+        with DocumentIngestor() as ingestor:
+            ingestor.ingest_document(result, "doc_1")
+
+            metadata = ingestor.get_store().metadata
+            self.assertEqual((metadata[0]["page_start"], metadata[0]["page_end"]), (1, 2))
+            self.assertEqual((metadata[-1]["page_start"], metadata[-1]["page_end"]), (2, 2))
+            # The second chunk starts 10 sentences (the overlap) before the first one ends
+            self.assertEqual(metadata[1]["char_start"], 241 + 24 * 13)
+            self.assertEqual(ingestor.get_store().documents[0][:11], "Alpha beta.")
+
+    @patch('faiss_engine.ingest.embed_texts', side_effect=fake_embeddings)
+    def test_plain_text_has_no_pages(self, mock_embed):
+        with DocumentIngestor() as ingestor:
+            ingestor.ingest_document("plain text document", "doc_2")
+
+            meta = ingestor.get_store().metadata[0]
+            self.assertEqual(meta["doc_id"], "doc_2")
+            self.assertNotIn("page_start", meta)
+
+    @patch('faiss_engine.ingest.embed_texts', side_effect=fake_embeddings)
+    def test_embeds_chunks_in_batches(self, mock_embed):
+        with DocumentIngestor() as ingestor:
+            ingestor.ingest_document("Sentence number one. " * 3000, "doc_3")
+
+            chunk_count = len(ingestor.get_store().documents)
+            self.assertGreater(chunk_count, 100)
+            self.assertEqual(mock_embed.call_count, -(-chunk_count // 100))
+
+    def test_store_dimension_follows_embedder(self):
+        fake = MagicMock(model="fake-model", dim=16)
+        with patch('faiss_engine.ingest.get_embedder', return_value=fake), DocumentIngestor() as ingestor:
+            self.assertEqual(ingestor.get_store().dim, 16)
+
+    @patch('faiss_engine.ingest.embed_texts', side_effect=fake_embeddings)
+    def test_ingest_documents_packs_chunks_across_documents(self, mock_embed):
+        with DocumentIngestor(max_workers=3) as ingestor:
+            ingestor.ingest_documents(
+                (f"Document {n} says hello. It is short.", f"doc_{n}") for n in range(250)
+            )
+
+            metadata = ingestor.get_store().metadata
+            self.assertEqual([meta["doc_id"] for meta in metadata], [f"doc_{n}" for n in range(250)])
+            self.assertEqual(ingestor.get_store().documents[7], "Document 7 says hello. It is short.")
+            self.assertEqual(mock_embed.call_count, 3)
+
+
+class TestColumnarStorage(unittest.TestCase):
+
+    def test_text_column(self):
+        column = TextColumn()
+        column.extend(["invoice", "", "Größe € 5"])
+        self.assertEqual(len(column), 3)
+        self.assertEqual(column[2], "Größe € 5")
+        self.assertEqual(column[-2], "")
+        self.assertEqual(list(column), ["invoice", "", "Größe € 5"])
+        with self.assertRaises(IndexError):
+            column[3]
+
+    def test_metadata_table(self):
+        table = MetadataTable()
+        table.append({"doc_id": "a", "chunk_id": 0})
+        table.append(None)
+        table.append({"doc_id": "a", "chunk_id": 1, "page_start": 2, "tags": ["x"]})
+        table.append({"doc_id": "b", "chunk_id": "intro", "flag": True})
+
+        self.assertEqual(table[0], {"doc_id": "a", "chunk_id": 0})
+        self.assertEqual(table[1], {})
+        self.assertEqual(table[2], {"doc_id": "a", "chunk_id": 1, "page_start": 2, "tags": ["x"]})
+        self.assertEqual(table[3], {"doc_id": "b", "chunk_id": "intro", "flag": True})
+        self.assertIs(table[3]["flag"], True)
+        self.assertEqual(table.column("doc_id"), ["a", None, "a", "b"])
+
+    def test_matching_rows(self):
+        table = MetadataTable()
+        for i in range(6):
+            table.append({"doc_id": f"d{i % 3}", "page": i, "date": f"2024-0{i + 1}-01"})
+        table.append({"doc_id": "d0"})
+
+        self.assertEqual(table.matching_rows({"doc_id": "d0"}).tolist(), [0, 3, 6])
+        # Posting lists built by the first query are kept up to date
+        table.append({"doc_id": "d0", "page": 9})
+        self.assertEqual(table.matching_rows({"doc_id": ["d0", "d2"]}).tolist(), [0, 2, 3, 5, 6, 7])
+        self.assertEqual(table.matching_rows({"page": {"gte": 2, "lt": 5}}).tolist(), [2, 3, 4])
+        self.assertEqual(
+            table.matching_rows({"doc_id": "d1", "date": {"gt": "2024-03-15"}}).tolist(), [4]
+        )
+        self.assertEqual(table.matching_rows({"department": "hr"}).tolist(), [])
+        self.assertEqual(table.matching_rows({"page": "2"}).tolist(), [])
+        with self.assertRaises(ValueError):
+            table.matching_rows({"page": {"between": (1, 2)}})
+
+
+class TestFAISSStore(unittest.TestCase):
+
+    def test_vectors_are_reconstructed_from_index(self):
+        store = FAISSStore(dim=4)
+        store.add([1.0, 2.0, 3.0, 4.0], "first", meta={"doc_id": "d"})
+        store.add([0.5, 0.5, 0.5, 0.5], "second")
+
+        self.assertFalse(hasattr(store, "vectors"))
+        self.assertEqual(store.reconstruct(0).tolist(), [1.0, 2.0, 3.0, 4.0])
+        hit = store.search([0.5, 0.5, 0.5, 0.5], top_k=1)[0]
+        self.assertEqual((hit["text"], hit["metadata"]), ("second", {}))
+        self.assertEqual(store.memory_usage()["vectors"], 2 * 4 * 4)
+
+    def test_add_batch_and_search_batch(self):
+        store = FAISSStore(dim=2)
+        store.add_batch(
+            np.array([[0, 0], [3, 0], [0, 4]], dtype='float32'),
+            ["origin", "east", "north"],
+            [{"doc_id": "a"}, {"doc_id": "b"}, {"doc_id": "c"}]
+        )
+
+        results = store.search_batch(np.array([[0, 0], [3, 1]], dtype='float32'), top_k=5)
+
+        self.assertEqual([hit["text"] for hit in results[0]], ["origin", "east", "north"])
+        # Each hit reports its own (squared L2) distance
+        self.assertEqual([hit["distance"] for hit in results[0]], [0.0, 9.0, 16.0])
+        self.assertEqual(results[1][0]["metadata"], {"doc_id": "b"})
+        self.assertEqual(results[1][0]["distance"], 1.0)
+
+
+def clustered_vectors(n, dim=16, clusters=20, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)) * 5
+    return (centers[rng.integers(clusters, size=n)] + rng.normal(size=(n, dim))).astype('float32')
+
+
+class TestANNIndexes(unittest.TestCase):
+
+    def test_hnsw_store(self):
+        vectors = clustered_vectors(500)
+        store = FAISSStore(dim=16, index_type="hnsw", ef_search=128)
+        store.add_batch(vectors, [str(i) for i in range(500)])
+
+        self.assertEqual(store.kind, "hnsw")
+        self.assertEqual(store.search(vectors[42], top_k=1)[0]["text"], "42")
+
+    def test_ivf_trains_once_enough_vectors(self):
+        vectors = clustered_vectors(1200)
+        store = FAISSStore(dim=16, index_type="ivf", train_at=1000, nlist=8, nprobe=8)
+        store.add_batch(vectors[:900], [str(i) for i in range(900)])
+        self.assertEqual(store.kind, "flat")
+
+        store.add_batch(vectors[900:], [str(i) for i in range(900, 1200)])
+        store.wait_for_rebuild()
+        self.assertEqual(store.kind, "ivf")
+        self.assertEqual(store.index.ntotal, 1200)
+        np.testing.assert_array_equal(store.reconstruct(1100), vectors[1100])
+        # Probing every list makes IVF exact
+        self.assertEqual(store.search(vectors[1100], top_k=1)[0]["text"], "1100")
+
+    def test_training_does_not_block_writers(self):
+        import threading
+        from faiss_engine import faiss_store
+
+        vectors = clustered_vectors(1200)
+        store = FAISSStore(dim=16, index_type="ivf", train_at=1000, nlist=8, nprobe=8)
+        started, release = threading.Event(), threading.Event()
+        real_rebuild = faiss_store.rebuild
+
+        def slow_rebuild(*args, **kwargs):
+            started.set()
+            release.wait(10)
+            return real_rebuild(*args, **kwargs)
+
+        with patch('faiss_engine.faiss_store.rebuild', side_effect=slow_rebuild):
+            store.add_batch(vectors[:1000], [str(i) for i in range(1000)])
+            self.assertTrue(started.wait(10))
+            # The build is pending: adds and searches still go to the flat index
+            store.add_batch(vectors[1000:], [str(i) for i in range(1000, 1200)])
+            self.assertEqual(store.kind, "flat")
+            self.assertEqual(store.search(vectors[1100], top_k=1)[0]["text"], "1100")
+            release.set()
+            store.wait_for_rebuild()
+
+        # Vectors added while the index was being built are carried over
+        self.assertEqual((store.kind, store.index.ntotal), ("ivf", 1200))
+        self.assertEqual(store.search(vectors[1150], top_k=1)[0]["text"], "1150")
+
+    def test_flat_store_promotes_past_threshold(self):
+        vectors = clustered_vectors(300)
+        store = FAISSStore(dim=16, promote_at=250, promote_to="hnsw")
+        for start in range(0, 300, 100):
+            store.add_batch(vectors[start:start + 100], [str(i) for i in range(start, start + 100)])
+        store.wait_for_rebuild()
+        self.assertEqual((store.kind, store.index_type), ("hnsw", "hnsw"))
+
+        exact = FAISSStore(dim=16, promote_at=None)
+        exact.add_batch(vectors, [str(i) for i in range(300)])
+        self.assertEqual(exact.kind, "flat")
+
+    def test_snapshot_keeps_index_type(self):
+        vectors = clustered_vectors(1000)
+        store = FAISSStore(dim=16, index_type="ivf", train_at=1000, nlist=8, nprobe=3)
+        store.add_batch(vectors, [str(i) for i in range(1000)])
+        store.wait_for_rebuild()
+        with tempfile.TemporaryDirectory() as root:
+            store.save(root)
+            loaded = FAISSStore.load(root)
+            self.assertEqual((loaded.kind, loaded.nprobe, loaded.index_params), ("ivf", 3, {"nlist": 8}))
+            self.assertEqual(loaded.search(vectors[7], top_k=1)[0]["text"], "7")
+
+
+class TestQuantizedIndexes(unittest.TestCase):
+
+    def test_fp16_store_needs_no_training(self):
+        vectors = clustered_vectors(200)
+        store = FAISSStore(dim=16, index_type="fp16")
+        store.add_batch(vectors, [str(i) for i in range(200)])
+
+        self.assertEqual(store.kind, "fp16")
+        np.testing.assert_allclose(store.reconstruct(5), vectors[5], rtol=1e-3)
+        self.assertEqual(store.search(vectors[5], top_k=1)[0]["text"], "5")
+
+    def test_sq8_store_trains_then_searches(self):
+        vectors = clustered_vectors(600)
+        store = FAISSStore(dim=16, index_type="sq8", train_at=500)
+        store.add_batch(vectors, [str(i) for i in range(600)])
+        store.wait_for_rebuild()
+
+        self.assertEqual(store.kind, "sq8")
+        self.assertEqual(store.search(vectors[123], top_k=1)[0]["text"], "123")
+
+    def test_ivfpq_with_exact_rerank(self):
+        vectors = clustered_vectors(1000)
+        texts = [str(i) for i in range(1000)]
+        plain = FAISSStore(dim=16, index_type="ivfpq", train_at=1000, nlist=8, nprobe=8, pq_m=4, pq_nbits=4)
+        reranked = FAISSStore(
+            dim=16, index_type="ivfpq", train_at=1000, nlist=8, nprobe=8, pq_m=4, pq_nbits=4,
+            rerank="flat", rerank_factor=10,
+        )
+        plain.add_batch(vectors, texts)
+        reranked.add_batch(vectors, texts)
+        plain.wait_for_rebuild()
+        reranked.wait_for_rebuild()
+
+        queries = vectors[:50]
+        expected = [str(i) for i in range(50)]
+        top_plain = [hits[0]["text"] for hits in plain.search_batch(queries, top_k=1)]
+        top_reranked = [hits[0]["text"] for hits in reranked.search_batch(queries, top_k=1)]
+        # Exact re-ranking recovers what 2-byte codes lose
+        self.assertEqual(top_reranked, expected)
+        self.assertLess(sum(a == b for a, b in zip(top_plain, expected)), 50)
+        self.assertEqual(reranked.search(vectors[0], top_k=1)[0]["distance"], 0.0)
+
+    def test_memory_report(self):
+        flat = FAISSStore(dim=768, promote_at=None)
+        sq8 = FAISSStore(dim=768, index_type="sq8")
+        ivfpq = FAISSStore(dim=768, index_type="ivfpq", pq_m=48, rerank="fp16")
+        self.assertEqual(flat.memory_usage()["per_million_vectors"], 3_072_000_000)
+
+        flat.add_batch(np.zeros((10, 768), dtype='float32'), [""] * 10)
+        self.assertEqual(flat.memory_usage()["vectors"], 10 * 768 * 4)
+        # Untrained stores are still flat and report flat costs
+        self.assertEqual(ivfpq.memory_usage()["bytes_per_vector"], 768 * 4)
+        sq8.kind = "sq8"
+        self.assertEqual(sq8.memory_usage()["bytes_per_vector"], 768)
+        ivfpq.kind = "ivfpq"
+        self.assertEqual(ivfpq.memory_usage()["bytes_per_vector"], 48 + 8 + 2 * 768)
+
+        reranked = FAISSStore(dim=16, index_type="ivfpq", train_at=0, pq_m=4, pq_nbits=4, nlist=4, rerank="flat")
+        self.assertEqual(reranked.memory_usage()["bytes_per_vector"], 64)
+        reranked.add_batch(clustered_vectors(300), [""] * 300)
+        reranked.wait_for_rebuild()
+        self.assertEqual(reranked.kind, "ivfpq")
+        self.assertEqual(reranked.memory_usage()["bytes_per_vector"], 2 + 8 + 64)
+
+    def test_add_after_memory_mapped_ivf_load(self):
+        vectors = clustered_vectors(1100)
+        store = FAISSStore(dim=16, index_type="ivf", train_at=1000, nlist=8, nprobe=8)
+        store.add_batch(vectors[:1000], [str(i) for i in range(1000)])
+        store.wait_for_rebuild()
+        with tempfile.TemporaryDirectory() as root:
+            store.save(root)
+            loaded = FAISSStore.load(root)
+            loaded.add_batch(vectors[1000:], [str(i) for i in range(1000, 1100)])
+            self.assertEqual((loaded.kind, loaded.index.ntotal, loaded.nprobe), ("ivf", 1100, 8))
+            self.assertEqual(FAISSStore.load(root).index.ntotal, 1000)
+
+
+class TestDeletesAndUpserts(unittest.TestCase):
+
+    def setUp(self):
+        self.vectors = clustered_vectors(100)
+        self.store = FAISSStore(dim=16)
+        self.store.add_batch(
+            self.vectors, [str(i) for i in range(100)],
+            [{"doc_id": f"doc{i // 10}", "chunk_id": i % 10} for i in range(100)]
+        )
+
+    def test_remove_document_tombstones_its_chunks(self):
+        self.assertEqual(self.store.remove_document("doc3"), 10)
+        self.assertEqual(self.store.remove_document("doc3"), 0)
+
+        hits = self.store.search(self.vectors[35], top_k=100)
+        self.assertEqual(len(hits), 90)
+        self.assertNotIn("doc3", {hit["metadata"]["doc_id"] for hit in hits})
+        # Nothing moved: ids still address the same entries
+        self.assertEqual(self.store.search(self.vectors[77], top_k=1)[0]["id"], 77)
+        np.testing.assert_array_equal(self.store.reconstruct(77), self.vectors[77])
+        with self.assertRaises(KeyError):
+            self.store.reconstruct(35)
+
+    def test_upsert_replaces_chunks(self):
+        new = clustered_vectors(3, seed=1)
+        ids = self.store.upsert_document("doc2", [(vector, f"new {i}", None) for i, vector in enumerate(new)])
+
+        self.assertEqual(ids, [100, 101, 102])
+        self.assertEqual(self.store.document_ids("doc2"), ids)
+        hit = self.store.search(new[1], top_k=1)[0]
+        self.assertEqual((hit["text"], hit["metadata"]), ("new 1", {"doc_id": "doc2"}))
+        self.assertNotIn("25", [hit["text"] for hit in self.store.search(self.vectors[25], top_k=100)])
+
+    def test_compaction_runs_in_background(self):
+        for doc in range(3):
+            self.store.remove_document(f"doc{doc}")
+        self.store.wait_for_compaction()
+
+        self.assertEqual((self.store.index.ntotal, len(self.store.tombstones)), (70, 0))
+        self.assertEqual(self.store.documents[5], "")
+        hit = self.store.search(self.vectors[64], top_k=1)[0]
+        self.assertEqual((hit["id"], hit["text"]), (64, "64"))
+        np.testing.assert_array_equal(self.store.reconstruct(99), self.vectors[99])
+
+    def test_ingest_and_search_concurrently(self):
+        import threading
+
+        vectors = clustered_vectors(2100)
+        store = FAISSStore(dim=16, index_type="hnsw")
+        store.add_batch(vectors[:100], [str(i) for i in range(100)])
+        errors = []
+
+        def ingest():
+            try:
+                for start in range(100, 2100, 50):
+                    store.add_batch(vectors[start:start + 50], [str(i) for i in range(start, start + 50)])
+            except Exception as e:
+                errors.append(e)
+
+        writer = threading.Thread(target=ingest)
+        writer.start()
+        searches = 0
+        while writer.is_alive() or not searches:
+            for hits in store.search_batch(vectors[:8], top_k=10):
+                self.assertEqual(len(hits), 10)
+                self.assertTrue(all(hit["text"] == str(hit["id"]) for hit in hits))
+            searches += 1
+        writer.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(store.index.ntotal, 2100)
+        self.assertEqual(store.search(vectors[2050], top_k=1)[0]["id"], 2050)
+
+    def test_compacted_ivf_keeps_its_training(self):
+        vectors = clustered_vectors(1000)
+        store = FAISSStore(dim=16, index_type="ivf", train_at=1000, nlist=8, nprobe=8)
+        store.add_batch(vectors, [str(i) for i in range(1000)], [{"doc_id": i % 4} for i in range(1000)])
+        store.wait_for_rebuild()
+        store.remove_document(0)
+        self.assertNotEqual(store.search(vectors[4], top_k=1)[0]["metadata"], {"doc_id": 0})
+
+        store.compact()
+        self.assertEqual((store.kind, store.index.ntotal), ("ivf", 750))
+        self.assertEqual(store.search(vectors[5], top_k=1)[0]["id"], 5)
+
+    def test_snapshot_keeps_ids_and_tombstones(self):
+        self.store.remove_document("doc1")
+        with tempfile.TemporaryDirectory() as root:
+            self.store.save(root)
+            loaded = FAISSStore.load(root)
+            self.assertEqual(loaded.tombstones, set(range(10, 20)))
+            self.assertEqual(loaded.document_ids("doc1"), [])
+            self.assertNotEqual(loaded.search(self.vectors[15], top_k=1)[0]["metadata"]["doc_id"], "doc1")
+            self.assertEqual(loaded.add(self.vectors[0], "again"), 100)
+
+    @patch('faiss_engine.ingest.embed_texts', side_effect=fake_embeddings)
+    def test_ingestor_replaces_reingested_document(self, mock_embed):
+        with DocumentIngestor() as ingestor:
+            ingestor.ingest_documents([("First version. " * 30, "doc_1"), ("Other document.", "doc_2")])
+            ingestor.ingest_document("Second version.", "doc_1")
+
+            store = ingestor.get_store()
+            self.assertEqual([store.documents[i] for i in store.document_ids("doc_1")], ["Second version."])
+            self.assertEqual(ingestor.remove_document("doc_2"), 1)
+            self.assertEqual(store.document_ids("doc_2"), [])
+
+
+    @patch('faiss_engine.ingest.embed_texts', side_effect=fake_embeddings)
+    def test_ingestor_keeps_last_copy_of_repeated_doc_id(self, mock_embed):
+        with DocumentIngestor() as ingestor:
+            ingestor.ingest_documents([
+                ("Old draft.", "doc_1", {"version": 1}),
+                ("Other document.", "doc_2"),
+                ("Final draft.", "doc_1", {"version": 2}),
+            ])
+            store = ingestor.get_store()
+            self.assertEqual([store.documents[i] for i in store.document_ids("doc_1")], ["Final draft."])
+            self.assertEqual(store.metadata[store.document_ids("doc_1")[0]]["version"], 2)
+            self.assertEqual(len(store.document_ids("doc_2")), 1)
+
+class TestFilteredSearch(unittest.TestCase):
+
+    def setUp(self):
+        self.vectors = clustered_vectors(1000)
+        self.metas = [
+            {"doc_id": f"doc{i % 50}", "category": ("invoice", "contract", "po")[i % 3], "year": 2020 + i % 5}
+            for i in range(1000)
+        ]
+
+    def check(self, store):
+        hits = store.search(self.vectors[0], top_k=10, filters={"category": "contract"})
+        # The nearest matching entries, not a filtered top_k of all entries
+        self.assertEqual(len(hits), 10)
+        self.assertEqual({hit["metadata"]["category"] for hit in hits}, {"contract"})
+
+        hits = store.search(self.vectors[0], top_k=10, filters={"category": ["po"], "year": {"gte": 2023}})
+        self.assertTrue(all(hit["metadata"]["year"] >= 2023 for hit in hits))
+        self.assertEqual(len(hits), 10)
+
+        hits = store.search(self.vectors[7], top_k=50, filters={"doc_id": "doc7"})
+        self.assertEqual(sorted(hit["id"] for hit in hits), list(range(7, 1000, 50)))
+        self.assertEqual(store.search(self.vectors[0], top_k=5, filters={"category": "memo"}), [])
+
+    def test_flat_store(self):
+        store = FAISSStore(dim=16)
+        store.add_batch(self.vectors, [str(i) for i in range(1000)], self.metas)
+        self.check(store)
+
+    def test_ann_stores(self):
+        for kwargs in (dict(index_type="hnsw", ef_search=128), dict(index_type="ivf", train_at=1000, nlist=8)):
+            store = FAISSStore(dim=16, **kwargs)
+            store.add_batch(self.vectors, [str(i) for i in range(1000)], self.metas)
+            self.check(store)
+
+    @patch('faiss_engine.faiss_store.EXACT_FILTER_MAX', 0)
+    def test_large_filters_use_an_id_selector(self):
+        for kwargs in (dict(), dict(index_type="ivf", train_at=1000, nlist=8, nprobe=8)):
+            store = FAISSStore(dim=16, **kwargs)
+            store.add_batch(self.vectors, [str(i) for i in range(1000)], self.metas)
+            self.check(store)
+
+    @patch('faiss_engine.faiss_store.EXACT_FILTER_MAX', 0)
+    def test_selective_hnsw_filter_keeps_recall(self):
+        vectors = clustered_vectors(5050)
+        base, queries = vectors[:5000], vectors[5000:]
+        rare = np.random.default_rng(3).random(5000) < 0.05
+        metas = [{"tag": "rare" if r else "common"} for r in rare]
+        hnsw = FAISSStore(dim=16, index_type="hnsw", ef_search=16)
+        flat = FAISSStore(dim=16)
+        for store in (hnsw, flat):
+            store.add_batch(base, [""] * 5000, metas)
+
+        got = hnsw.search_batch(queries, top_k=10, filters={"tag": "rare"})
+        truth = flat.search_batch(queries, top_k=10, filters={"tag": "rare"})
+        recall = np.mean([
+            len({hit["id"] for hit in a} & {hit["id"] for hit in b}) / 10 for a, b in zip(got, truth)
+        ])
+        # Without raising efSearch by 1 / selectivity this is about 0.7
+        self.assertGreaterEqual(recall, 0.95)
+
+    @patch('faiss_engine.faiss_store.EXACT_BATCH', 64)
+    def test_exact_filtered_search_in_batches(self):
+        store = FAISSStore(dim=16, index_type="hnsw")
+        store.add_batch(self.vectors, [str(i) for i in range(1000)], self.metas)
+        flat = FAISSStore(dim=16)
+        flat.add_batch(self.vectors, [str(i) for i in range(1000)], self.metas)
+
+        filters = {"category": "contract"}
+        self.assertEqual(
+            [hit["id"] for hit in store.search(self.vectors[0], top_k=10, filters=filters)],
+            [hit["id"] for hit in flat.search(self.vectors[0], top_k=10, filters=filters)],
+        )
+
+    def test_filters_skip_deleted_entries(self):
+        store = FAISSStore(dim=16)
+        store.add_batch(self.vectors, [str(i) for i in range(1000)], self.metas)
+        store.remove_document("doc7")
+        self.assertEqual(store.search(self.vectors[7], top_k=5, filters={"doc_id": "doc7"}), [])
+        hits = store.search(self.vectors[7], top_k=20, filters={"category": "invoice"})
+        self.assertNotIn("doc7", {hit["metadata"]["doc_id"] for hit in hits})
+
+    @patch('faiss_engine.global_search.embed_text', side_effect=fake_embedding)
+    @patch('faiss_engine.ingest.embed_texts', side_effect=fake_embeddings)
+    def test_global_search_filters_by_document_metadata(self, mock_embed, mock_query):
+        with DocumentIngestor() as ingestor:
+            ingestor.ingest_documents([
+                ("Invoice for pumps.", "inv", {"category": "invoice", "department": "finance"}),
+                ("Contract for pumps.", "con", {"category": "contract", "department": "legal"}),
+            ])
+
+            search = GlobalSearch(ingestor.get_store())
+            hits = search.search("pumps", filters={"department": "legal"})
+            self.assertEqual([hit["metadata"]["doc_id"] for hit in hits], ["con"])
+            self.assertEqual(hits[0]["metadata"]["category"], "contract")
+
+
+class TestShardedStore(unittest.TestCase):
+
+    def setUp(self):
+        self.vectors = clustered_vectors(600)
+        self.texts = [str(i) for i in range(600)]
+        self.metas = [
+            {"doc_id": f"doc{i % 30}", "category": ("Invoice", "HR Document", "Purchase Order")[i % 3]}
+            for i in range(600)
+        ]
+        self.sharded = ShardedStore(dim=16, max_workers=3)
+        self.sharded.add_batch(self.vectors, self.texts, self.metas)
+
+    def tearDown(self):
+        self.sharded.close()
+
+    def test_entries_are_routed_by_shard_key(self):
+        self.assertEqual(sorted(self.sharded.shards), ["HR Document", "Invoice", "Purchase Order"])
+        self.assertEqual(self.sharded.shards["Invoice"].index.ntotal, 200)
+        self.assertEqual(self.sharded.add(self.vectors[0], "no category"), (DEFAULT_SHARD, 0))
+
+    def test_fan_out_matches_a_single_store(self):
+        single = FAISSStore(dim=16)
+        single.add_batch(self.vectors, self.texts, self.metas)
+
+        merged = self.sharded.search_batch(self.vectors[:20], top_k=8)
+        expected = single.search_batch(self.vectors[:20], top_k=8)
+        for got, want in zip(merged, expected):
+            self.assertEqual([hit["distance"] for hit in got], [hit["distance"] for hit in want])
+            self.assertEqual({hit["text"] for hit in got}, {hit["text"] for hit in want})
+        hit = merged[0][0]
+        self.assertEqual((hit["text"], hit["shard"]), ("0", "Invoice"))
+
+    def test_filter_on_shard_key_skips_other_shards(self):
+        with patch.object(FAISSStore, "search_batch", autospec=True, side_effect=FAISSStore.search_batch) as spy:
+            hits = self.sharded.search(self.vectors[1], top_k=5, filters={"category": "HR Document"})
+        self.assertEqual(spy.call_count, 1)
+        self.assertEqual({hit["shard"] for hit in hits}, {"HR Document"})
+        self.assertEqual(len(self.sharded.search(self.vectors[1], top_k=5, shards=["Invoice", "Purchase Order"])), 5)
+        self.assertEqual(self.sharded.search(self.vectors[1], top_k=5, filters={"category": "Memo"}), [])
+
+    def test_remove_and_upsert_across_shards(self):
+        self.assertEqual(self.sharded.remove_document("doc4"), 20)
+        self.assertEqual(self.sharded.document_ids("doc4"), [])
+
+        keys = self.sharded.upsert_document(
+            "doc5", [(self.vectors[5], "moved", {"category": "Safety Document"})]
+        )
+        self.assertEqual(keys, [("Safety Document", 0)])
+        self.assertEqual(self.sharded.document_ids("doc5"), keys)
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as root:
+            self.sharded.save(root, extra={"embedding_model": "m"})
+            self.sharded.add(self.vectors[0], "after save", {"category": "Invoice"})
+            loaded = ShardedStore.load(root)
+            self.assertEqual(loaded.snapshot_info["embedding_model"], "m")
+            self.assertEqual(sum(store.index.ntotal for store in loaded.shards.values()), 600)
+            self.assertEqual(loaded.search(self.vectors[2], top_k=1)[0]["shard"], "Purchase Order")
+            loaded.close()
+
+    def test_save_keeps_every_shard_inside_the_root(self):
+        names = ["", ".", "..", "a/b"]
+        sharded = ShardedStore(dim=16)
+        sharded.add_batch(self.vectors[:4], names, [{"category": name} for name in names])
+        with tempfile.TemporaryDirectory() as parent:
+            root = os.path.join(parent, "store")
+            sharded.save(root)
+            sharded.save(root)
+            self.assertEqual(os.listdir(parent), ["store"])
+            self.assertEqual(
+                sorted(entry for entry in os.listdir(root) if not entry.startswith("shard-")), ["shards.json"]
+            )
+            loaded = ShardedStore.load(root)
+            self.assertEqual(sorted(loaded.shards), sorted(names))
+            for name in names:
+                self.assertEqual([hit["text"] for hit in loaded.search(self.vectors[0], shards=[name])], [name])
+            loaded.close()
+        sharded.close()
+
+    @patch('faiss_engine.ingest.embed_texts', side_effect=fake_embeddings)
+    def test_ingestor_shards_by_document_metadata(self, mock_embed):
+        with DocumentIngestor(shard_by="tenant") as ingestor:
+            ingestor.ingest_documents([
+                ("Acme invoice.", "a1", {"tenant": "acme"}),
+                ("Globex invoice.", "g1", {"tenant": "globex"}),
+            ])
+            store = ingestor.get_store()
+            self.assertEqual(sorted(store.shards), ["acme", "globex"])
+            hits = store.search(fake_embedding("Acme invoice."), top_k=5, filters={"tenant": "acme"})
+            self.assertEqual([hit["text"] for hit in hits], ["Acme invoice."])
+            self.assertEqual(len(store.search(fake_embedding("invoice"), top_k=5)), 2)
+            self.assertIsNotNone(store._pool)
+
+        # Closing shuts down the embedding workers and the shard search threads
+        self.assertIsNone(store._pool)
+        with self.assertRaises(RuntimeError):
+            ingestor.ingest_document("Late invoice.", "a2", {"tenant": "acme"})
+
+
+class TestSnapshots(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.store = FAISSStore(dim=3)
+        self.store.add_batch(
+            np.eye(3, dtype='float32'), ["x axis", "y axis", "z axis"],
+            [{"doc_id": "a", "chunk_id": n} for n in range(3)]
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip_memory_mapped(self):
+        self.store.save(self.root, extra={"embedding_model": "m"})
+        loaded = FAISSStore.load(self.root)
+
+        hit = loaded.search([0, 1, 0], top_k=1)[0]
+        self.assertEqual((hit["text"], hit["metadata"]), ("y axis", {"doc_id": "a", "chunk_id": 1}))
+        self.assertEqual(loaded.snapshot_info["embedding_model"], "m")
+
+        # The first write copies the mapped index; the snapshot is untouched
+        loaded.add([1, 1, 1], "diagonal")
+        self.assertEqual(loaded.documents[3], "diagonal")
+        self.assertEqual(FAISSStore.load(self.root).index.ntotal, 3)
+
+    @unittest.skipUnless(os.path.exists("/proc/self/maps"), "needs /proc/self/maps")
+    def test_loaded_indexes_are_memory_mapped(self):
+        vectors = clustered_vectors(1000)
+        for kwargs in (dict(), dict(index_type="hnsw"), dict(index_type="ivf", train_at=1000, nlist=8)):
+            with tempfile.TemporaryDirectory() as root:
+                store = FAISSStore(dim=16, **kwargs)
+                store.add_batch(vectors, [str(i) for i in range(1000)])
+                path = store.save(root) / "index.faiss"
+                loaded = FAISSStore.load(root)
+                with open("/proc/self/maps") as f:
+                    self.assertIn(str(path), f.read(), kwargs)
+                self.assertEqual(loaded.search(vectors[9], top_k=1)[0]["text"], "9")
+                del loaded
+
+    def test_saves_are_versioned_and_pruned(self):
+        first = self.store.save(self.root)
+        self.store.add([1, 1, 1], "diagonal")
+        second = self.store.save(self.root)
+        third = self.store.save(self.root)
+
+        with open(os.path.join(self.root, "CURRENT")) as f:
+            self.assertEqual(f.read(), third.name)
+        self.assertFalse(first.exists())
+        self.assertTrue(second.exists())
+        self.assertEqual(FAISSStore.load(self.root, mmap=False).index.ntotal, 4)
+
+    def test_add_after_loaded_snapshot_was_pruned(self):
+        vectors = clustered_vectors(1000)
+        for kwargs in (dict(), dict(index_type="ivf", train_at=1000, nlist=8, nprobe=8)):
+            with tempfile.TemporaryDirectory() as root:
+                store = FAISSStore(dim=16, **kwargs)
+                store.add_batch(vectors, [str(i) for i in range(1000)])
+                store.save(root)
+                loaded = FAISSStore.load(root)
+                # Two more saves prune the snapshot `loaded` was read from
+                loaded.save(root)
+                loaded.save(root)
+
+                loaded.add(vectors[3], "after prune")
+                self.assertEqual(loaded.index.ntotal, 1001)
+                self.assertEqual(loaded.search(vectors[500], top_k=1)[0]["text"], "500")
+
+    def test_snapshot_is_on_disk_before_current_names_it(self):
+        synced = []
+        real_fsync = os.fsync
+
+        def fsync(fd):
+            synced.append(os.readlink(f"/proc/self/fd/{fd}"))
+            real_fsync(fd)
+
+        with patch('os.fsync', side_effect=fsync):
+            path = self.store.save(self.root)
+
+        root = os.path.realpath(self.root)
+        tmp = os.path.join(root, f".{path.name}.tmp")
+        current = next(i for i, name in enumerate(synced) if os.path.basename(name).startswith(".CURRENT."))
+        before = set(synced[:current])
+        self.assertLessEqual({os.path.join(tmp, name) for name in os.listdir(path)} | {tmp, root}, before)
+        self.assertEqual(synced[-1], root)
+
+    def test_rejects_unknown_format(self):
+        path = self.store.save(self.root)
+        manifest = json.loads((path / "manifest.json").read_text())
+        manifest["format"] = 99
+        (path / "manifest.json").write_text(json.dumps(manifest))
+        with self.assertRaises(ValueError):
+            FAISSStore.load(self.root)
+
+    @patch('faiss_engine.ingest.embed_texts', side_effect=fake_embeddings)
+    def test_ingestor_loads_snapshot_on_startup(self, mock_embed):
+        fake = MagicMock(model="fake-model", dim=768)
+        with patch('faiss_engine.ingest.get_embedder', return_value=fake):
+            with DocumentIngestor(snapshot_dir=self.root) as ingestor:
+                ingestor.ingest_document("Saved once. Loaded later.", "doc_1")
+                ingestor.save()
+
+            with DocumentIngestor(snapshot_dir=self.root) as restarted:
+                self.assertEqual(restarted.get_store().documents[0], "Saved once. Loaded later.")
+
+            fake.model = "other-model"
+            with DocumentIngestor(snapshot_dir=self.root) as rebuilt:
+                self.assertEqual(len(rebuilt.get_store().documents), 0)
+        self.assertEqual(mock_embed.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
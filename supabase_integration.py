@@ -91,7 +91,7 @@ def download_and_extract(
     Returns:
         Tuple of (success: bool, message: str)
     """
-    from extraction.master_extractor import extract_any
+    from extraction.registry import extract_document
     
     # Initialize Supabase client
     client = SupabaseClient(bucket_name=bucket_name)
@@ -109,22 +109,20 @@ def download_and_extract(
     # Get filename from path
     file_name = file_path.split('/')[-1]
     
-    # Save temporarily for extraction
-    temp_path = Path(output_dir) / file_name
-    temp_path.write_bytes(file_content)
-    
-    print(f"Downloaded to {temp_path}")
     print(f"Extracting text from {file_path}...")
     
     try:
-        # Extract text using existing extraction pipeline
-        extracted_text = extract_any(str(temp_path))
+        # Extract text in memory using existing extraction pipeline
+        result = extract_document(file_content, file_name)
         
-        if extracted_text == "Unsupported file format":
-            return False, extracted_text
+        if not result.ok:
+            return False, result.error
+        for warning in result.warnings:
+            print(f"Warning: {warning}")
+        extracted_text = result.text
         
         # Save extracted text to file
-        output_file = temp_path.with_suffix('.txt')
+        output_file = (Path(output_dir) / file_name).with_suffix('.txt')
         output_file.write_text(extracted_text, encoding='utf-8')
         
         # Print to terminal
@@ -134,9 +132,6 @@ def download_and_extract(
         print(extracted_text)
         print("="*60 + "\n")
         
-        # Clean up temp file
-        temp_path.unlink()
-        
         return True, f"Successfully extracted and saved to {output_file}"
     
     except Exception as e: